@@ -0,0 +1,265 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import os
+import time
+import json
+import pickle
+import socket
+import socketserver
+import threading
+
+# Ledger of verification of even n, first <= n <= last, split into ranges of
+# range_size numbers; range i is leased to a worker until it is completed or
+# its lease expires (then it is leased again). Completed ranges and their
+# summaries are saved to file_ledger after every change, so that restarted
+# coordinator continues where it stopped.
+class LeaseLedger:
+
+    first = 0
+    last = 0
+    range_size = 0
+    lease_timeout = 0
+    file_ledger = ""
+
+    # index of range -> summary of its verification
+    completed = ""
+    # index of range -> (worker, deadline of lease)
+    leases = ""
+    # ranges below next_index were leased at least once
+    next_index = 0
+    # all ranges below frontier_index are completed
+    frontier_index = 0
+
+    def __init__ (self, first, last, range_size, lease_timeout, file_ledger = ""):
+        self.first = first + first % 2
+        self.last = last - last % 2
+        self.range_size = range_size
+        self.lease_timeout = lease_timeout
+        self.file_ledger = file_ledger
+        self.completed = {}
+        self.leases = {}
+        self.next_index = 0
+        self.frontier_index = 0
+        self.restore ()
+
+    def get_number_of_ranges (self):
+        return max((self.last - self.first) // (2 * self.range_size) + 1, 0)
+
+    # returns (first, last) of i-th range
+    def get_range (self, i):
+        first = self.first + 2 * self.range_size * i
+        return first, min(first + 2 * (self.range_size - 1), self.last)
+
+    # returns highest n such that all even n' <= n are verified
+    # (first - 2 if none)
+    def get_frontier (self):
+        if self.frontier_index >= self.get_number_of_ranges ():
+            return self.get_range (self.get_number_of_ranges () - 1)[1]
+        return self.get_range (self.frontier_index)[0] - 2
+
+    def is_finished (self):
+        return self.frontier_index >= self.get_number_of_ranges ()
+
+    # returns (i, first, last) of range leased to worker, None if all ranges
+    # are leased or completed
+    def acquire (self, worker, now):
+        expired = [i for (i, (w, deadline)) in self.leases.items() if deadline <= now]
+        if len(expired) > 0:
+            i = min(expired)
+        elif self.next_index < self.get_number_of_ranges ():
+            i = self.next_index
+            self.next_index += 1
+        else:
+            return None
+        self.leases[i] = (worker, now + self.lease_timeout)
+        first, last = self.get_range (i)
+        return i, first, last
+
+    # returns True if range i was not completed before
+    def complete (self, i, summary):
+        self.leases.pop (i, None)
+        if i in self.completed or i < 0 or i >= self.get_number_of_ranges ():
+            return False
+        self.completed[i] = summary
+        while self.frontier_index in self.completed:
+            self.frontier_index += 1
+        self.save ()
+        return True
+
+    def save (self):
+        if self.file_ledger == "":
+            return
+        # ledger is replaced at once, so it is never left half-written
+        file_tmp = self.file_ledger + ".tmp"
+        with open(file_tmp, 'wb') as f:
+            pickle.dump([self.first, self.last, self.range_size, self.completed], f)
+        os.replace (file_tmp, self.file_ledger)
+
+    def restore (self):
+        if self.file_ledger == "" or not os.path.exists(self.file_ledger):
+            return
+        with open(self.file_ledger, 'rb') as f:
+            first, last, range_size, completed = pickle.load(f)
+        if (first, range_size) != (self.first, self.range_size):
+            raise Exception ("Ledger", self.file_ledger, "was created for different ranges")
+        self.completed = {i: s for (i, s) in completed.items() if i < self.get_number_of_ranges ()}
+        while self.frontier_index in self.completed:
+            self.frontier_index += 1
+        self.next_index = max(self.completed, default=-1) + 1
+        # gaps between completed ranges are leased again first
+        self.leases = {i: ("", 0) for i in range (self.frontier_index, self.next_index) if i not in self.completed}
+
+# Requests and responses are single lines of JSON:
+#   o {"cmd": "lease", "worker": w}  -> {"lease": i, "first": a, "last": b},
+#                                       {"wait": true} or {"done": true}
+#   o {"cmd": "complete", "lease": i, "summary": s} -> {"ok": true}
+#   o {"cmd": "status"} -> {"frontier": n, "completed": c, "ranges": r}
+class CoordinatorHandler (socketserver.StreamRequestHandler):
+
+    def handle (self):
+        for line in self.rfile:
+            request = json.loads(line)
+            response = self.server.coordinator.dispatch (request)
+            self.wfile.write ((json.dumps(response) + "\n").encode())
+
+class TCPServer (socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class UnixServer (socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+# Coordinator of distributed verification; address - (host, port) for TCP
+# or path of Unix socket
+class Coordinator:
+
+    ledger = ""
+    address = ""
+    server = ""
+    lock = ""
+    on_complete = ""
+
+    # on_complete - called with (i, first, last, summary) for every newly
+    #               completed range
+    def __init__ (self, ledger, address, on_complete = None):
+        self.ledger = ledger
+        self.address = address
+        self.lock = threading.Lock()
+        self.on_complete = on_complete
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove (address)
+            self.server = UnixServer (address, CoordinatorHandler)
+        else:
+            self.server = TCPServer (address, CoordinatorHandler)
+            # port 0 - actual port chosen by OS
+            self.address = self.server.server_address
+        self.server.coordinator = self
+
+    def dispatch (self, request):
+        with self.lock:
+            if request['cmd'] == 'lease':
+                if self.ledger.is_finished ():
+                    return {'done': True}
+                lease = self.ledger.acquire (request.get('worker', ""), time.monotonic())
+                if lease is None:
+                    return {'wait': True}
+                i, first, last = lease
+                return {'lease': i, 'first': first, 'last': last}
+            elif request['cmd'] == 'complete':
+                i = request['lease']
+                if self.ledger.complete (i, request['summary']) and self.on_complete is not None:
+                    first, last = self.ledger.get_range (i)
+                    self.on_complete (i, first, last, request['summary'])
+                return {'ok': True}
+            elif request['cmd'] == 'status':
+                return {'frontier': self.ledger.get_frontier (),
+                        'completed': len(self.ledger.completed),
+                        'ranges': self.ledger.get_number_of_ranges ()}
+            return {'error': 'unknown command'}
+
+    # serves requests until all ranges are completed
+    def serve (self, poll_interval = 0.5):
+        thread = threading.Thread (target=self.server.serve_forever, args=(poll_interval,))
+        thread.daemon = True
+        thread.start()
+        while not self.ledger.is_finished ():
+            time.sleep (poll_interval)
+        # let workers learn that verification is done
+        time.sleep (2 * poll_interval)
+        self.close ()
+
+    def close (self):
+        self.server.shutdown ()
+        self.server.server_close ()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove (self.address)
+
+# Worker of distributed verification; verify (first, last) returns
+# JSON-serializable summary of verification of even n, first <= n <= last
+class Worker:
+
+    address = ""
+    name = ""
+    retry_interval = 0
+
+    def __init__ (self, address, name = "", retry_interval = 1.0):
+        self.address = address
+        self.name = name
+        if name == "":
+            self.name = socket.gethostname() + ":" + str(os.getpid())
+        self.retry_interval = retry_interval
+
+    def request (self, request):
+        if isinstance(self.address, str):
+            s = socket.socket (socket.AF_UNIX, socket.SOCK_STREAM)
+            address = self.address
+        else:
+            s = socket.socket (socket.AF_INET, socket.SOCK_STREAM)
+            address = tuple(self.address)
+        with s:
+            s.connect (address)
+            s.sendall ((json.dumps(request) + "\n").encode())
+            return json.loads(s.makefile().readline())
+
+    # takes leases until coordinator reports that all ranges are done
+    # (or coordinator is gone); returns number of verified ranges
+    def run (self, verify):
+        count = 0
+        while True:
+            try:
+                response = self.request ({'cmd': 'lease', 'worker': self.name})
+                if 'done' in response:
+                    return count
+                if 'wait' in response:
+                    time.sleep (self.retry_interval)
+                    continue
+                summary = verify (response['first'], response['last'])
+                self.request ({'cmd': 'complete', 'lease': response['lease'], 'summary': summary})
+                count += 1
+            except (ConnectionError, json.JSONDecodeError):
+                return count
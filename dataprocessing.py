@@ -25,10 +25,117 @@
 # 
 
 import sys
+import itertools
+import numpy as np
+import partitionset
 
+# characters of pairs dump other than digits and whitespaces
+PAIRS_SEPARATORS = str.maketrans("[](),", "     ")
+
+# running statistics of sequence of values: every add is O(1), so average
+# (or variance, min, max) of all values so far is known after every value
+# without going over the whole list again
+class RunningStats:
+
+    count = 0
+
+    # sum of values with compensation of rounding errors (Neumaier)
+    total = 0
+    compensation = 0
+
+    # mean and sum of squares of deviations from it (Welford)
+    mean = 0
+    m2 = 0
+
+    min_value = 0
+    max_value = 0
+
+    # values - initial values (e.g. list restored from file)
+    def __init__ (self, values = ()):
+        self.count = 0
+        self.total = 0
+        self.compensation = 0
+        self.mean = 0
+        self.m2 = 0
+        self.min_value = 0
+        self.max_value = 0
+        for x in values:
+            self.add (x)
+
+    def add (self, x):
+        self.count += 1
+        total = self.total + x
+        if abs(self.total) >= abs(x):
+            self.compensation += (self.total - total) + x
+        else:
+            self.compensation += (x - total) + self.total
+        self.total = total
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.count == 1 or x < self.min_value:
+            self.min_value = x
+        if self.count == 1 or x > self.max_value:
+            self.max_value = x
+
+    # same as DataProcessing.get_avg_value_from_list of all values
+    def get_avg (self):
+        if self.count > 0:
+            return (self.total + self.compensation) / self.count
+        else:
+            return 0
+
+    def get_variance (self):
+        if self.count > 0:
+            return self.m2 / self.count
+        else:
+            return 0
+
+    def get_min (self):
+        return self.min_value
+
+    def get_max (self):
+        return self.max_value
+
+# trend of sequence of values: factor is increased for every value higher
+# than the previous one and decreased for every lower one
+class TrendCounter:
+
+    previous = 0
+    factor = 0
+
+    def __init__ (self, previous = 0):
+        self.previous = previous
+        self.factor = 0
+
+    # returns current trend factor
+    def add (self, x):
+        if self.previous > x:
+            self.factor -= 1
+        elif self.previous < x:
+            self.factor += 1
+        self.previous = x
+        return self.factor
+
+# factors of n are given either as list of pairs (p1, p2) or as
+# partitionset.PartitionSet; the latter is processed by vectorized code
 class DataProcessing:
 
+    # returns NumPy arrays of p1 and p2 of factors (list of pairs, NumPy
+    # array of shape (k, 2) or PartitionSet)
+    def get_factor_arrays (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            return factors.p1, factors.get_p2 ()
+        if isinstance(factors, np.ndarray):
+            pairs = factors.reshape(-1, 2)
+        else:
+            pairs = np.fromiter(itertools.chain.from_iterable(factors), dtype=np.int64, count=2*len(factors)).reshape(-1, 2)
+        return pairs[:, 0], pairs[:, 1]
+
+    # for PartitionSet NumPy array of diffs is returned
     def get_diff_in_factors (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            return factors.get_p2 () - factors.p1
         diffs = []
         for pair in factors:
             (p1, p2) = pair
@@ -37,6 +144,10 @@ class DataProcessing:
         return diffs
 
     def get_max_factor (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            if len(factors) == 0:
+                return 0
+            return int(max(factors.p1.max(), factors.get_p2 ().max()))
         maxv = 0
         for pair in factors:
             (p1, p2) = pair
@@ -47,6 +158,8 @@ class DataProcessing:
         return maxv
 
     def get_avg_factor (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            return factors.n * len(factors) / (2 * len(factors))
         sumv = 0
         count = 0
         for pair in factors:
@@ -57,6 +170,10 @@ class DataProcessing:
         return avgv
 
     def get_min_factor (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            if len(factors) == 0:
+                return sys.maxsize
+            return int(min(factors.p1.min(), factors.get_p2 ().min()))
         minv = sys.maxsize
         for pair in factors:
             (p1, p2) = pair
@@ -67,16 +184,26 @@ class DataProcessing:
         return minv
 
     def get_unique_factors (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            both = np.column_stack((factors.p1, factors.get_p2 ())).ravel()
+            (values, first) = np.unique(both, return_index=True)
+            return both[np.sort(first)].tolist()
         uf = []
         for pair in factors:
             (p1, p2) = pair
             if p1 not in uf:
                 uf.append (p1)
-            if p1 not in uf:
+            if p2 not in uf:
                 uf.append (p2)
         return uf
 
     def get_max_ratio_in_factors (self, factors):
+        if isinstance(factors, partitionset.PartitionSet):
+            ratios = factors.p1 / factors.get_p2 ()
+            ratios = ratios[ratios <= 1]
+            if len(ratios) == 0 or ratios.max() <= 0:
+                return 0
+            return float(ratios.max())
         maxr = 0
         for pair in factors:
             (p1, p2) = pair
@@ -106,6 +233,34 @@ class DataProcessing:
             avg_p = self.get_avg_factor (factors)
             return avg_p / n * 100
 
+    # all statistics of GPs of n in one pass; factors is list of pairs
+    # (p1, p2), NumPy array of shape (k, 2) or PartitionSet; returns tuple:
+    #   (number of pairs, min factor, max factor, avg factor,
+    #    min diff, max diff, avg diff, min/max/avg saturation)
+    # where diff is p2 - p1 and saturation is factor / n * 100
+    def get_partition_stats (self, n, factors):
+        (p1, p2) = self.get_factor_arrays (factors)
+        count = len(p1)
+        if count == 0:
+            min_factor = sys.maxsize
+            max_factor = min_diff = max_diff = 0
+            avg_factor = avg_diff = 0
+        else:
+            diffs = p2 - p1
+            min_factor = int(min(p1.min(), p2.min()))
+            max_factor = int(max(p1.max(), p2.max()))
+            avg_factor = (int(p1.sum()) + int(p2.sum())) / (2 * count)
+            min_diff = int(diffs.min())
+            max_diff = int(diffs.max())
+            avg_diff = int(diffs.sum()) / count
+        if n == 0:
+            min_sat = max_sat = avg_sat = 0
+        else:
+            min_sat = min_factor / n * 100
+            max_sat = max_factor / n * 100
+            avg_sat = avg_factor / n * 100
+        return count, min_factor, max_factor, avg_factor, min_diff, max_diff, avg_diff, min_sat, max_sat, avg_sat
+
     def get_max_value_from_list (self, l):
         return max(l)
 
@@ -165,3 +320,22 @@ class DataProcessing:
         line = line.replace('Number: ', '')
         num_from_file = int(line)
         return num_from_file
+
+    # returns NumPy array of p1 of all pairs (p1, p2) from line of pairs dump
+    def read_p1_from_line (self, line):
+        text = line.partition(':')[2].translate(PAIRS_SEPARATORS).strip()
+        if text == "":
+            return np.zeros(0, dtype=np.int64)
+        return np.fromstring(text, dtype=np.int64, sep=' ')[0::2]
+
+    # yields (n, PartitionSet) for every record of pairs dump ("Number: n"
+    # line followed by " Pairs: [(p1, p2), ...]" line); file is read line
+    # by line, so memory does not depend on its size
+    def iter_sums_from_file (self, file_name):
+        num_from_file = 0
+        with open(file_name, 'r') as f:
+            for line in f:
+                if line.startswith("Number:"):
+                    num_from_file = int(line[7:])
+                elif "Pairs:" in line:
+                    yield num_from_file, partitionset.PartitionSet (num_from_file, self.read_p1_from_line (line))
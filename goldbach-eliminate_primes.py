@@ -36,6 +36,7 @@ import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
 import dataprocessing
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -51,6 +52,12 @@ be_verbose = False
 #   o False - do not cache new p    rimality test results
 caching_primality_results = False
 
+# Finding GPs
+#   o True  - all GPs of n are found at once from prime bitmap (faster,
+#             more RAM is occupied)
+#   o False - primality test of every candidate
+use_bitmap_mode = True
+
 min_num = 2
 max_num = 12500
 step_factor = 2
@@ -58,6 +65,11 @@ checkpoint_value = 2500
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -83,6 +95,9 @@ list_no_of_eliminated_primes_to_no_of_partitions = []
 list_no_of_eliminated_primes_to_no_of_partitions_avg = []
 list_no_of_eliminated_primes_to_no_of_req_primes = []
 list_no_of_eliminated_primes_to_no_of_req_primes_avg = []
+# running averages of the two lists above (O(1) per n)
+running_no_of_eliminated_primes_to_no_of_partitions = dataprocessing.RunningStats()
+running_no_of_eliminated_primes_to_no_of_req_primes = dataprocessing.RunningStats()
 list_percentages = [[],[],[]]
 
 list_nums = []
@@ -104,8 +119,8 @@ def update_metrics (p, dp, num, factors):
         if len(set_required_factors) < min_lenght:
             min_lenght = len(set_required_factors)
 
-    no_primes = p.get_all_primes_leq(num)
-    no_primes_half_n = p.get_all_primes_leq(math.floor(num / 4))
+    no_primes = gp.get_all_primes_leq(num)
+    no_primes_half_n = gp.get_all_primes_leq(math.floor(num / 4))
     list_no_of_primes_half.append (math.ceil( no_primes / 4))
     list_no_of_primes.append(no_primes)
     list_no_of_primes_half_n.append(no_primes_half_n)
@@ -127,10 +142,12 @@ def update_metrics (p, dp, num, factors):
     list_no_of_eliminated_primes.append (len(list_of_eliminated_primes))
 
     list_no_of_eliminated_primes_to_no_of_partitions.append(len(list_of_eliminated_primes)/dp.get_number_of_pairs (factors))
-    list_no_of_eliminated_primes_to_no_of_partitions_avg.append(dp.get_avg_value_from_list (list_no_of_eliminated_primes_to_no_of_partitions))
+    running_no_of_eliminated_primes_to_no_of_partitions.add (list_no_of_eliminated_primes_to_no_of_partitions[-1])
+    list_no_of_eliminated_primes_to_no_of_partitions_avg.append(running_no_of_eliminated_primes_to_no_of_partitions.get_avg ())
 
     list_no_of_eliminated_primes_to_no_of_req_primes.append(len(list_of_eliminated_primes)/min_lenght)
-    list_no_of_eliminated_primes_to_no_of_req_primes_avg.append(dp.get_avg_value_from_list (list_no_of_eliminated_primes_to_no_of_req_primes))
+    running_no_of_eliminated_primes_to_no_of_req_primes.add (list_no_of_eliminated_primes_to_no_of_req_primes[-1])
+    list_no_of_eliminated_primes_to_no_of_req_primes_avg.append(running_no_of_eliminated_primes_to_no_of_req_primes.get_avg ())
 
     if no_primes > 0:
         list_percentages[0].append (int(len(list_of_eliminated_primes)/no_primes*100))
@@ -250,17 +267,24 @@ def write_results_to_files (directory):
 
 print ("---------------------------------------------------")
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+if use_bitmap_mode:
+    gp.set_bitmap_mode (True, step_factor*max_num)
 dp = dataprocessing.DataProcessing()
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, True)
-p.init_set(file_input_nonprimes, False)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_primes_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, True)
+    p.init_set(file_input_nonprimes, False)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_primes_set()
+    print ("DONE")
 print ("Output result folder: ", directory)
 print ("---------------------------------------------------")
 
@@ -37,6 +37,7 @@ import pickle
 import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -69,12 +70,30 @@ caching_primality_results = False
 # Algorithms to be checked
 algo_to_check = {'a1'}
 
+# Block search for algorithm A1
+#   o True  - block_size differences are resolved at once with NumPy
+#   o False - differences are resolved one by one
+# (block search requires step_factor = 2)
+use_block_search = True
+block_size = 100000
+
+# Instrumentation of searches
+#   o True  - iterations and time of searches are collected per algorithm
+#             and printed at every checkpoint
+#   o False - no statistics are collected
+use_search_stats = False
+
 # Helper files
 #   o file_input_primes - contains prime numbers
 #   o file_input_nonprimes - contains composite numbers
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -219,16 +238,22 @@ def restore_previous_results (file_output_pickle):
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+gp.set_stats_mode (use_search_stats)
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, True)
-p.init_set(file_input_nonprimes, False)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_prime_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, True)
+    p.init_set(file_input_nonprimes, False)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_prime_set()
+    print ("DONE")
 print ("Restoring previous results...")
 restore_previous_results (file_output_pickle)
 if k_current > 0:
@@ -239,56 +264,86 @@ print ("DONE")
 dt_start = datetime.now()
 dt_current_previous = dt_start
 
-# new calculations
-for k in range (min_num, max_num):
-    num = step_factor*k
-    loops += 1
+if step_factor != 2:
+    use_block_search = False
 
-    if create_detailed_figures:
-        list_nums.append (num)
+# checkpoint is reached for every k which is a multiple of checkpoint_period
+checkpoint_period = checkpoint_value // math.gcd(checkpoint_value, step_factor)
 
-    # algorithm 1
-    if 'a1' in algo_to_check:
-        (p1, p2, duration, iterations) = gp.search_for_difference (num)
-        dt_diff[0] += duration
-        dt_iter[0] += iterations
-
-        avg_iterations = int (dt_iter[0]/loops)
-        diff_iterations = abs (previous_iterations - iterations)
-        if iterations > max_iterations:
-            max_iteration_details = str (num) + "=" +str(p2) + "-" + str(p1) + "(max:" + str(iterations) + ", avg:" + str(avg_iterations) + ")"
-            max_iterations = iterations
+# new calculations
+k_batch = min_num
+while k_batch < max_num:
+    # block ends at the next checkpoint
+    k_checkpoint = (k_batch + checkpoint_period - 1) // checkpoint_period * checkpoint_period
+    k_batch_end = min(k_batch + block_size, k_checkpoint + 1, max_num)
+
+    if use_block_search and 'a1' in algo_to_check:
+        startTime = time.time()
+        (block_p1, block_p2, block_iters) = gp.search_for_difference_block (step_factor*k_batch, step_factor*(k_batch_end - 1))
+        dt_diff[0] += time.time() - startTime
+        block_p1 = block_p1.tolist()
+        block_p2 = block_p2.tolist()
+        block_iters = block_iters.tolist()
+
+    for k in range (k_batch, k_batch_end):
+        num = step_factor*k
+        loops += 1
 
         if create_detailed_figures:
-            list_iterations.append(iterations)
-            list_iterations_max.append(max_iterations)
-            list_iterations_avg.append(avg_iterations)
-            list_iterations_diff.append(diff_iterations)
-
-        if p2 - p1 != num:
-            print ("Alg #1: violation of diff for n=", num, "p2=", p2, "p1=", p1)
-
-        previous_iterations = iterations
+            list_nums.append (num)
 
-    # checkpoint - partial results
-    if num % checkpoint_value == 0:
-        dt_current = datetime.now()
-        dt_diff_current = (dt_current - dt_current_previous).total_seconds()
-
-        list_checkpoints.append(num)
+        # algorithm 1
         if 'a1' in algo_to_check:
-            list_checkpoints_duration[0].append(dt_diff[0])
-            list_checkpoints_iters[0].append(dt_iter[0])
-            list_checkpoints_iters_avg[0].append(avg_iterations)
-            list_checkpoints_iters_max[0].append(max_iterations)
-
-        perc_completed = str(int(k * 100 / max_num))
-        print ("Checkpoint", k, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)", max_iteration_details)
+            if use_block_search:
+                i = k - k_batch
+                p1 = block_p1[i]
+                p2 = block_p2[i]
+                iterations = block_iters[i]
+            else:
+                (p1, p2, duration, iterations) = gp.search_for_difference (num)
+                dt_diff[0] += duration
+            dt_iter[0] += iterations
+
+            avg_iterations = int (dt_iter[0]/loops)
+            diff_iterations = abs (previous_iterations - iterations)
+            if iterations > max_iterations:
+                max_iteration_details = str (num) + "=" +str(p2) + "-" + str(p1) + "(max:" + str(iterations) + ", avg:" + str(avg_iterations) + ")"
+                max_iterations = iterations
+
+            if create_detailed_figures:
+                list_iterations.append(iterations)
+                list_iterations_max.append(max_iterations)
+                list_iterations_avg.append(avg_iterations)
+                list_iterations_diff.append(diff_iterations)
+
+            if p2 - p1 != num:
+                print ("Alg #1: violation of diff for n=", num, "p2=", p2, "p1=", p1)
+
+            previous_iterations = iterations
+
+        # checkpoint - partial results
+        if num % checkpoint_value == 0:
+            dt_current = datetime.now()
+            dt_diff_current = (dt_current - dt_current_previous).total_seconds()
+
+            list_checkpoints.append(num)
+            if 'a1' in algo_to_check:
+                list_checkpoints_duration[0].append(dt_diff[0])
+                list_checkpoints_iters[0].append(dt_iter[0])
+                list_checkpoints_iters_avg[0].append(avg_iterations)
+                list_checkpoints_iters_max[0].append(max_iterations)
+
+            perc_completed = str(int(k * 100 / max_num))
+            print ("Checkpoint", k, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)", max_iteration_details)
+            if use_search_stats:
+                print (gp.stats.summary())
         
-        # save results collected so far
-        write_results_to_figures (directory)
-        k_current = k
-        save_current_results(file_output_pickle)
+            # save results collected so far
+            write_results_to_figures (directory)
+            k_current = k
+            save_current_results(file_output_pickle)
+
+    k_batch = k_batch_end
 
 dt_end = datetime.now()
 
@@ -29,7 +29,9 @@ import unittest
 import os
 import time
 import numpy as np
+import concurrent.futures
 import goldbach
+import coordinator
 import sys
 sys.path.insert(0, '..\\primes\\')
 import primes
@@ -46,48 +48,152 @@ maximum_n = 10000000
 # Chunk size for distributed computation
 max_chunk_size = 100000
 
-# Caching previous primality results
-#   o True  - auxilary sets of primes and composite numbers will grow
-#             it will speed up further primality tests but more RAM will
-#             be occupied
-#   o False - do not cache new primality test results
-caching_primality_results = False
+# Parallel verification
+#   o True  - chunks are split into sub-ranges of sub_chunk_size numbers,
+#             which are taken from shared queue by number_of_workers
+#             processes; idle process takes next sub-range
+#   o False - chunks are verified one after another in this process
+use_process_pool = True
+number_of_workers = os.cpu_count()
+sub_chunk_size = 12500
 
-# Helper files
-#   o file_input_primes - contains prime numbers
-#   o file_input_nonprimes - contains composite numbers
-file_input_primes = '..\\primes\\t_prime_numbers.txt'
-file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
+# Distribution of verification over network
+#   o 'local'       - whole range is verified on this machine
+#   o 'coordinator' - sub-ranges are leased to workers (on any machine);
+#                     lease not completed in lease_timeout seconds is given
+#                     to another worker; completed sub-ranges are kept in
+#                     file_ledger, so restarted coordinator loses no work
+#   o 'worker'      - sub-ranges leased from coordinator are verified
+#                     (by number_of_workers processes if use_process_pool)
+distr_mode = 'local'
+# (host, port) of coordinator or path of Unix socket
+coordinator_address = ('localhost', 50007)
+lease_timeout = 600
+file_ledger = 'distr_ledger.pickle'
+
+# Small primes tried for all numbers of sub-range at once
+# (see GoldbachPartition.verify_segment)
+small_primes_limit = 65536
+
+#############################################################
+# Verification
+#############################################################
+
+gp = ""
+
+def init_worker ():
+    global gp
+    gp = goldbach.GoldbachPartition ()
+
+# verifies even n, first <= n <= last; GP n = p1 + p2 is searched for with
+# p1 = 3, 5, 7, ... (delta_prime), so I(n) is index of minimal p1 in odd primes
+# returns summary: first, last, min/max iterations and n with max iterations
+def verify_range (first, last):
+    minp = gp.verify_segment (first, last + 1, small_primes_limit)
+    max_p = int(minp.max())
+    odd_primes = np.flatnonzero(gp.get_prime_bitmap (max_p)[:max_p+1])[1:]
+    iterations = np.searchsorted(odd_primes, minp) + 1
+    j = int(np.argmax(iterations))
+    return {'first': first, 'last': last,
+            'min_iterations': int(iterations.min()),
+            'max_iterations': int(iterations[j]),
+            'hardest_n': first + 2 * j}
+
+def merge_summaries (s1, s2):
+    if s1 == "":
+        return s2
+    s = {'first': min(s1['first'], s2['first']), 'last': max(s1['last'], s2['last']),
+         'min_iterations': min(s1['min_iterations'], s2['min_iterations'])}
+    if s2['max_iterations'] > s1['max_iterations']:
+        s['max_iterations'] = s2['max_iterations']
+        s['hardest_n'] = s2['hardest_n']
+    else:
+        s['max_iterations'] = s1['max_iterations']
+        s['hardest_n'] = s1['hardest_n']
+    return s
+
+def run_worker (address):
+    init_worker ()
+    return coordinator.Worker (address).run (verify_range)
+
+def print_range_summary (i, first, last, summary):
+    print (" Range #", i + 1, ": [", first, ",", last, "] verified",
+           "I(n):", summary['min_iterations'], "-", summary['max_iterations'],
+           "hardest n:", summary['hardest_n'])
+
+def run_coordinator ():
+    ledger = coordinator.LeaseLedger (minimum_n, maximum_n - 1, sub_chunk_size, lease_timeout, file_ledger)
+    if len(ledger.completed) > 0:
+        print ("Restored ledger, verified up to", ledger.get_frontier ())
+    c = coordinator.Coordinator (ledger, coordinator_address, print_range_summary)
+    print ("Coordinator is listening at", c.address)
+    c.serve ()
+    total = ""
+    for summary in ledger.completed.values():
+        total = merge_summaries (total, summary)
+    print ("Verified up to", ledger.get_frontier ())
+    return total
+
+def run_workers ():
+    if use_process_pool:
+        print ("Using", number_of_workers, "worker processes")
+        with concurrent.futures.ProcessPoolExecutor (max_workers=number_of_workers) as executor:
+            counts = list(executor.map (run_worker, [coordinator_address] * number_of_workers))
+    else:
+        counts = [run_worker (coordinator_address)]
+    print ("Verified", sum(counts), "ranges")
 
 #############################################################
 # Main
 #############################################################
 
-print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
-gp = goldbach.GoldbachPartition (p)
-dp = dataprocessing.DataProcessing()
-print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, True)
-p.init_set(file_input_nonprimes, False)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_prime_set()
-print ("DONE")
-
-print ("Verification for all even numbers from", minimum_n, "to", maximum_n, "started ...")
-i = 1
-n_of_chunks = (maximum_n - minimum_n) / 2 / max_chunk_size
-chunks = dp.divide_list_into_chunks (range(minimum_n, maximum_n, 2), max_chunk_size)
-
-for chunk in chunks:
-    for n in chunk:
-        p1 = 3
-        p2 = n - p1
-        (p1, p2, d, iters) = gp.search_for_partition (p1, p2, lambda i: gp.delta_prime(i))
-    perc = int (100 * i / n_of_chunks)
-    print (" Chunk #", i, ":", chunk, "verified (", perc, "% completed )")
-    i+= 1
-
-print ("DONE")
+if __name__ == '__main__':
+    print ("Initialize objects...")
+    dp = dataprocessing.DataProcessing()
+    print ("DONE")
+
+    if distr_mode == 'coordinator':
+        print ("Verification for all even numbers from", minimum_n, "to", maximum_n, "started ...")
+        total = run_coordinator ()
+    elif distr_mode == 'worker':
+        run_workers ()
+        total = ""
+    else:
+        print ("Verification for all even numbers from", minimum_n, "to", maximum_n, "started ...")
+        chunks = dp.divide_list_into_chunks (range(minimum_n, maximum_n, 2), max_chunk_size)
+        n_of_chunks = len(chunks)
+
+        # every chunk is split into sub-ranges, results come back in order
+        subranges = []
+        for i in range (n_of_chunks):
+            for sub in dp.divide_list_into_chunks (chunks[i], sub_chunk_size):
+                subranges.append ((i, sub[0], sub[-1]))
+        firsts = [first for (i, first, last) in subranges]
+        lasts = [last for (i, first, last) in subranges]
+
+        if use_process_pool:
+            print ("Using", number_of_workers, "processes")
+            executor = concurrent.futures.ProcessPoolExecutor (max_workers=number_of_workers, initializer=init_worker)
+            results = executor.map (verify_range, firsts, lasts)
+        else:
+            executor = ""
+            init_worker ()
+            results = map (verify_range, firsts, lasts)
+
+        total = ""
+        chunk_summary = ""
+        for (i, first, last), summary in zip(subranges, results):
+            chunk_summary = merge_summaries (chunk_summary, summary)
+            if last == chunks[i][-1]:
+                total = merge_summaries (total, chunk_summary)
+                perc = int (100 * (i + 1) / n_of_chunks)
+                print (" Chunk #", i + 1, ":", chunks[i], "verified (", perc, "% completed )",
+                       "I(n):", chunk_summary['min_iterations'], "-", chunk_summary['max_iterations'],
+                       "hardest n:", chunk_summary['hardest_n'])
+                chunk_summary = ""
+        if executor != "":
+            executor.shutdown ()
+
+    print ("DONE")
+    if total != "":
+        print ("Max I(n):", total['max_iterations'], "for n =", total['hardest_n'])
@@ -37,6 +37,8 @@ import pickle
 import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
+import primestore
+import sieve
 
 #############################################################
 # Settings - configuration
@@ -60,8 +62,29 @@ checkpoint_value = 200000
 #   o False - do not cache new primality test results
 caching_primality_results = False
 
+# Source of primality tests
+#   o True  - built-in segmented sieve (bit test per candidate, helper
+#             files below are not loaded)
+#   o False - primes.Primes with helper sets loaded from files
+use_sieve_oracle = True
+
 # Algorithms to be checked
-algo_to_check = {'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7'}
+#   o a1-a7   - see description of algorithms in main loop
+#   o a8, a9  - A1, candidates p1 from wheel mod 30 and mod 210
+#   o a10,a11 - A2, candidates p1 from wheel mod 30 and mod 210
+algo_to_check = {'a1', 'a2', 'a3', 'a4', 'a5', 'a6', 'a7', 'a8', 'a9', 'a10', 'a11'}
+
+# Batch search for algorithms A1-A4 and A8-A11
+#   o True  - batch_size numbers are verified at once with NumPy
+#   o False - numbers are verified one by one
+use_batch_search = True
+batch_size = 100000
+
+# Instrumentation of searches
+#   o True  - iterations and time of searches are collected per algorithm
+#             and printed at every checkpoint
+#   o False - no statistics are collected
+use_search_stats = False
 
 # Helper files
 #   o file_input_primes - contains prime numbers
@@ -70,6 +93,11 @@ file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_twinprimes = '..\\primes\\t_twinprime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -92,6 +120,14 @@ if 'a6' in algo_to_check:
     algo += "a6"
 if 'a7' in algo_to_check:
     algo += "a7"
+if 'a8' in algo_to_check:
+    algo += "a8"
+if 'a9' in algo_to_check:
+    algo += "a9"
+if 'a10' in algo_to_check:
+    algo += "a10"
+if 'a11' in algo_to_check:
+    algo += "a11"
 file_output_iters_alg = directory + "/f_checkpoint_iters_alg" + algo + ".png"
 file_output_iters_prob_alg = directory + "/f_checkpoint_iters_prob_alg" + algo + ".png"
 file_output_duration_alg = directory + "/f_checkpoint_duration_alg" + algo + ".png"
@@ -101,13 +137,13 @@ file_output_pickle = directory + "/objs.pickle"
 # Results of calculations
 #############################################################
 
-dt_diff =                   [0, 0, 0, 0, 0, 0, 0]
-dt_iter =                   [0, 0, 0, 0, 0, 0, 0]
-list_iter_which =           [[], [], [], [], [], [], []]
-list_iter_which_prob =      [[], [], [], [], [], [], []]
+dt_diff =                   [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+dt_iter =                   [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]
+list_iter_which =           [[], [], [], [], [], [], [], [], [], [], []]
+list_iter_which_prob =      [[], [], [], [], [], [], [], [], [], [], []]
 
-list_checkpoints_duration = [[], [], [], [], [], [], []]
-list_checkpoints_iters =    [[], [], [], [], [], [], []]
+list_checkpoints_duration = [[], [], [], [], [], [], [], [], [], [], []]
+list_checkpoints_iters =    [[], [], [], [], [], [], [], [], [], [], []]
 list_checkpoints =          []
 
 k_current = 0
@@ -143,6 +179,29 @@ def update_algo_results (idc, duration, iterations):
     dt_iter[idc] += iterations
     list_iter_which[idc] = increment_list_at_index (list_iter_which[idc], iterations)
 
+def update_algo_results_batch (idc, duration, iterations):
+    global dt_diff, dt_iter, list_iter_which
+    dt_diff[idc] += duration
+    dt_iter[idc] += int(iterations.sum())
+    counts = numpy.bincount(iterations).tolist()
+    while len(list_iter_which[idc]) < len(counts):
+        list_iter_which[idc].append(0)
+    for i in range (len(counts)):
+        list_iter_which[idc][i] += counts[i]
+
+# wheel - 0 for A1-A4, otherwise modulus of wheel of candidates p1 and
+# strategy is direction of search ('a1' or 'a2', see goldbach.py)
+def run_batch_algo (idc, name, nums, wheel = 0, strategy = ""):
+    startTime = time.time()
+    if wheel > 0:
+        (p1, p2, iterations) = gp.search_for_partition_wheel_batch (nums, strategy, wheel, name)
+    else:
+        (p1, p2, iterations) = gp.search_for_partition_batch (nums, name)
+    duration = time.time() - startTime
+    update_algo_results_batch (idc, duration, iterations)
+    for i in numpy.flatnonzero(p1 + p2 != nums):
+        print ("Alg #" + str(idc + 1) + ": violation of sum for p1=", p1[i], "p2=", p2[i], "n=", nums[i])
+
 def write_results_to_figures (directory):
     # results - figures    
     fig1 = plt.figure(1)
@@ -153,6 +212,10 @@ def write_results_to_figures (directory):
     c_patch = mpatches.Patch(color='cyan', label='A5')
     m_patch = mpatches.Patch(color='magenta', label='A6')
     k_patch = mpatches.Patch(color='black', label='A7')
+    o_patch = mpatches.Patch(color='orange', label='A8')
+    p_patch = mpatches.Patch(color='purple', label='A9')
+    n_patch = mpatches.Patch(color='brown', label='A10')
+    a_patch = mpatches.Patch(color='gray', label='A11')
 
     list_of_handles = []
     if 'a1' in algo_to_check:
@@ -176,6 +239,18 @@ def write_results_to_figures (directory):
     if 'a7' in algo_to_check:
         plt.plot(list_checkpoints, list_checkpoints_duration[6], 'k.', ms=2)
         list_of_handles.append(k_patch)
+    if 'a8' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_duration[7], '.', color='orange', ms=2)
+        list_of_handles.append(o_patch)
+    if 'a9' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_duration[8], '.', color='purple', ms=2)
+        list_of_handles.append(p_patch)
+    if 'a10' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_duration[9], '.', color='brown', ms=2)
+        list_of_handles.append(n_patch)
+    if 'a11' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_duration[10], '.', color='gray', ms=2)
+        list_of_handles.append(a_patch)
 
     plt.legend(handles=list_of_handles, loc='upper right', bbox_to_anchor=(0.4, 0.8))
     plt.xlabel('n')
@@ -200,6 +275,14 @@ def write_results_to_figures (directory):
         plt.plot(list_checkpoints, list_checkpoints_iters[5], 'm.', ms=2)
     if 'a7' in algo_to_check:
         plt.plot(list_checkpoints, list_checkpoints_iters[6], 'k.', ms=2)
+    if 'a8' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_iters[7], '.', color='orange', ms=2)
+    if 'a9' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_iters[8], '.', color='purple', ms=2)
+    if 'a10' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_iters[9], '.', color='brown', ms=2)
+    if 'a11' in algo_to_check:
+        plt.plot(list_checkpoints, list_checkpoints_iters[10], '.', color='gray', ms=2)
 
     plt.legend(handles=list_of_handles, loc='upper right', bbox_to_anchor=(0.4, 0.8))
     plt.xlabel('n')
@@ -232,6 +315,18 @@ def write_results_to_figures (directory):
     if 'a7' in algo_to_check:
         list_iter_which_prob[6] = calculate_percents (list_iter_which[6])
         plt.plot(list_iter_which_prob[6], 'k-', ms=2)
+    if 'a8' in algo_to_check:
+        list_iter_which_prob[7] = calculate_percents (list_iter_which[7])
+        plt.plot(list_iter_which_prob[7], '-', color='orange', ms=2)
+    if 'a9' in algo_to_check:
+        list_iter_which_prob[8] = calculate_percents (list_iter_which[8])
+        plt.plot(list_iter_which_prob[8], '-', color='purple', ms=2)
+    if 'a10' in algo_to_check:
+        list_iter_which_prob[9] = calculate_percents (list_iter_which[9])
+        plt.plot(list_iter_which_prob[9], '-', color='brown', ms=2)
+    if 'a11' in algo_to_check:
+        list_iter_which_prob[10] = calculate_percents (list_iter_which[10])
+        plt.plot(list_iter_which_prob[10], '-', color='gray', ms=2)
 
     plt.yscale('log')
     plt.legend(handles=list_of_handles, loc='upper right', bbox_to_anchor=(0.4, 0.8))
@@ -251,24 +346,40 @@ def restore_previous_results (file_output_pickle):
     if os.path.exists(file_output_pickle):
         with open(file_output_pickle, 'rb') as f:
             k_current, dt_diff, dt_iter, list_checkpoints_duration, list_checkpoints_iters, list_checkpoints = pickle.load(f)
+        # results saved before wheel algorithms (A8-A11) were added have 7 slots only
+        while len(dt_diff) < 11:
+            dt_diff.append(0)
+            dt_iter.append(0)
+            list_checkpoints_duration.append([])
+            list_checkpoints_iters.append([])
 
 #############################################################
 # Main
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+elif use_sieve_oracle:
+    p = sieve.PrimeSieve()
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+gp.set_stats_mode (use_search_stats)
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, 1)
-p.init_set(file_input_twinprimes, 2)
-p.init_set(file_input_nonprimes, 3)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_primes_set()
-p.sort_twinprimes_set()
-print ("DONE")
+if not use_sieve_oracle and not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, 1)
+    p.init_set(file_input_twinprimes, 2)
+    p.init_set(file_input_nonprimes, 3)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_primes_set()
+    p.sort_twinprimes_set()
+    print ("DONE")
+# first k of calculations (also when resumed)
+k_first = min_num
 print ("Restoring previous results...")
 restore_previous_results (file_output_pickle)
 if k_current > 0:
@@ -279,135 +390,179 @@ print ("DONE")
 dt_start = datetime.now()
 dt_current_previous = dt_start
 
+# checkpoint is reached for every k which is a multiple of checkpoint_period
+checkpoint_period = checkpoint_value // math.gcd(checkpoint_value, step_factor)
+
 # new calculations
-for k in range (min_num, max_num):
-    num = step_factor*k
+k_batch = min_num
+while k_batch < max_num:
+    # batch ends at the next checkpoint
+    k_checkpoint = (k_batch + checkpoint_period - 1) // checkpoint_period * checkpoint_period
+    k_batch_end = min(k_batch + batch_size, k_checkpoint + 1, max_num)
+
+    if use_batch_search:
+        nums = step_factor * numpy.arange(k_batch, k_batch_end, dtype=numpy.int64)
+        for idc, name in enumerate(['a1', 'a2', 'a3', 'a4']):
+            if name in algo_to_check:
+                run_batch_algo (idc, name, nums)
+        for idc, name, strategy, wheel in [(7, 'a8', 'a1', 30), (8, 'a9', 'a1', 210), (9, 'a10', 'a2', 30), (10, 'a11', 'a2', 210)]:
+            if name in algo_to_check:
+                run_batch_algo (idc, name, nums, wheel, strategy)
+
+    for k in range (k_batch, k_batch_end):
+        num = step_factor*k
     
-    # algorithm 1
-    # start from half of n - the smallest possible difference between primes
-    if 'a1' in algo_to_check:
-        p1 = num / 2
-        if p1 % 2 == 0:
-            p1 = p1 - 1
-            p2 = p1 + 2
-        else:
-            p2 = p1
-
-        (p1, p2, duration, iterations) = gp.search_for_partition (int(p1), int(p2), lambda iteration: gp.delta_constant_minus_2(iteration))
-        update_algo_results (0, duration, iterations)
-
-        if p1 + p2 != num:
-            print ("Alg #1: violation of sum for p1=", p1, "p2=", p2, "n=", num)
-
-    # algorithm 2
-    # start from the biggest possible difference between primes
-    if 'a2' in algo_to_check:
-        p1 = 3
-        p2 = num - 3
-
-        (p1, p2, duration, iterations) = gp.search_for_partition (p1, p2, lambda iteration: gp.delta_constant_plus_2(iteration))
-        update_algo_results (1, duration, iterations)
-
-        if p1 + p2 != num:
-            print ("Alg #2: violation of sum for p1=", p1, "p2=", p2, "n=", num)
-
-    # algorithm 3
-    # start from 1/3 of n
-    if 'a3' in algo_to_check:
-        p1 = int(num / 3)
-        p2 = num - p1
-        if p1 % 2 == 0:
-            p1 = p1 - 1
-            p2 = p2 + 1
-
-        (p1, p2, duration, iterations) = gp.search_for_partition (p1, p2, lambda iteration: gp.delta_constant_minus_2(iteration))
-        update_algo_results (2, duration, iterations)
-
-        if p1 + p2 != num:
-            print ("Alg #3: violation of sum for p1=", p1, "p2=", p2, "n=", num)
-
-    # algorithm 4
-    # start from the biggest possible difference between primes
-    if 'a4' in algo_to_check:
-        p1 = 5
-        p2 = num - 5
-
-        (p1, p2, duration, iterations) = gp.search_for_partition (p1, p2, lambda iteration: gp.delta_constant_plus_2(iteration))
-        update_algo_results (3, duration, iterations)
-
-        if p1 + p2 != num:
-            print ("Alg #4: violation of sum for p1=", p1, "p2=", p2, "n=", num)
-
-    # algorithm 5
-    # start from the biggest possible difference between primes
-    if 'a5' in algo_to_check:
-        p1 = 5
-        p2 = num - 5
-
-        (p1, p2, duration, iterations) = gp.search_for_partition (p1, p2, lambda iteration: gp.delta_variable(iteration))
-        update_algo_results (4, duration, iterations)
-
-        if p1 + p2 != num:
-            print ("Alg #5: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+        # algorithm 1
+        # start from half of n - the smallest possible difference between primes
+        if 'a1' in algo_to_check and not use_batch_search:
+            p1 = num / 2
+            if p1 % 2 == 0:
+                p1 = p1 - 1
+                p2 = p1 + 2
+            else:
+                p2 = p1
+
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (int(p1), int(p2), 'delta_constant_minus_2', 'a1')
+            update_algo_results (0, duration, iterations)
+
+            if p1 + p2 != num:
+                print ("Alg #1: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithm 2
+        # start from the biggest possible difference between primes
+        if 'a2' in algo_to_check and not use_batch_search:
+            p1 = 3
+            p2 = num - 3
+
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (p1, p2, 'delta_constant_plus_2', 'a2')
+            update_algo_results (1, duration, iterations)
+
+            if p1 + p2 != num:
+                print ("Alg #2: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithm 3
+        # start from 1/3 of n
+        if 'a3' in algo_to_check and not use_batch_search:
+            p1 = int(num / 3)
+            p2 = num - p1
+            if p1 % 2 == 0:
+                p1 = p1 - 1
+                p2 = p2 + 1
+
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (p1, p2, 'delta_constant_minus_2', 'a3')
+            update_algo_results (2, duration, iterations)
+
+            if p1 + p2 != num:
+                print ("Alg #3: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithm 4
+        # start from the biggest possible difference between primes
+        if 'a4' in algo_to_check and not use_batch_search:
+            p1 = 5
+            p2 = num - 5
+
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (p1, p2, 'delta_constant_plus_2', 'a4')
+            update_algo_results (3, duration, iterations)
+
+            if p1 + p2 != num:
+                print ("Alg #4: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithm 5
+        # start from the biggest possible difference between primes
+        if 'a5' in algo_to_check:
+            p1 = 5
+            p2 = num - 5
 
-    # algorithm 6
-    # A2 but next p1 is always prime
-    if 'a6' in algo_to_check:
-        p1 = 3
-        p2 = num - 3
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (p1, p2, 'delta_variable', 'a5')
+            update_algo_results (4, duration, iterations)
 
-        (p1, p2, duration, iterations) = gp.search_for_partition (p1, p2, lambda iteration: gp.delta_prime(iteration))
-        update_algo_results (5, duration, iterations)
+            if p1 + p2 != num:
+                print ("Alg #5: violation of sum for p1=", p1, "p2=", p2, "n=", num)
 
-        if p1 + p2 != num:
-            print ("Alg #6: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+        # algorithm 6
+        # A2 but next p1 is always prime
+        if 'a6' in algo_to_check:
+            p1 = 3
+            p2 = num - 3
 
-    # algorithm 7
-    # A6 but next p1 is always twin prime
-    if 'a7' in algo_to_check:
-        p1 = 3
-        p2 = num - 3
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (p1, p2, 'delta_prime', 'a6')
+            update_algo_results (5, duration, iterations)
 
-        (p1, p2, duration, iterations) = gp.search_for_partition (p1, p2, lambda iteration: gp.delta_twinprime(iteration))
-        update_algo_results (6, duration, iterations)
+            if p1 + p2 != num:
+                print ("Alg #6: violation of sum for p1=", p1, "p2=", p2, "n=", num)
 
-        if p1 + p2 != num:
-            print ("Alg #7: violation of sum for p1=", p1, "p2=", p2, "n=", num)
-    
-    # checkpoint - partial results
-    if num % checkpoint_value == 0:
-        dt_current = datetime.now()
-        dt_diff_current = (dt_current - dt_current_previous).total_seconds()
-        list_checkpoints.append(num)
-        if 'a1' in algo_to_check:
-            list_checkpoints_duration[0].append(dt_diff[0])
-            list_checkpoints_iters[0].append(dt_iter[0])
-        if 'a2' in algo_to_check:
-            list_checkpoints_duration[1].append(dt_diff[1])
-            list_checkpoints_iters[1].append(dt_iter[1])
-        if 'a3' in algo_to_check:
-            list_checkpoints_duration[2].append(dt_diff[2])
-            list_checkpoints_iters[2].append(dt_iter[2])
-        if 'a4' in algo_to_check:
-            list_checkpoints_duration[3].append(dt_diff[3])
-            list_checkpoints_iters[3].append(dt_iter[3])
-        if 'a5' in algo_to_check:
-            list_checkpoints_duration[4].append(dt_diff[4])
-            list_checkpoints_iters[4].append(dt_iter[4])
-        if 'a6' in algo_to_check:
-            list_checkpoints_duration[5].append(dt_diff[5])
-            list_checkpoints_iters[5].append(dt_iter[5])
+        # algorithm 7
+        # A6 but next p1 is always twin prime
         if 'a7' in algo_to_check:
-            list_checkpoints_duration[6].append(dt_diff[6])
-            list_checkpoints_iters[6].append(dt_iter[6])
-
-        perc_completed = str(int(k * 100 / max_num))
-        print ("Checkpoint", k, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)")
+            p1 = 3
+            p2 = num - 3
+
+            (p1, p2, duration, iterations) = gp.search_for_partition_compiled (p1, p2, 'delta_twinprime', 'a7')
+            update_algo_results (6, duration, iterations)
+
+            if p1 + p2 != num:
+                print ("Alg #7: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithms 8-11
+        # A1 (center-out) and A2 (edge-in), but p1 and p2 are never divisible
+        # by primes of wheel (2*3*5 or 2*3*5*7), unless they are these primes
+        for idc, name, direction, wheel in [(7, 'a8', -1, 30), (8, 'a9', -1, 210), (9, 'a10', 1, 30), (10, 'a11', 1, 210)]:
+            if name in algo_to_check and not use_batch_search:
+                if direction < 0:
+                    p1 = num // 2
+                else:
+                    p1 = 3
+                p2 = num - p1
+
+                (p1, p2, duration, iterations) = gp.search_for_partition_wheel (p1, p2, wheel, direction, name)
+                update_algo_results (idc, duration, iterations)
+
+                if p1 + p2 != num:
+                    print ("Alg #" + str(idc + 1) + ": violation of sum for p1=", p1, "p2=", p2, "n=", num)
+    
+        # checkpoint - partial results
+        if num % checkpoint_value == 0:
+            dt_current = datetime.now()
+            dt_diff_current = (dt_current - dt_current_previous).total_seconds()
+            list_checkpoints.append(num)
+            if 'a1' in algo_to_check:
+                list_checkpoints_duration[0].append(dt_diff[0])
+                list_checkpoints_iters[0].append(dt_iter[0])
+            if 'a2' in algo_to_check:
+                list_checkpoints_duration[1].append(dt_diff[1])
+                list_checkpoints_iters[1].append(dt_iter[1])
+            if 'a3' in algo_to_check:
+                list_checkpoints_duration[2].append(dt_diff[2])
+                list_checkpoints_iters[2].append(dt_iter[2])
+            if 'a4' in algo_to_check:
+                list_checkpoints_duration[3].append(dt_diff[3])
+                list_checkpoints_iters[3].append(dt_iter[3])
+            if 'a5' in algo_to_check:
+                list_checkpoints_duration[4].append(dt_diff[4])
+                list_checkpoints_iters[4].append(dt_iter[4])
+            if 'a6' in algo_to_check:
+                list_checkpoints_duration[5].append(dt_diff[5])
+                list_checkpoints_iters[5].append(dt_iter[5])
+            if 'a7' in algo_to_check:
+                list_checkpoints_duration[6].append(dt_diff[6])
+                list_checkpoints_iters[6].append(dt_iter[6])
+            for idc, name in [(7, 'a8'), (8, 'a9'), (9, 'a10'), (10, 'a11')]:
+                if name in algo_to_check:
+                    list_checkpoints_duration[idc].append(dt_diff[idc])
+                    list_checkpoints_iters[idc].append(dt_iter[idc])
+
+            perc_completed = str(int(k * 100 / max_num))
+            print ("Checkpoint", k, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)")
+            print ("   Average iterations:", ", ".join("A" + str(idc + 1) + "=" + "{:.2f}".format(dt_iter[idc] / (k - k_first + 1)) for idc in range (len(dt_iter)) if "a" + str(idc + 1) in algo_to_check))
+            if use_search_stats:
+                print (gp.stats.summary())
         
-        # remember results so far
-        write_results_to_figures (directory)
-        k_current = k
-        save_current_results(file_output_pickle)
+            # remember results so far
+            write_results_to_figures (directory)
+            k_current = k
+            save_current_results(file_output_pickle)
+
+    k_batch = k_batch_end
 
 dt_end = datetime.now()
 
@@ -0,0 +1,185 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+# 
+
+import math
+import sys
+import matplotlib.pyplot as plt
+import matplotlib.patches as mpatches
+import os
+from datetime import datetime
+import time
+import numpy
+import pickle
+import goldbach
+
+#############################################################
+# Settings - configuration
+#############################################################
+
+# Minimal even number checked against Goldbach conjecture
+min_num = 4
+# Maximum even number checked against Goldbach conjecture
+max_num = 4000000000
+
+# Size of one segment (in integers) verified at once; segment is
+# sieved and covered by shifted bitmaps of small primes
+segment_size = 1048576
+
+# Small primes p tried for all n of segment at once; n not covered by
+# any of them are searched one by one
+small_primes_limit = 65536
+
+# Checkpoint value when partial results are drawn/displayed
+checkpoint_value = 100000000
+
+#############################################################
+# Settings - output directory and files
+#############################################################
+
+directory = "results/" + str(max_num)
+if not os.path.exists(directory):
+    os.makedirs(directory)
+file_output_minp = directory + "/f_checkpoint_segmented_max_minimal_p.png"
+file_output_duration = directory + "/f_checkpoint_segmented_duration.png"
+file_output_pickle = directory + "/objs_segmented.pickle"
+
+#############################################################
+# Results of calculations
+#############################################################
+
+n_current = 0
+dt_diff = 0
+max_minp = 0
+max_minp_n = 0
+
+# records of minimal p: (n, p), where p is greater than for all lower n
+list_records = []
+list_checkpoints = []
+list_checkpoints_max_minp = []
+list_checkpoints_duration = []
+
+#############################################################
+# Presentation
+#############################################################
+
+def write_results_to_figures (directory):
+    fig1 = plt.figure(1)
+    plt.plot(list_checkpoints, list_checkpoints_max_minp, 'b-', ms=1)
+    plt.plot([n for (n, p) in list_records], [p for (n, p) in list_records], 'r.', ms=4)
+    b_patch = mpatches.Patch(color='blue', label='max minimal p')
+    r_patch = mpatches.Patch(color='red', label='records of minimal p')
+    plt.legend(handles=[b_patch, r_patch], loc='lower right')
+    plt.xlabel('n')
+    plt.ylabel('p')
+    plt.title('Largest minimal prime p in GP n = p + q')
+    plt.grid(True)
+    plt.savefig(file_output_minp)
+    plt.close(fig1)
+
+    fig2 = plt.figure(2)
+    plt.plot(list_checkpoints, list_checkpoints_duration, 'g.', ms=2)
+    plt.xlabel('n')
+    plt.ylabel('time [s]')
+    plt.title('Duration of total calculations')
+    plt.grid(True)
+    plt.savefig(file_output_duration)
+    plt.close(fig2)
+
+def save_current_results (file_output_pickle):
+    global n_current, dt_diff, max_minp, max_minp_n, list_records, list_checkpoints, list_checkpoints_max_minp, list_checkpoints_duration
+    with open(file_output_pickle, 'wb') as f:
+        pickle.dump([n_current, dt_diff, max_minp, max_minp_n, list_records, list_checkpoints, list_checkpoints_max_minp, list_checkpoints_duration], f)
+
+def restore_previous_results (file_output_pickle):
+    global n_current, dt_diff, max_minp, max_minp_n, list_records, list_checkpoints, list_checkpoints_max_minp, list_checkpoints_duration
+    if os.path.exists(file_output_pickle):
+        with open(file_output_pickle, 'rb') as f:
+            n_current, dt_diff, max_minp, max_minp_n, list_records, list_checkpoints, list_checkpoints_max_minp, list_checkpoints_duration = pickle.load(f)
+
+#############################################################
+# Main
+#############################################################
+
+print ("Initialize objects...")
+gp = goldbach.GoldbachPartition ()
+print ("DONE")
+print ("Restoring previous results...")
+restore_previous_results (file_output_pickle)
+if n_current > 0:
+    min_num = n_current
+    print ("Resuming calculations at", min_num)
+print ("DONE")
+
+dt_start = datetime.now()
+dt_current_previous = dt_start
+
+# new calculations
+n_segment = min_num + min_num % 2
+while n_segment < max_num:
+    # segment ends at the next checkpoint
+    n_checkpoint = (n_segment // checkpoint_value + 1) * checkpoint_value
+    n_segment_end = min(n_segment + segment_size, n_checkpoint, max_num)
+
+    startTime = time.time()
+    minp = gp.verify_segment (n_segment, n_segment_end, small_primes_limit)
+    dt_diff += time.time() - startTime
+
+    # records of minimal p in this segment
+    first = max(n_segment, 4)
+    running_max = numpy.maximum.accumulate(minp)
+    for j in numpy.flatnonzero((running_max > max_minp) & (minp == running_max)).tolist():
+        if minp[j] > max_minp:
+            max_minp = int(minp[j])
+            max_minp_n = first + 2 * j
+            list_records.append ((max_minp_n, max_minp))
+            print ("New record of minimal p:", max_minp_n, "=", max_minp, "+", max_minp_n - max_minp)
+
+    n_segment = n_segment_end + n_segment_end % 2
+
+    # checkpoint - partial results
+    if n_segment_end % checkpoint_value == 0 or n_segment >= max_num:
+        dt_current = datetime.now()
+        dt_diff_current = (dt_current - dt_current_previous).total_seconds()
+        dt_current_previous = dt_current
+        list_checkpoints.append (n_segment_end)
+        list_checkpoints_max_minp.append (max_minp)
+        list_checkpoints_duration.append (dt_diff)
+
+        perc_completed = str(int(n_segment_end * 100 / max_num))
+        print ("Checkpoint", n_segment_end, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)")
+        print ("   Verified up to", n_segment_end, "- largest minimal p:", max_minp, "for n =", max_minp_n)
+
+        # remember results so far
+        write_results_to_figures (directory)
+        n_current = n_segment
+        save_current_results(file_output_pickle)
+
+dt_end = datetime.now()
+
+# final results - time of processing
+print ("Total calculations lasted:", dt_end - dt_start)
+print ("Goldbach conjecture verified for all even n <", max_num)
+print ("Largest minimal p:", max_minp, "for n =", max_minp_n)
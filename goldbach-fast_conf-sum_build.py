@@ -33,6 +33,7 @@ import goldbach
 import pickle
 sys.path.insert(0, '..\\primes\\')
 import primes
+import primestore
 import dataprocessing
 
 #############################################################
@@ -67,6 +68,11 @@ method = 2
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -318,23 +324,32 @@ def print_results_2 (i):
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
 dp = dataprocessing.DataProcessing()
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, 1)
-p.init_set(file_input_nonprimes, 3)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_primes_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, 1)
+    p.init_set(file_input_nonprimes, 3)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_primes_set()
+    print ("DONE")
 print ("Restoring previous results...")
 restore_previous_results (file_output_pickle)
 if k_current > 0:
     min_prime_index = k_current
     k = k_current
     print ("Resuming calculations at", min_prime_index)
+# running averages (O(1) per iteration) of restored lists
+running_ratio = [dataprocessing.RunningStats (list_ratio[0]), dataprocessing.RunningStats (list_ratio[1])]
+running_to_be_verified = dataprocessing.RunningStats (list_to_be_verified)
+running_already_verified = dataprocessing.RunningStats (list_already_verified)
 print ("DONE")
 
 dt_start = datetime.now()
@@ -345,7 +360,7 @@ if method == 1:
     for ip in range (min_prime_index, max_prime_index):
 
         # add new prime to GP build base
-        local_primes.append(p.get_ith_prime(ip))
+        local_primes.append(gp.get_ith_prime(ip))
         
         # build all possible GPs
         for lp in local_primes:
@@ -371,10 +386,10 @@ elif method == 2:
     for ip1 in range (min_prime_index, max_prime_index):
 
         # check all possible sums
-        p1 = p.get_ith_prime(ip1)
+        p1 = gp.get_ith_prime(ip1)
         add_nums_to_be_verified (2*p1)
         for ip2 in range (1, ip1+1):
-            p2 = p.get_ith_prime(ip2)
+            p2 = gp.get_ith_prime(ip2)
             num = p1 + p2
             remove_nums_to_be_verified (num, 2*p1)
 
@@ -416,10 +431,14 @@ elif method == 2:
             list_ratio[1].append (diff_now/len(already_verified))
         else:
             list_ratio[1].append (0)
-        list_ratio_avg[0].append(dp.get_avg_value_from_list (list_ratio[0]))
-        list_ratio_avg[1].append(dp.get_avg_value_from_list (list_ratio[1]))
-        list_to_be_verified_avg.append(dp.get_avg_value_from_list(list_to_be_verified))
-        list_already_verified_avg.append(dp.get_avg_value_from_list(list_already_verified))
+        running_ratio[0].add (list_ratio[0][-1])
+        running_ratio[1].add (list_ratio[1][-1])
+        running_to_be_verified.add (list_to_be_verified[-1])
+        running_already_verified.add (list_already_verified[-1])
+        list_ratio_avg[0].append(running_ratio[0].get_avg ())
+        list_ratio_avg[1].append(running_ratio[1].get_avg ())
+        list_to_be_verified_avg.append(running_to_be_verified.get_avg ())
+        list_already_verified_avg.append(running_already_verified.get_avg ())
         
         k += 1
         diff_previous = diff_now
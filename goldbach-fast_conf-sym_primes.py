@@ -33,10 +33,12 @@ import os
 from datetime import datetime
 import time
 import numpy
+import math
 import pickle
 import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -63,12 +65,30 @@ caching_primality_results = False
 # Algorithms to be checked
 algo_to_check = {'a1', 'a2'}
 
+# Block search for algorithms A1-A3
+#   o True  - block_size numbers are resolved at once with NumPy
+#             (requires step_factor = 1)
+#   o False - numbers are resolved one by one
+use_block_search = True
+block_size = 100000
+
+# Instrumentation of searches
+#   o True  - iterations and time of searches are collected per algorithm
+#             and printed at every checkpoint
+#   o False - no statistics are collected
+use_search_stats = False
+
 # Helper files
 #   o file_input_primes - contains prime numbers
 #   o file_input_nonprimes - contains composite numbers
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -110,6 +130,15 @@ def update_algo_results (idc, duration, iterations):
     dt_diff[idc] += duration
     dt_iter[idc] += iterations
 
+def run_block_algo (idc, name, first, last, step):
+    startTime = time.time()
+    (p1, p2, iterations) = gp.search_for_sym_primes_block (first, last, step, name, 'a' + str(idc + 1))
+    duration = time.time() - startTime
+    update_algo_results (idc, duration, int(iterations.sum()))
+    nums = numpy.arange(first, last + 1, step, dtype=numpy.int64)
+    for i in numpy.flatnonzero(p1 + p2 != 2 * nums):
+        print ("Alg #" + str(idc + 1) + ": violation of sum for p1=", p1[i], "p2=", p2[i], "n=", nums[i])
+
 def write_results_to_figures (directory):
     # results - figures    
     fig1 = plt.figure(1)
@@ -168,16 +197,22 @@ def restore_previous_results (file_output_pickle):
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+gp.set_stats_mode (use_search_stats)
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, 1)
-p.init_set(file_input_nonprimes, 3)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_primes_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, 1)
+    p.init_set(file_input_nonprimes, 3)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_primes_set()
+    print ("DONE")
 print ("Restoring previous results...")
 restore_previous_results (file_output_pickle)
 if k_current > 0:
@@ -189,86 +224,132 @@ dt_start = datetime.now()
 dt_current_previous = dt_start
 
 # new calculations
-for k in range (min_num, max_num):
-    num = step_factor*k
-    
-    # algorithm 1
-    # delta is constant: +/- 1
-    if 'a1' in algo_to_check:
-        (p1, p2, duration, iterations) = gp.search_for_sym_primes (num, lambda iteration: gp.delta_constant_minus_1(iteration))
-        update_algo_results (0, duration, iterations)
+if use_block_search and step_factor != 1:
+    print ("Block search requires step_factor = 1, numbers are resolved one by one")
+    use_block_search = False
 
-        if (p1 + p2)/2 != num:
-            print ("Alg #1: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+# checkpoint is reached for every k which is a multiple of checkpoint_period
+checkpoint_period = checkpoint_value // math.gcd(checkpoint_value, step_factor)
 
-    # algorithm 2
-    # if n is even, delta is: +/- 1, otherwise: +/- 2
-    if 'a2' in algo_to_check:
-        if num % 2 == 0:
-            (p1, p2, duration, iterations) = gp.search_for_sym_primes (num, lambda iteration: gp.delta_constant_minus_1(iteration))
-        else:
-            (p1, p2, duration, iterations) = gp.search_for_sym_primes (num, lambda iteration: gp.delta_constant_minus_2(iteration))
-        update_algo_results (1, duration, iterations)
+k_batch = min_num
+while k_batch < max_num:
+    # block ends at the next checkpoint
+    k_checkpoint = (k_batch + checkpoint_period - 1) // checkpoint_period * checkpoint_period
+    k_batch_end = min(k_batch + block_size, k_checkpoint + 1, max_num)
 
-        if (p1 + p2)/2 != num:
-            print ("Alg #2: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+    if use_block_search:
+        first = k_batch
+        last = k_batch_end - 1
 
-    # algorithm 3
-    # next candidate based on form of num 6a+i
-    if 'a3' in algo_to_check:
-        if num == 2:
-            p1 = 2
-            p2 = 2
-            iterations = 0
-            duration = 0
-        elif num == 3:
-            p1 = 3
-            p2 = 3
-            iterations = 0
-            duration = 0
-        elif num == 4:
-            p1 = 3
-            p2 = 5
-            iterations = 0
-            duration = 0
-        elif num == 5:
-            p1 = 5
-            p2 = 5
-            iterations = 0
-            duration = 0
-        elif num % 6 == 0 or num % 6 == 3:
-            (p1, p2, duration, iterations) = gp.search_for_sym_primes (num, lambda iteration: gp.delta_variable_3x(iteration))
-        elif num % 6 == 1 or num % 6 == 4:
-            (p1, p2, duration, iterations) = gp.search_for_sym_primes (num, lambda iteration: gp.delta_variable_3xplus1(iteration))
-        else:
-            (p1, p2, duration, iterations) = gp.search_for_sym_primes (num, lambda iteration: gp.delta_variable_3xminus1(iteration))
-        update_algo_results (2, duration, iterations)
-        
-        if (p1 + p2)/2 != num:
-            print ("Alg #3: violation of sum for p1=", p1, "p2=", p2, "n=", num)
-    
-    # checkpoint - partial results
-    if num % checkpoint_value == 0:
-        dt_current = datetime.now()
-        dt_diff_current = (dt_current - dt_current_previous).total_seconds()
-        list_checkpoints.append(num)
+        # algorithm 1
+        # delta is constant: +/- 1
         if 'a1' in algo_to_check:
-            list_checkpoints_duration[0].append(dt_diff[0])
-            list_checkpoints_iters[0].append(dt_iter[0])
+            run_block_algo (0, 'delta_constant_minus_1', first, last, 1)
+
+        # algorithm 2
+        # if n is even, delta is: +/- 1, otherwise: +/- 2
         if 'a2' in algo_to_check:
-            list_checkpoints_duration[1].append(dt_diff[1])
-            list_checkpoints_iters[1].append(dt_iter[1])
+            for start in range (first, min(first + 2, last + 1)):
+                if start % 2 == 0:
+                    run_block_algo (1, 'delta_constant_minus_1', start, last, 2)
+                else:
+                    run_block_algo (1, 'delta_constant_minus_2', start, last, 2)
+
+        # algorithm 3
+        # next candidate based on form of num 6a+i; numbers below 6 need no iterations
         if 'a3' in algo_to_check:
-            list_checkpoints_duration[2].append(dt_diff[2])
-            list_checkpoints_iters[2].append(dt_iter[2])
-
-        perc_completed = str(int(k * 100 / max_num))
-        print ("Checkpoint", k, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)")
+            for start in range (max(first, 6), min(max(first, 6) + 3, last + 1)):
+                if start % 3 == 0:
+                    run_block_algo (2, 'delta_variable_3x', start, last, 3)
+                elif start % 3 == 1:
+                    run_block_algo (2, 'delta_variable_3xplus1', start, last, 3)
+                else:
+                    run_block_algo (2, 'delta_variable_3xminus1', start, last, 3)
+
+    for k in range (k_batch, k_batch_end):
+        num = step_factor*k
+    
+        # algorithm 1
+        # delta is constant: +/- 1
+        if 'a1' in algo_to_check and not use_block_search:
+            (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (num, 'delta_constant_minus_1', 'a1')
+            update_algo_results (0, duration, iterations)
+
+            if (p1 + p2)/2 != num:
+                print ("Alg #1: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithm 2
+        # if n is even, delta is: +/- 1, otherwise: +/- 2
+        if 'a2' in algo_to_check and not use_block_search:
+            if num % 2 == 0:
+                (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (num, 'delta_constant_minus_1', 'a2')
+            else:
+                (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (num, 'delta_constant_minus_2', 'a2')
+            update_algo_results (1, duration, iterations)
+
+            if (p1 + p2)/2 != num:
+                print ("Alg #2: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+
+        # algorithm 3
+        # next candidate based on form of num 6a+i
+        if 'a3' in algo_to_check and not use_block_search:
+            if num == 2:
+                p1 = 2
+                p2 = 2
+                iterations = 0
+                duration = 0
+            elif num == 3:
+                p1 = 3
+                p2 = 3
+                iterations = 0
+                duration = 0
+            elif num == 4:
+                p1 = 3
+                p2 = 5
+                iterations = 0
+                duration = 0
+            elif num == 5:
+                p1 = 5
+                p2 = 5
+                iterations = 0
+                duration = 0
+            elif num % 6 == 0 or num % 6 == 3:
+                (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (num, 'delta_variable_3x', 'a3')
+            elif num % 6 == 1 or num % 6 == 4:
+                (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (num, 'delta_variable_3xplus1', 'a3')
+            else:
+                (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (num, 'delta_variable_3xminus1', 'a3')
+            update_algo_results (2, duration, iterations)
+        
+            if (p1 + p2)/2 != num:
+                print ("Alg #3: violation of sum for p1=", p1, "p2=", p2, "n=", num)
+    
+        # checkpoint - partial results
+        if num % checkpoint_value == 0:
+            dt_current = datetime.now()
+            dt_diff_current = (dt_current - dt_current_previous).total_seconds()
+            list_checkpoints.append(num)
+            if 'a1' in algo_to_check:
+                list_checkpoints_duration[0].append(dt_diff[0])
+                list_checkpoints_iters[0].append(dt_iter[0])
+            if 'a2' in algo_to_check:
+                list_checkpoints_duration[1].append(dt_diff[1])
+                list_checkpoints_iters[1].append(dt_iter[1])
+            if 'a3' in algo_to_check:
+                list_checkpoints_duration[2].append(dt_diff[2])
+                list_checkpoints_iters[2].append(dt_iter[2])
+
+            perc_completed = str(int(k * 100 / max_num))
+            print ("Checkpoint", k, "of total", max_num, "took", dt_diff_current, "seconds. (" + perc_completed + "% completed)")
+            if use_search_stats:
+                print (gp.stats.summary())
         
-        # remember results so far
-        write_results_to_figures (directory)
-        k_current = k
-        save_current_results(file_output_pickle)
+            # remember results so far
+            write_results_to_figures (directory)
+            k_current = k
+            save_current_results(file_output_pickle)
+
+    k_batch = k_batch_end
 
 dt_end = datetime.now()
 
@@ -37,6 +37,7 @@ import pickle
 import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -61,13 +62,23 @@ checkpoint_value = 10000
 #   o False - do not cache new primality test results
 caching_primality_results = False
 
+# Finding GPs
+#   o True  - all GPs of n are found at once from prime bitmap (faster,
+#             more RAM is occupied)
+#   o False - primality test of every candidate
+use_bitmap_mode = True
+
 # Helper files
 #   o file_input_primes - contains prime numbers
 #   o file_input_nonprimes - contains composite numbers
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
-file_input_twinprimes = '..\\primes\\t_twinprime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -104,18 +115,30 @@ def restore_previous_results (file_output_pickle):
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+if use_bitmap_mode:
+    gp.set_bitmap_mode (True, step_factor*max_num + step_sum)
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, 1)
-p.init_set(file_input_twinprimes, 2)
-p.init_set(file_input_nonprimes, 3)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_primes_set()
-p.sort_twinprimes_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, 1)
+    p.init_set(file_input_nonprimes, 3)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_primes_set()
+    print ("DONE")
+# twin prime index derived from prime bitmap of gp (prime store has twin
+# flags of its own)
+twins = gp.get_prime_index ()
+if not use_prime_store:
+    print ("Building twin prime index...")
+    twins.init_twin_index (step_factor*max_num + step_sum)
+    print ("DONE")
 print ("Restoring previous results...")
 restore_previous_results (file_output_pickle)
 if k_current > 0:
@@ -131,14 +154,8 @@ dt_current_previous = dt_start
 for k in range (min_num, max_num):
     num = k*step_factor + step_sum
     
-    factors = gp.find_sum_of_prime_numbers (num)
-
-    found= False
-    for (p1, p2) in factors:
-        if p.is_lesser_twin_prime(p1) and p.is_lesser_twin_prime(p2):
-            found = True
-            break
-    if not found:
+    pair = gp.find_first_partition (num, lambda p1, p2: twins.is_lesser_twin_prime(p1) and twins.is_lesser_twin_prime(p2))
+    if pair is None:
         print ("NOT FOUND for:", num)
         list_A321221.append(num)
 
@@ -0,0 +1,85 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import os
+import time
+import primestore
+
+#############################################################
+# Settings - configuration
+#############################################################
+
+# Action
+#   o 'generate' - store of all n <= limit is sieved from scratch
+#   o 'extend'   - existing store is extended to limit; only numbers
+#                  above its current limit are sieved
+#   o 'import'   - store is built once from legacy text files of
+#                  primes (up to the largest prime found there); files
+#                  of twin primes and nonprimes are checked against it
+action = 'generate'
+# Highest number in store
+limit = 4294967296
+
+# Segments of segment_size numbers are sieved in parallel by
+# number_of_workers processes
+number_of_workers = os.cpu_count()
+segment_size = 1048576
+
+#############################################################
+# Settings - input and output files
+#############################################################
+
+file_prime_store = '..\\primes\\t_primes.bin'
+file_input_primes = '..\\primes\\t_prime_numbers.txt'
+file_input_twinprimes = '..\\primes\\t_twinprime_numbers.txt'
+file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
+
+#############################################################
+# Main
+#############################################################
+
+if __name__ == '__main__':
+    t1 = time.time()
+    if action == 'generate':
+        print ("Sieving all primes up to", limit, "using", number_of_workers, "processes...")
+        primestore.write_prime_store (file_prime_store, limit, segment_size, number_of_workers)
+    elif action == 'extend':
+        print ("Extending", file_prime_store, "up to", limit, "using", number_of_workers, "processes...")
+        primestore.extend_prime_store (file_prime_store, limit, segment_size, number_of_workers)
+    elif action == 'import':
+        print ("Importing", file_input_primes, "...")
+        primestore.import_legacy_primes (file_prime_store, file_input_primes, file_input_twinprimes, file_input_nonprimes)
+    else:
+        raise Exception ("Unknown action", action)
+    t2 = time.time()
+    print ("DONE in", t2 - t1, "seconds")
+
+    print ("Verifying", file_prime_store, "...")
+    p = primestore.PrimeStore (file_prime_store, verify=True)
+    print ("Limit:", p.store_limit)
+    print ("Number of primes up to", (len(p.pi_index) - 1) * p.pi_step, ":", int(p.pi_index[-1]))
+    print ("Size:", os.path.getsize(file_prime_store), "bytes")
+    p.close ()
+    print ("DONE")
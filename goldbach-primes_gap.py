@@ -37,6 +37,7 @@ sys.path.insert(0, '..\\primes\\')
 import primes
 import goldbach
 import dataprocessing
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -55,12 +56,23 @@ checkpoint_value = 5000
 #   o False - do not cache new primality test results
 caching_primality_results = False
 
+# Counting GPs
+#   o True  - GPs of n are counted at once from prime bitmap (faster,
+#             more RAM is occupied)
+#   o False - primality test of every candidate
+use_bitmap_mode = True
+
 # Helper files
 #   o file_input_primes - contains prime numbers
 #   o file_input_nonprimes - contains composite numbers
 file_input_primes = 't_prime_numbers.txt'
 file_input_nonprimes = 't_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = 't_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -94,6 +106,9 @@ list_checkpoints_ratio_avg_2n = []
 list_checkpoints_max_diff = []
 list_checkpoints_min_index = []
 list_checkpoints_max_index = []
+# running averages of ratios (O(1) per n)
+running_ratio = dataprocessing.RunningStats()
+running_ratio_2n = dataprocessing.RunningStats()
 
 #############################################################
 # Presentation
@@ -181,22 +196,38 @@ def write_results_to_figures (directory):
     plt.savefig(file_output_gap_ratio_all_to_goldbach_2n)
     plt.close(fig8)
 
+# returns (True, num - i, num + i) if both num - i and num + i are primes;
+# primes.Primes provides it, prime store is asked for primality directly
+def is_symmetric_prime (num, i):
+    if not use_prime_store:
+        return p.is_symmetric_prime (num, i)
+    k1 = num - i
+    k2 = num + i
+    return p.is_prime (k1) and p.is_prime (k2), k1, k2
+
 #############################################################
 # Main
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+if use_bitmap_mode:
+    gp.set_bitmap_mode (True, 2*max_num)
 dp = dataprocessing.DataProcessing()
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, True)
-p.init_set(file_input_nonprimes, False)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_prime_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, True)
+    p.init_set(file_input_nonprimes, False)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_prime_set()
+    print ("DONE")
 
 dt_start = datetime.now()
 dt_current_previous = dt_start
@@ -207,7 +238,7 @@ for num in range (min_num, max_num):
     primes_found = []
     index_found = []
     for i in range (0, num - 1):
-        (both_primes, k1, k2) = p.is_symmetric_prime (num, i)
+        (both_primes, k1, k2) = is_symmetric_prime (num, i)
         if both_primes:
             primes_found.append(k1)
             index_found.append(i)
@@ -225,19 +256,18 @@ for num in range (min_num, max_num):
     list_checkpoints_min_index.append (min_index)
     list_checkpoints_max_index.append (max_index)
 
-    factors = gp.find_sum_of_prime_numbers (num)
-    factors_2n = gp.find_sum_of_prime_numbers (2*num)
-
     # ratio GP(n) / # of symmetric primes
-    ratio = dp.get_number_of_pairs (factors) / count
+    ratio = gp.count_partitions (num) / count
     list_checkpoints_ratio.append (ratio)
-    avg_ratio = dp.get_avg_value_from_list (list_checkpoints_ratio)
+    running_ratio.add (ratio)
+    avg_ratio = running_ratio.get_avg ()
     list_checkpoints_ratio_avg.append (avg_ratio)
 
     # ratio GP(2n) / # of symmetric primes
-    ratio_2n = dp.get_number_of_pairs (factors_2n) / count
+    ratio_2n = gp.count_partitions (2*num) / count
     list_checkpoints_ratio_2n.append (ratio_2n)
-    avg_ratio_2n = dp.get_avg_value_from_list (list_checkpoints_ratio_2n)
+    running_ratio_2n.add (ratio_2n)
+    avg_ratio_2n = running_ratio_2n.get_avg ()
     list_checkpoints_ratio_avg_2n.append (avg_ratio_2n)
 
     if count == 0:
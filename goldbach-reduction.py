@@ -33,6 +33,7 @@ import time
 import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -58,6 +59,12 @@ search_for_max_reduction = True
 #   o False - do not cache new primality test results
 caching_primality_results = False
 
+# Finding GPs
+#   o True  - all GPs of n are found at once from prime bitmap (faster,
+#             more RAM is occupied)
+#   o False - primality test of every candidate
+use_bitmap_mode = True
+
 # Checkpoint value when partial results are drawn/displayed
 checkpoint_value = 200000
 
@@ -67,6 +74,11 @@ checkpoint_value = 200000
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
+
 #############################################################
 # Settings - output directory and files
 #############################################################
@@ -99,12 +111,22 @@ def file_write_line (results):
 #############################################################
 
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+if use_bitmap_mode:
+    gp.set_bitmap_mode (True, step_factor*max_num)
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, True)
-p.init_set(file_input_nonprimes, False)
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, True)
+    p.init_set(file_input_nonprimes, False)
+    print ("DONE")
+print ("Precomputing reductions of primes...")
+gp.init_reduction_table (step_factor*max_num)
 print ("DONE")
 print ("Preparing result file...")
 file_init_header ()
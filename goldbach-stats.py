@@ -38,6 +38,8 @@ sys.path.insert(0, '..\\primes\\')
 import primes
 import collections
 import dataprocessing
+import partitionstore
+import primestore
 
 #############################################################
 # Settings - configuration
@@ -53,8 +55,20 @@ be_verbose = False
 #   o False - do not cache new primality test results
 caching_primality_results = False
 
+# Finding GPs
+#   o True  - all GPs of n are found at once from prime bitmap (faster,
+#             more RAM is occupied)
+#   o False - primality test of every candidate
+use_bitmap_mode = True
+
 restore_previous_results = False
 
+# Storage of GPs of every n (input of restore_previous_results)
+#   o True  - binary partition store (see partitionstore.py), written in
+#             blocks and flushed at every checkpoint
+#   o False - "Number:/Pairs:" text dump
+use_partition_store = True
+
 # 1. Check basic stats
 check_regular = True
 
@@ -71,6 +85,10 @@ check_6kpm1_hypothesis = False
 # 4. Chec middle primes in GP
 check_middle = False
 
+# 5. Draw Goldbach comet for all even n <= comet_max_num at once (FFT based)
+check_comet = False
+comet_max_num = 100000000
+
 min_num = 2
 max_num = 200000
 step_factor = 2
@@ -80,6 +98,12 @@ min_prime_count_threshold = 500
 file_input_primes = '..\\primes\\t_prime_numbers.txt'
 file_input_nonprimes = '..\\primes\\t_nonprime_numbers.txt'
 file_input_oldpairs = 'input\\t_prime_sum_pairs.txt'
+file_input_oldpairs_store = 'input\\t_prime_sum_pairs.bin'
+
+# Binary prime store (see primestore.py)
+#   o if file_prime_store exists, primality is read from memory-mapped
+#     store and helper files are not loaded
+file_prime_store = '..\\primes\\t_primes.bin'
 
 #############################################################
 # Settings - output directory and files
@@ -93,6 +117,7 @@ file_output_primes_lower_than = directory + "/t_prime_numbers_lower_than_" + str
 file_output_nonprimes_lower_than = directory + "/t_nonprime_numbers_lower_than_" + str(step_factor*max_num) + ".txt"
 file_output_primes_frequency_lower_than = directory + "/t_min_prime_numbers_freq_lower_than_" + str(step_factor*max_num) + ".txt"
 file_output_prime_sum_pairs_below = directory + "/t_prime_sum_pairs_below_" + str(step_factor*max_num) + ".txt"
+file_output_prime_sum_pairs_store = directory + "/t_prime_sum_pairs_below_" + str(step_factor*max_num) + ".bin"
 file_output_big_smallest_primes_below = directory + "/t_big_smallest_primes_below_" + str(step_factor*max_num) + ".txt"
 
 #############################################################
@@ -115,12 +140,9 @@ list_nums = []
 list_nums_6k = [[], [], []]
 list_checkpoints_duration = []
 list_checkpoints = []
-prev_max_diff = 0
-prev_min_diff = 0
-prev_avg_diff = 0
-max_diff_trend_factor = 0
-min_diff_trend_factor = 0
-avg_diff_trend_factor = 0
+trend_max_diff = dataprocessing.TrendCounter()
+trend_min_diff = dataprocessing.TrendCounter()
+trend_avg_diff = dataprocessing.TrendCounter()
 dict_min_primes_count = dict()
 min_prime = 0
 list_num_twin_greater = []
@@ -148,34 +170,29 @@ list_count_6k_ratio_avg = [[], [], [], [], [], []]
 list_count_6k_avg = [[], [], [], [], [], []]
 list_mid_ratio = [[]]
 
+# running averages of lists above (O(1) per n)
+running_num_ratio_twin_gp = dataprocessing.RunningStats()
+running_num_diff_twin_greater_lesser_distinct = dataprocessing.RunningStats()
+running_count_6k_ratio = dataprocessing.RunningStats()
+running_count_6k = [dataprocessing.RunningStats(), dataprocessing.RunningStats()]
+
 def calculate_metrics (num, factors, dp, p):
-    global prev_max_diff, max_diff_trend_factor, prev_min_diff, min_diff_trend_factor, prev_avg_diff, avg_diff_trend_factor, min_prime
+    global min_prime
     global counter_zero_twin_lesser, counter_zero_twin_greater
 
     list_nums.append(num)
-    num_of_pairs = dp.get_number_of_pairs (factors)
+    (num_of_pairs, min_prime, max_prime, avg_prime, min_diff, max_diff, avg_diff, min_sat, max_sat, avg_sat) = dp.get_partition_stats (num, factors)
     if num_of_pairs == 0:
         print ("WARNING: GSC not met for", num)
 
     if check_regular:
-        min_prime = dp.get_min_factor (factors)
         if min_prime not in dict_min_primes_count:
             dict_min_primes_count[min_prime] = 1
         else:
             counter = dict_min_primes_count[min_prime]
             counter = counter + 1
             dict_min_primes_count[min_prime] = counter
-        
-        diffs_in_factors = dp.get_diff_in_factors (factors)
-        
-        min_diff = dp.get_min_value_from_list (diffs_in_factors)
-        max_diff = dp.get_max_value_from_list (diffs_in_factors)
-        avg_diff = dp.get_avg_value_from_list (diffs_in_factors)
 
-        max_sat = dp.get_perc_max_saturation_from_factors (num, factors)
-        min_sat = dp.get_perc_min_saturation_from_factors (num, factors)
-        avg_sat = dp.get_perc_avg_saturation_from_factors (num, factors)
-        
         list_max_sats.append(max_sat)
         list_avg_sats.append(avg_sat)
         list_min_sats.append(min_sat)
@@ -185,23 +202,9 @@ def calculate_metrics (num, factors, dp, p):
         list_min_diff_in_pairs.append(min_diff)
         list_avg_diff_in_pairs.append(avg_diff)
 
-        if prev_max_diff > max_diff:
-            max_diff_trend_factor = max_diff_trend_factor - 1
-        elif prev_max_diff < max_diff:
-            max_diff_trend_factor = max_diff_trend_factor + 1
-        list_max_diff_in_pairs_trend.append(max_diff_trend_factor)
-
-        if prev_min_diff > min_diff:
-            min_diff_trend_factor = min_diff_trend_factor - 1
-        elif prev_max_diff < min_diff:
-            min_diff_trend_factor = min_diff_trend_factor + 1
-        list_min_diff_in_pairs_trend.append(min_diff_trend_factor)
-
-        if prev_avg_diff > avg_diff:
-            avg_diff_trend_factor = avg_diff_trend_factor - 1
-        elif prev_max_diff < avg_diff:
-            avg_diff_trend_factor = avg_diff_trend_factor + 1
-        list_avg_diff_in_pairs_trend.append(avg_diff_trend_factor)
+        list_max_diff_in_pairs_trend.append(trend_max_diff.add (max_diff))
+        list_min_diff_in_pairs_trend.append(trend_min_diff.add (min_diff))
+        list_avg_diff_in_pairs_trend.append(trend_avg_diff.add (avg_diff))
 
         # frequency of smallest diffs
         if min_diff in list_min_diff_in_pairs_freq:
@@ -215,84 +218,25 @@ def calculate_metrics (num, factors, dp, p):
                 list_min_diff_in_pairs_freq[i] = 0
             list_min_diff_in_pairs_freq[min_diff] = 1
 
-        prev_max_diff = max_diff
-        prev_min_diff = min_diff
-        prev_avg_diff = avg_diff
-
     if check_twins:
-        number_of_twins_lesser = 0
-        number_of_twins_greater = 0
-        number_of_twins = 0
-        min_twin_lesser = 0
-        min_twin_greater = 0
-        set_twins_lesser = set()
-        set_twins_greater = set()
-
-        for (p1, p2) in factors:
-        
-            if p.is_lesser_twin_prime (p1):
-                if p1 not in set_twins_lesser:
-                    set_twins_lesser.add (p1)
-                number_of_twins += 1
-            if p.is_lesser_twin_prime (p2):
-                if p2 not in set_twins_lesser:
-                    set_twins_lesser.add (p2)
-                number_of_twins += 1
-            if p.is_greater_twin_prime (p1):
-                if p1 not in set_twins_greater:
-                    set_twins_greater.add (p1)
-                number_of_twins += 1
-            if p.is_greater_twin_prime (p2):
-                if p2 not in set_twins_greater:
-                    set_twins_greater.add (p2)
-                number_of_twins += 1
-            
-            if (p1 != p2):
-                # lesser twins
-                if p.is_lesser_twin_prime (p1):
-                    number_of_twins_lesser += 1
-                    if number_of_twins_lesser == 1:
-                        min_twin_lesser = p1
-                    elif p1 < min_twin_lesser:
-                        min_twin_lesser = p1
-                if p.is_lesser_twin_prime (p2):
-                    number_of_twins_lesser += 1
-                    if number_of_twins_lesser == 1:
-                        min_twin_lesser = p2
-                    elif p2 < min_twin_lesser:
-                        min_twin_lesser = p2
-                # greater twins
-                if p.is_greater_twin_prime (p1):
-                    number_of_twins_greater += 1
-                    if number_of_twins_greater == 1:
-                        min_twin_greater = p1
-                    elif p1 < min_twin_greater:
-                        min_twin_greater = p1
-                if p.is_greater_twin_prime (p2):
-                    number_of_twins_greater += 1
-                    if number_of_twins_greater == 1:
-                        min_twin_greater = p2
-                    elif p2 < min_twin_greater:
-                        min_twin_greater = p2
-            else:
-                # lesser twins
-                if p.is_lesser_twin_prime (p1):
-                    number_of_twins_lesser += 1
-                    if number_of_twins_lesser == 1:
-                        min_twin_lesser = p1
-                    elif p1 < min_twin_lesser:
-                        min_twin_lesser = p1
-                # greater twins
-                if p.is_greater_twin_prime (p1):
-                    number_of_twins_greater += 1
-                    if number_of_twins_greater == 1:
-                        min_twin_greater = p1
-                    elif p1 < min_twin_greater:
-                        min_twin_greater = p1
+        # twin flags of all p1 and p2 at once from the twin prime index
+        (p1s, p2s) = dp.get_factor_arrays (factors)
+        lesser1 = twins.get_lesser_twin_flags (p1s)
+        lesser2 = twins.get_lesser_twin_flags (p2s)
+        greater1 = twins.get_greater_twin_flags (p1s)
+        greater2 = twins.get_greater_twin_flags (p2s)
+        distinct = p1s != p2s
+
+        number_of_twins = int(lesser1.sum() + lesser2.sum() + greater1.sum() + greater2.sum())
+        number_of_twins_lesser = int(lesser1.sum() + (lesser2 & distinct).sum())
+        number_of_twins_greater = int(greater1.sum() + (greater2 & distinct).sum())
+        set_twins_lesser = set(p1s[lesser1].tolist()) | set(p2s[lesser2].tolist())
+        set_twins_greater = set(p1s[greater1].tolist()) | set(p2s[greater2].tolist())
 
         list_num_twin_all.append (number_of_twins)
         list_num_ratio_twin_gp.append(number_of_twins/(num_of_pairs*2))
-        list_num_ratio_twin_gp_avg.append(dp.get_avg_value_from_list (list_num_ratio_twin_gp))
+        running_num_ratio_twin_gp.add (list_num_ratio_twin_gp[-1])
+        list_num_ratio_twin_gp_avg.append(running_num_ratio_twin_gp.get_avg ())
         
     if check_twins_extended:
         number_of_twins_lesser_distinct = len(set_twins_lesser)
@@ -302,7 +246,8 @@ def calculate_metrics (num, factors, dp, p):
         list_num_twin_lesser_distinct.append (number_of_twins_lesser_distinct)
         list_num_twin_greater_distinct.append (number_of_twins_greater_distinct)
         list_num_diff_twin_greater_lesser_distinct.append (number_of_twins_greater_distinct-number_of_twins_lesser_distinct)
-        list_num_diff_twin_greater_lesser_distinct_avg.append (dp.get_avg_value_from_list (list_num_diff_twin_greater_lesser_distinct))
+        running_num_diff_twin_greater_lesser_distinct.add (list_num_diff_twin_greater_lesser_distinct[-1])
+        list_num_diff_twin_greater_lesser_distinct_avg.append (running_num_diff_twin_greater_lesser_distinct.get_avg ())
         
         if number_of_twins_lesser_distinct == 0:
             list_zero_twin_lesser.append(num)
@@ -314,32 +259,8 @@ def calculate_metrics (num, factors, dp, p):
             list_zero_twin_greater_count.append(counter_zero_twin_greater)
 
     if check_6kpm1_hypothesis:
-        count = 0
-        count_6km1 = 0
-        count_6kp1 = 0
-        count_6km1_both = 0
-        count_6kp1_both = 0
-        count_lesser_both = 0
-        count_lesser_6km1_both = 0
-        for (p1, p2) in factors:
-            if gp.check_for_6kpm1_in_partition (p, num, p1, p2):
-                count += 1
-            if p.is_6km1(p1):
-                count_6km1 += 1
-            if p.is_6km1(p2):
-                count_6km1 += 1
-            if p.is_6kp1(p1):
-                count_6kp1 += 1
-            if p.is_6kp1(p2):
-                count_6kp1 += 1
-            if p.is_6km1(p1) and p.is_6km1(p2):
-                count_6km1_both += 1
-            if p.is_6kp1(p1) and p.is_6kp1(p2):
-                count_6kp1_both += 1
-            if p.is_lesser_twin_prime(p1) and p.is_lesser_twin_prime(p2):
-                count_lesser_both += 1
-            if p.is_lesser_twin_prime(p1) and p.is_lesser_twin_prime(p2) and p.is_6km1(p1) and p.is_6km1(p2):
-                count_lesser_6km1_both += 1 
+        # all counts for num were calculated in advance for the whole range
+        (count, count_6km1, count_6kp1, count_6km1_both, count_6kp1_both, count_lesser_both, count_lesser_6km1_both) = [int(c[num // 2]) for c in counts_6kpm1]
 
         list_count_6kpm1.append(count)
         diff_6kpm1 = num_of_pairs - count
@@ -382,10 +303,13 @@ def calculate_metrics (num, factors, dp, p):
             list_nums_6k[2].append(num)
             list_count_6k[4].append(count_lesser_both)
             list_count_6k_ratio[4].append (count_lesser_both/num_of_pairs)
-            list_count_6k_ratio_avg[4].append (dp.get_avg_value_from_list(list_count_6k_ratio[4]))
-            list_count_6k_avg[4].append(dp.get_avg_value_from_list(list_count_6k[4]))
+            running_count_6k_ratio.add (list_count_6k_ratio[4][-1])
+            list_count_6k_ratio_avg[4].append (running_count_6k_ratio.get_avg ())
+            running_count_6k[0].add (count_lesser_both)
+            list_count_6k_avg[4].append(running_count_6k[0].get_avg ())
             list_count_6k[5].append(count_lesser_6km1_both)
-            list_count_6k_avg[5].append(dp.get_avg_value_from_list(list_count_6k[5]))
+            running_count_6k[1].add (count_lesser_6km1_both)
+            list_count_6k_avg[5].append(running_count_6k[1].get_avg ())
             if count_lesser_both < 2:
                 print ("WARNING: count_lesser_both=", count_lesser_both, "for", num)
             if count_lesser_6km1_both == 0:
@@ -402,7 +326,7 @@ def calculate_metrics (num, factors, dp, p):
 #############################################################
 
 def print_iteration_output ():
-    global num, factors, max_sat, min_sat, diffs_in_factors, num_of_pairs, prev_max_diff, prev_min_diff, prev_avg_diff, max_diff_trend_factor, min_diff_trend_factor, avg_diff_trend_factor
+    global num, factors, max_sat, min_sat, diffs_in_factors, num_of_pairs
     print ("=============================================================")
     print ("n to be analyzed: %d" % num)
     print ("n = p1 + p2: ", factors)
@@ -410,8 +334,8 @@ def print_iteration_output ():
     print ("min saturation: ", min_sat)
     print ("diff in factors: ", diffs_in_factors)
     print ("# of pairs:", num_of_pairs)
-    print (prev_max_diff, prev_min_diff, prev_avg_diff)
-    print (max_diff_trend_factor, min_diff_trend_factor, avg_diff_trend_factor)
+    print (trend_max_diff.previous, trend_min_diff.previous, trend_avg_diff.previous)
+    print (trend_max_diff.factor, trend_min_diff.factor, trend_avg_diff.factor)
 
 def write_results_to_files (directory, p):
     global file_output_primes_lower_than, file_output_nonprimes_lower_than, file_output_primes_frequency_lower_than
@@ -435,10 +359,13 @@ def write_auxiliary_results_to_file (directory, num, factors):
     global big_prime_threshold, min_prime, file_output_prime_sum_pairs_below, file_output_big_smallest_primes_below
 
     # prime numbers
-    f = open(file_output_prime_sum_pairs_below, "a+")
-    f.write ("Number: " + str(num) + "\n")
-    f.write (" Pairs: " + str(factors) + "\n")
-    f.close ()
+    if use_partition_store:
+        partition_writer.add (num, factors)
+    else:
+        f = open(file_output_prime_sum_pairs_below, "a+")
+        f.write ("Number: " + str(num) + "\n")
+        f.write (" Pairs: " + str(factors) + "\n")
+        f.close ()
 
     # search for big minimal primes
     if min_prime > big_prime_threshold:
@@ -449,27 +376,24 @@ def write_auxiliary_results_to_file (directory, num, factors):
 
 def read_results_from_file (file_input_oldpairs, dp, p):
     
-    f = open(file_input_oldpairs, "r")
-    lines = f.readlines()
-    read_pairs = False
-    for line in lines:
-        if read_pairs:
-            read_pairs = False
-
-            # read factors from file and calculate metrics
-            factors_from_file = dp.read_sums_from_line (line)
-            calculate_metrics (num_from_file, factors_from_file, dp, p)
-
-            write_auxiliary_results_to_file (directory, num_from_file, factors_from_file)         
-        else:
-            read_pairs = True
+    num_from_file = 0
+    # records are read one by one, file is never loaded as a whole
+    if use_partition_store:
+        store = partitionstore.PartitionStore (file_input_oldpairs)
+        records = store.iter_partition_sets ()
+    else:
+        records = dp.iter_sums_from_file (file_input_oldpairs)
+    for (num_from_file, factors_from_file) in records:
+
+        if num_from_file % checkpoint_value == 0:
+            print (".")
 
-            # read number from file
-            num_from_file = dp.read_num_from_line (line)
+        calculate_metrics (num_from_file, factors_from_file, dp, p)
 
-            if num_from_file % checkpoint_value == 0:
-                print (".")
+        write_auxiliary_results_to_file (directory, num_from_file, factors_from_file)         
 
+    if use_partition_store:
+        store.close ()
     return num_from_file
 
 def write_results_to_figures (directory, last_loop):
@@ -793,6 +717,16 @@ def write_results_to_figures (directory, last_loop):
         plt.grid(True)
         plt.savefig(directory + "/f_ratio_two_biggest_primes.png")
 
+def write_comet_to_figure (directory, comet):
+    plt.figure(33)
+    plt.plot(np.arange(0, 2*len(comet), 2)[2:], comet[2:], 'b,')
+    plt.xlabel('Number')
+    plt.ylabel('Number of Goldbach partitions for a given number')
+    plt.title('Goldbach comet')
+    plt.grid(True)
+    plt.savefig(directory + "/f_comet.png")
+    plt.close()
+
 #############################################################
 # Main - Phase 1
 # Preload files & restore previous calculations
@@ -800,27 +734,54 @@ def write_results_to_figures (directory, last_loop):
 
 print ("---------------------------------------------------")
 print ("Initialize objects...")
-p = primes.Primes(caching_primality_results)
+use_prime_store = os.path.exists(file_prime_store)
+if use_prime_store:
+    p = primestore.PrimeStore (file_prime_store)
+else:
+    p = primes.Primes(caching_primality_results)
 gp = goldbach.GoldbachPartition (p)
+if use_bitmap_mode:
+    gp.set_bitmap_mode (True, step_factor*max_num)
+# twin prime index derived from prime bitmap of gp (prime store has twin
+# flags of its own)
+twins = gp.get_prime_index ()
+if check_twins and not use_prime_store:
+    twins.init_twin_index (step_factor*max_num)
+if check_6kpm1_hypothesis:
+    print ("Counting 6k-1/6k+1 partitions...")
+    counts_6kpm1 = gp.get_6kpm1_counts (step_factor*max_num)
 dp = dataprocessing.DataProcessing()
 print ("DONE")
-print ("Loading helper sets...")
-p.init_set(file_input_primes, True)
-p.init_set(file_input_nonprimes, False)
-print ("DONE")
-print ("Sorting primes...")
-p.sort_primes_set()
-print ("DONE")
+if not use_prime_store:
+    print ("Loading helper sets...")
+    p.init_set(file_input_primes, True)
+    p.init_set(file_input_nonprimes, False)
+    print ("DONE")
+    print ("Sorting primes...")
+    p.sort_primes_set()
+    print ("DONE")
 print ("Output result folder: ", directory)
 print ("---------------------------------------------------")
 
+if use_partition_store:
+    file_input_oldpairs = file_input_oldpairs_store
+    partition_writer = partitionstore.PartitionStoreWriter (file_output_prime_sum_pairs_store)
+
 if os.path.exists(file_input_oldpairs) and restore_previous_results:
     print ("Restoration of previous calculations started ...")
     
     num_from_file = read_results_from_file (file_input_oldpairs, dp, p)
-    min_num = int(num_from_file / step_factor)
+    if num_from_file > 0:
+        # the last restored n is not calculated again
+        min_num = int(num_from_file / step_factor) + 1
     print ("Restoration of previous", min_num, "calculations has been completed.")
 
+if check_comet:
+    print ("Calculation of Goldbach comet up to", comet_max_num, "started ...")
+    comet = gp.get_goldbach_comet (comet_max_num)
+    write_comet_to_figure (directory, comet)
+    print ("DONE")
+
 #############################################################
 # Main - Phase 2
 # New calculations
@@ -832,11 +793,12 @@ dt_current_previous = dt_start
 for k in range (min_num, max_num):
     num = step_factor*k
     
-    factors = gp.find_sum_of_prime_numbers (num)
+    factors = gp.find_partition_set (num)
 
     calculate_metrics (num, factors, dp, p)
+    write_auxiliary_results_to_file (directory, num, factors)
     
-    # checkpoint - partial results
+    # checkpoint - partial results (GPs of num included)
     if num % checkpoint_value == 0:
         dt_current = datetime.now()
         dt_diff_current = (dt_current - dt_current_previous).total_seconds()
@@ -845,8 +807,8 @@ for k in range (min_num, max_num):
         print ("Iteration", k, "of total", max_num, "took", dt_diff_current, "seconds")
         # remember results so far
         write_results_to_figures (directory, False)
-
-    write_auxiliary_results_to_file (directory, num, factors)
+        if use_partition_store:
+            partition_writer.flush ()
 
     if be_verbose:
         print_iteration_output ()
@@ -857,5 +819,8 @@ dt_end = datetime.now()
 dt_diff = dt_end - dt_start
 print ("Total calculations lasted:", dt_diff)
 
+if use_partition_store:
+    partition_writer.close ()
+
 #write_results_to_files (directory)
 write_results_to_figures (directory, False)
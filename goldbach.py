@@ -25,6 +25,7 @@
 # 
 
 import math
+import bisect
 import unittest
 import sys
 import numpy as np
@@ -33,6 +34,9 @@ from datetime import datetime
 import time
 sys.path.insert(0, '..\\primes\\')
 import primes
+import sieve
+import instrumentation
+import partitionset
 
 class GoldbachPartition:
 
@@ -42,9 +46,90 @@ class GoldbachPartition:
     # currently analyzed number
     number = 0
 
-    def __init__(self, p):
+    # object providing boolean NumPy prime bitmap for vectorized operations
+    bitmap_source = ""
+
+    # bitmap-backed mode - partitions are found with NumPy operations
+    # on the prime bitmap instead of primality tests of every candidate
+    bitmap_mode = False
+
+    # precompiled delta strategies: name of delta method -> list of deltas
+    delta_tables = ""
+
+    # wheel tables: (wheel, residue of n) -> residues of candidates for p1
+    wheel_tables = ""
+
+    # smallest/largest k such that p - 2^k is prime, for all odd p up to
+    # reduction_limit; one byte per odd number (index p // 2), 0 - no such k
+    reduction_min_k = ""
+    reduction_max_k = ""
+    reduction_limit = 0
+
+    # statistics of searches (instrumentation.SearchStats), "" - disabled
+    stats = ""
+
+    # sieve of segments checked by verify_segment
+    segment_sieve = ""
+
+    # sieve.PrimeSieve (or primestore.PrimeStore) answering get_ith_prime
+    # and get_all_primes_leq in constant time
+    prime_index = ""
+
+    # p - object answering primality questions (is_prime, get_ith_prime, ...),
+    #     e.g. primes.Primes or primestore.PrimeStore; if not given, built-in
+    #     segmented sieve is used
+    def __init__(self, p = None):
+        if p is None:
+            p = sieve.PrimeSieve()
         self.primes = p
         self.number = 0
+        self.bitmap_source = ""
+        self.bitmap_mode = False
+        self.delta_tables = {}
+        self.wheel_tables = {}
+        self.reduction_min_k = b""
+        self.reduction_max_k = b""
+        self.reduction_limit = 0
+        self.stats = ""
+        self.segment_sieve = ""
+        self.prime_index = ""
+
+    def get_prime_bitmap (self, limit):
+        if self.bitmap_source == "":
+            if hasattr(self.primes, 'get_bitmap'):
+                self.bitmap_source = self.primes
+            else:
+                self.bitmap_source = self.get_prime_index ()
+        return self.bitmap_source.get_bitmap (limit)
+
+    def get_prime_index (self):
+        if self.prime_index == "":
+            if isinstance(self.primes, sieve.PrimeSieve):
+                self.prime_index = self.primes
+            else:
+                self.prime_index = sieve.PrimeSieve()
+        return self.prime_index
+
+    # 2 is 0th prime
+    def get_ith_prime (self, i):
+        return self.get_prime_index ().get_ith_prime (i)
+
+    # number of primes <= n
+    def get_all_primes_leq (self, n):
+        return self.get_prime_index ().get_all_primes_leq (n)
+
+    # limit - if greater than 0, bitmap is sieved up to limit in advance
+    def set_bitmap_mode (self, enabled, limit = 0):
+        self.bitmap_mode = enabled
+        if enabled and limit > 0:
+            self.get_prime_bitmap (limit)
+
+    # enabled - searches are recorded in self.stats, which is reset
+    def set_stats_mode (self, enabled):
+        if enabled:
+            self.stats = instrumentation.SearchStats()
+        else:
+            self.stats = ""
 
     def set_number (self, n):
         self.number = n
@@ -98,7 +183,7 @@ class GoldbachPartition:
         if iteration == 0:
             delta = 0
         else:
-            delta = self.primes.get_ith_prime(iteration + 1) - self.primes.get_ith_prime(iteration)
+            delta = self.get_ith_prime(iteration + 1) - self.get_ith_prime(iteration)
         return delta
 
     def delta_twinprime (self, iteration):
@@ -113,9 +198,59 @@ class GoldbachPartition:
         if iteration == 0:
             delta = 0
         else:
-            delta = self.primes.get_ith_prime(iteration + 1) - self.primes.get_ith_prime(iteration)
+            delta = self.get_ith_prime(iteration + 1) - self.get_ith_prime(iteration)
         return delta
 
+    # returns list d, where d[i] = delta(i) for 0 <= i < length and delta is
+    # method of this class with given name (e.g. 'delta_prime')
+    def compile_delta (self, name, length):
+        if name == 'delta_constant_plus_2':
+            table = np.full(length, 2, dtype=np.int64)
+        elif name == 'delta_constant_minus_2':
+            table = np.full(length, -2, dtype=np.int64)
+        elif name == 'delta_constant_minus_1':
+            table = np.full(length, -1, dtype=np.int64)
+        elif name == 'delta_variable':
+            table = np.full(length, 2, dtype=np.int64)
+            table[0:3] = [0, 2, -4][0:length]
+        elif name in ['delta_variable_3x', 'delta_variable_3xplus1', 'delta_variable_3xminus1']:
+            table = 3 * np.arange(length, dtype=np.int64)
+            if name == 'delta_variable_3xplus1':
+                table += 1
+            elif name == 'delta_variable_3xminus1':
+                table -= 1
+            table[0:2] = 0
+        elif name == 'delta_prime':
+            # gaps between consecutive primes, 2 is skipped
+            plist = self.get_prime_index ().get_prime_list (length + 1).astype(np.int64)
+            table = np.diff(plist)
+            table[0:1] = 0
+        elif name == 'delta_twinprime':
+            if isinstance(self.primes, sieve.PrimeSieve):
+                # twin prime index is built once for the whole table; there
+                # are ~2.64 x / ln(x)^2 primes with a twin below x
+                limit = max(int(length * math.log(length + 2) ** 2), 1024)
+                while len(self.primes.twinprime_list) < length:
+                    self.primes.init_twin_index (limit)
+                    limit *= 2
+                tlist = self.primes.twinprime_list[:length].astype(np.int64)
+            else:
+                tlist = np.array([self.primes.get_ith_twinprime(i) for i in range (length)], dtype=np.int64)
+            table = np.concatenate(([0], np.diff(tlist)))[0:length]
+        else:
+            delta = getattr(self, name)
+            table = np.array([delta(i) for i in range (length)], dtype=np.int64)
+        self.delta_tables[name] = table.tolist()
+        return self.delta_tables[name]
+
+    def get_delta_table (self, name, length):
+        table = self.delta_tables.get(name)
+        if table is None or len(table) < length:
+            if table is not None:
+                length = max(length, 2 * len(table))
+            table = self.compile_delta (name, length)
+        return table
+
     def search_for_partition (self, p1, p2, delta):
         found = False
         iteration = 0
@@ -133,6 +268,265 @@ class GoldbachPartition:
         duration = time.time() - startTime
         return p1, p2, duration, iteration
 
+    # search_for_partition with delta given by name of delta method; deltas
+    # are read from precompiled table instead of calling delta per iteration;
+    # label - key of search in stats (default name)
+    def search_for_partition_compiled (self, p1, p2, name, label = ""):
+        is_prime = self.primes.is_prime
+        table = self.get_delta_table (name, 1024)
+        found = False
+        iteration = 0
+
+        if self.stats != "":
+            start = self.stats.now()
+        startTime = time.time()
+        while not found:
+            iteration += 1
+            if is_prime (p1) and is_prime (p2):
+                found = True
+            if not found:
+                if iteration >= len(table):
+                    table = self.get_delta_table (name, iteration + 1)
+                delta = table[iteration]
+                p1 = p1 + delta
+                p2 = p2 - delta
+            if p2 < 2 or p1 < 2:
+                raise Exception ("Could not find GP for ", p1 + p2)
+        duration = time.time() - startTime
+        if self.stats != "":
+            if label == "":
+                label = name
+            self.stats.record (label, iteration, self.stats.now() - start)
+        return p1, p2, duration, iteration
+
+    # search_for_partition for NumPy array of even numbers at once; all
+    # unresolved numbers are advanced together with one bitmap lookup per step
+    # strategy:
+    #   o 'a1' - start from n/2 (center-out), step -2
+    #   o 'a2' - start from p1 = 3 (edge-in), step +2
+    #   o 'a3' - start from n/3, step -2
+    #   o 'a4' - start from p1 = 5 (edge-in), step +2
+    # returns arrays p1, p2 and iterations
+    def search_for_partition_batch (self, nums, strategy):
+        nums = np.asarray(nums, dtype=np.int64)
+        if strategy == 'a1':
+            p1 = nums // 2
+            p2 = p1.copy()
+            even = p1 % 2 == 0
+            p1[even] -= 1
+            p2[even] += 1
+            step = -2
+        elif strategy == 'a2':
+            p1 = np.full(len(nums), 3, dtype=np.int64)
+            p2 = nums - 3
+            step = 2
+        elif strategy == 'a3':
+            p1 = nums // 3
+            p2 = nums - p1
+            even = p1 % 2 == 0
+            p1[even] -= 1
+            p2[even] += 1
+            step = -2
+        elif strategy == 'a4':
+            p1 = np.full(len(nums), 5, dtype=np.int64)
+            p2 = nums - 5
+            step = 2
+        else:
+            raise Exception ("Unknown strategy", strategy)
+        iterations = np.ones(len(nums), dtype=np.int64)
+        if len(nums) == 0:
+            return p1, p2, iterations
+
+        if self.stats != "":
+            start = self.stats.now()
+        isprime = self.get_prime_bitmap (int(nums.max()))
+        active = np.arange(len(nums))
+        while len(active) > 0:
+            a1 = p1[active]
+            a2 = p2[active]
+            if a1.min() < 2 or a2.min() < 2:
+                bad = active[(a1 < 2) | (a2 < 2)][0]
+                raise Exception ("Could not find GP for ", int(nums[bad]))
+            found = isprime[a1] & isprime[a2]
+            active = active[~found]
+            p1[active] += step
+            p2[active] -= step
+            iterations[active] += 1
+        if self.stats != "":
+            self.stats.record_batch (strategy, iterations, self.stats.now() - start)
+        return p1, p2, iterations
+
+    # returns sorted NumPy array of residues r modulo wheel such that both r
+    # and n - r are coprime to wheel, for n = residue (mod wheel)
+    def get_wheel_table (self, wheel, residue):
+        key = (wheel, residue)
+        if key not in self.wheel_tables:
+            r = np.arange(wheel)
+            admissible = (np.gcd(r, wheel) == 1) & (np.gcd((residue - r) % wheel, wheel) == 1)
+            self.wheel_tables[key] = np.flatnonzero(admissible)
+        return self.wheel_tables[key]
+
+    # returns odd primes dividing wheel
+    def get_wheel_primes (self, wheel):
+        return [q for q in range (3, wheel + 1, 2) if wheel % q == 0 and all(q % d != 0 for d in range (3, q, 2))]
+
+    # search_for_partition, where p1 takes only values such that neither p1
+    # nor p2 has prime factor from wheel (e.g. 30 = 2*3*5, 210 = 2*3*5*7)
+    # unless it is this prime; p1 - the first candidate, direction:
+    #   o +1 - p1 is increasing (edge-in)
+    #   o -1 - p1 is decreasing (center-out)
+    # label - key of search in stats (default 'w' + wheel)
+    def search_for_partition_wheel (self, p1, p2, wheel, direction, label = ""):
+        is_prime = self.primes.is_prime
+        n = p1 + p2
+        table = self.get_wheel_table (wheel, n % wheel).tolist()
+        length = len(table)
+        wheel_primes = self.get_wheel_primes (wheel)
+        extras = [q for q in wheel_primes if math.gcd(n - q, wheel) == 1 or n - q in wheel_primes]
+        iteration = 0
+
+        if self.stats != "":
+            start = self.stats.now()
+        startTime = time.time()
+        found = False
+        if direction > 0:
+            # wheel primes are lower than other candidates
+            for q in extras:
+                if q >= p1 and not found:
+                    iteration += 1
+                    if n - q < 2:
+                        raise Exception ("Could not find GP for ", n)
+                    if is_prime (q) and is_prime (n - q):
+                        found = True
+                        p1 = q
+            k = (p1 // wheel) * length + bisect.bisect_left(table, p1 % wheel)
+            while not found:
+                p = (k // length) * wheel + table[k % length]
+                k += 1
+                if p < 3:
+                    continue
+                iteration += 1
+                if n - p < 2:
+                    raise Exception ("Could not find GP for ", n)
+                if is_prime (p) and is_prime (n - p):
+                    found = True
+                    p1 = p
+        else:
+            k = (p1 // wheel) * length + bisect.bisect_right(table, p1 % wheel) - 1
+            while not found:
+                p = (k // length) * wheel + table[k % length]
+                k -= 1
+                if p < 3:
+                    break
+                iteration += 1
+                if is_prime (p) and is_prime (n - p):
+                    found = True
+                    p1 = p
+            for q in reversed(extras):
+                if q <= p1 and not found:
+                    iteration += 1
+                    if is_prime (q) and is_prime (n - q):
+                        found = True
+                        p1 = q
+            if not found:
+                raise Exception ("Could not find GP for ", n)
+        duration = time.time() - startTime
+        if self.stats != "":
+            if label == "":
+                label = 'w' + str(wheel)
+            self.stats.record (label, iteration, self.stats.now() - start)
+        return p1, n - p1, duration, iteration
+
+    # search_for_partition_wheel for NumPy array of even numbers at once
+    # strategy:
+    #   o 'a1' - start from n/2 (center-out)
+    #   o 'a2' - start from p1 = 3 (edge-in)
+    # label - key of searches in stats (default 'w' + wheel)
+    # returns arrays p1, p2 and iterations
+    def search_for_partition_wheel_batch (self, nums, strategy, wheel, label = ""):
+        nums = np.asarray(nums, dtype=np.int64)
+        count = len(nums)
+        if strategy == 'a1':
+            direction = -1
+        elif strategy == 'a2':
+            direction = 1
+        else:
+            raise Exception ("Unknown strategy", strategy)
+        p1 = np.zeros(count, dtype=np.int64)
+        iterations = np.zeros(count, dtype=np.int64)
+        if count == 0:
+            return p1, nums - p1, iterations
+        if self.stats != "":
+            start = self.stats.now()
+
+        # tables of all residues padded to the same length
+        tables = [self.get_wheel_table (wheel, r) for r in range (wheel)]
+        lengths = np.array([len(t) for t in tables], dtype=np.int64)
+        padded = np.zeros((wheel, max(lengths.max(), 1)), dtype=np.int64)
+        for r in range (wheel):
+            padded[r, :lengths[r]] = tables[r]
+        res = nums % wheel
+        length = lengths[res]
+        wheel_primes = self.get_wheel_primes (wheel)
+        isprime = self.get_prime_bitmap (int(nums.max()))
+        resolved = np.zeros(count, dtype=bool)
+
+        def check_extras (order):
+            for q in order:
+                q2 = nums - q
+                eligible = ~resolved & (q2 >= 2) & ((np.gcd(q2, wheel) == 1) | np.isin(q2, wheel_primes))
+                if direction < 0:
+                    eligible &= q <= nums // 2
+                iterations[eligible] += 1
+                found = eligible & isprime[q] & isprime[np.maximum(q2, 0)]
+                p1[found] = q
+                resolved[found] = True
+
+        if direction > 0:
+            check_extras (wheel_primes)
+            k = np.zeros(count, dtype=np.int64)
+        else:
+            # index of the highest candidate <= n/2
+            half = nums // 2
+            k = (half // wheel) * length - 1
+            for r in range (wheel):
+                lanes = res == r
+                k[lanes] += np.searchsorted(tables[r], half[lanes] % wheel, side='right')
+        active = np.flatnonzero(~resolved)
+        while len(active) > 0:
+            ka = k[active]
+            la = length[active]
+            p = (ka // la) * wheel + padded[res[active], ka % la]
+            q2 = nums[active] - p
+            if direction > 0:
+                tested = p >= 3
+                if (q2[tested] < 2).any():
+                    bad = active[tested & (q2 < 2)][0]
+                    raise Exception ("Could not find GP for ", int(nums[bad]))
+            else:
+                # candidates below 3 are exhausted, wheel primes are left
+                keep = p >= 3
+                active = active[keep]
+                p = p[keep]
+                q2 = q2[keep]
+                tested = np.ones(len(active), dtype=bool)
+            iterations[active[tested]] += 1
+            found = tested.copy()
+            found[tested] = isprime[p[tested]] & isprime[q2[tested]]
+            p1[active[found]] = p[found]
+            resolved[active[found]] = True
+            active = active[~found]
+            k[active] += direction
+        if direction < 0:
+            check_extras (wheel_primes[::-1])
+            if not resolved.all():
+                raise Exception ("Could not find GP for ", int(nums[np.flatnonzero(~resolved)[0]]))
+        if self.stats != "":
+            if label == "":
+                label = 'w' + str(wheel)
+            self.stats.record_batch (label, iterations, self.stats.now() - start)
+        return p1, nums - p1, iterations
+
     def search_for_sym_primes (self, num, delta):
         found = False
         iteration = 0
@@ -152,7 +546,93 @@ class GoldbachPartition:
         duration = time.time() - startTime
         return p1, p2, duration, iteration
 
+    # search_for_sym_primes with delta given by name of delta method; deltas
+    # are read from precompiled table instead of calling delta per iteration;
+    # label - key of search in stats (default name)
+    def search_for_sym_primes_compiled (self, num, name, label = ""):
+        is_prime = self.primes.is_prime
+        table = self.get_delta_table (name, 1024)
+        found = False
+        iteration = 0
+
+        if self.stats != "":
+            start = self.stats.now()
+        startTime = time.time()
+        p1 = num
+        p2 = num
+        while (not found):
+            iteration += 1
+            if is_prime (p1) and is_prime (p2):
+                found = True
+            if (not found):
+                if iteration >= len(table):
+                    table = self.get_delta_table (name, iteration + 1)
+                delta = table[iteration]
+                p1 = p1 + delta
+                p2 = p2 - delta
+            if p2 < 2 or p1 < 2:
+                raise Exception ("Could not find symmetrical primes")
+        duration = time.time() - startTime
+        if self.stats != "":
+            if label == "":
+                label = name
+            self.stats.record (label, iteration, self.stats.now() - start)
+        return p1, p2, duration, iteration
+
+    # search_for_sym_primes for nums first, first + step, ..., <= last at once;
+    # offsets from num are shared by all nums, so while most of them are not
+    # resolved both primality tests are strided views of the prime bitmap;
+    # label - key of searches in stats (default name)
+    # returns arrays p1, p2 and iterations
+    def search_for_sym_primes_block (self, first, last, step, name, label = ""):
+        if self.stats != "":
+            start = self.stats.now()
+        nums = np.arange(first, last + 1, step, dtype=np.int64)
+        count = len(nums)
+        table = self.get_delta_table (name, 1024)
+        p1 = np.zeros(count, dtype=np.int64)
+        iterations = np.zeros(count, dtype=np.int64)
+        resolved = np.zeros(count, dtype=bool)
+        unresolved = count
+        pending = None
+        isprime = self.get_prime_bitmap (last + 1024)
+        offset = 0
+        iteration = 0
+        while unresolved > 0:
+            iteration += 1
+            if iteration > 1:
+                if iteration - 1 >= len(table):
+                    table = self.get_delta_table (name, iteration)
+                offset += table[iteration - 1]
+            if last + abs(offset) >= len(isprime):
+                isprime = self.get_prime_bitmap (last + abs(offset))
+            if pending is None and unresolved > count // 8 and first - abs(offset) >= 2:
+                # dense phase - strided views of bitmap cover all nums
+                hits = isprime[first+offset:last+offset+1:step][:count] & isprime[first-offset:last-offset+1:step][:count] & ~resolved
+                hits = np.flatnonzero(hits)
+                resolved[hits] = True
+            else:
+                # sparse phase - only unresolved nums are looked up
+                if pending is None:
+                    pending = np.flatnonzero(~resolved)
+                n = nums[pending]
+                if len(n) > 0 and n.min() - abs(offset) < 2:
+                    raise Exception ("Could not find symmetrical primes")
+                found = isprime[n + offset] & isprime[n - offset]
+                hits = pending[found]
+                pending = pending[~found]
+            p1[hits] = nums[hits] + offset
+            iterations[hits] = iteration
+            unresolved -= len(hits)
+        if self.stats != "":
+            if label == "":
+                label = name
+            self.stats.record_batch (label, iterations, self.stats.now() - start)
+        return p1, 2 * nums - p1, iterations
+
     def find_sum_of_prime_numbers (self, n):
+        if self.bitmap_mode:
+            return [(p1, n - p1) for p1 in self.find_sum_of_prime_numbers_bitmap(n).tolist()]
         min_i = 2
         max_i = int(n / 2) + 1
         factors = []
@@ -164,20 +644,322 @@ class GoldbachPartition:
                 factors.append (pair)
         return factors
 
+    # returns NumPy array of all p1 <= n/2 such that p1 and n - p1 are primes
+    def find_sum_of_prime_numbers_bitmap (self, n):
+        isprime = self.get_prime_bitmap (n)
+        half = n // 2
+        if half < 2:
+            return np.array([], dtype=np.int64)
+        pairs = isprime[2:half+1] & isprime[n-2:n-half-1:-1]
+        return np.flatnonzero(pairs) + 2
+
+    # find_sum_of_prime_numbers returning partitionset.PartitionSet
+    def find_partition_set (self, n):
+        if self.bitmap_mode:
+            return partitionset.PartitionSet (n, self.find_sum_of_prime_numbers_bitmap (n))
+        return partitionset.PartitionSet (n, [p1 for (p1, p2) in self.find_sum_of_prime_numbers (n)])
+
+    # generator of GPs (p1, p2) of n, p1 <= p2, computed lazily in chunks
+    # order:
+    #   o 'edge'   - p1 = 2, 3, 5, ... (increasing)
+    #   o 'center' - p1 closest to n/2 first (decreasing)
+    def iter_partitions (self, n, order = 'edge'):
+        if order != 'edge' and order != 'center':
+            raise Exception ("Unknown order", order)
+        half = n // 2
+        if not self.bitmap_mode:
+            if order == 'edge':
+                candidates = range (2, half + 1)
+            else:
+                candidates = range (half, 1, -1)
+            for p1 in candidates:
+                if self.primes.is_prime (p1) and self.primes.is_prime (n - p1):
+                    yield (p1, n - p1)
+            return
+        isprime = self.get_prime_bitmap (n)
+        chunk = 1024
+        lo = 2
+        hi = half
+        while lo <= hi:
+            if order == 'edge':
+                a = lo
+                b = min(lo + chunk - 1, hi)
+                lo = b + 1
+            else:
+                a = max(hi - chunk + 1, lo)
+                b = hi
+                hi = a - 1
+            found = np.flatnonzero(isprime[a:b+1] & isprime[n-a:n-b-1:-1]) + a
+            if order == 'center':
+                found = found[::-1]
+            for p1 in found.tolist():
+                yield (p1, n - p1)
+            chunk = min(2 * chunk, 1048576)
+
+    # returns number of GPs of n without building list of pairs
+    def count_partitions (self, n):
+        if not self.bitmap_mode:
+            return sum(1 for pair in self.iter_partitions (n))
+        isprime = self.get_prime_bitmap (n)
+        half = n // 2
+        if half < 2:
+            return 0
+        return int(np.count_nonzero(isprime[2:half+1] & isprime[n-2:n-half-1:-1]))
+
+    # returns first GP (p1, p2) of n in given order, for which
+    # condition (p1, p2) is True (or any GP if condition is None);
+    # returns None if there is no such GP
+    def find_first_partition (self, n, condition = None, order = 'edge'):
+        for (p1, p2) in self.iter_partitions (n, order):
+            if condition is None or condition (p1, p2):
+                return (p1, p2)
+        return None
+
+    # returns exact integer NumPy array c, where c[m] is the sum of a[i] * b[j]
+    # over all i + j = m, for 0 <= m < size; a and b are 0/1 indicators,
+    # convolved via FFT in blocks of block_size (b = None - a with itself)
+    def convolve_indicators (self, a, b, size, block_size = 4194304):
+        symmetric = b is None
+        a = a[:size].astype(np.float64)
+        if symmetric:
+            b = a
+        else:
+            b = b[:size].astype(np.float64)
+        counts = np.zeros(size, dtype=np.int64)
+        for si in range (0, len(a), block_size):
+            x = a[si:si+block_size]
+            if symmetric:
+                first_sj = si
+            else:
+                first_sj = 0
+            for sj in range (first_sj, min(len(b), size - si), block_size):
+                y = b[sj:sj+block_size]
+                length = len(x) + len(y) - 1
+                fft_size = 1 << (length - 1).bit_length()
+                c = np.fft.irfft(np.fft.rfft(x, fft_size) * np.fft.rfft(y, fft_size), fft_size)[:length]
+                r = np.rint(c)
+                if np.max(np.abs(c - r)) > 0.25:
+                    raise Exception ("FFT rounding error too big for block size", block_size)
+                first = si + sj
+                last = min(first + length, size)
+                if symmetric and si != sj:
+                    counts[first:last] += 2 * r[:last-first].astype(np.int64)
+                else:
+                    counts[first:last] += r[:last-first].astype(np.int64)
+        return counts
+
+    # returns NumPy array r, where r[n/2] is the number of GPs n = p1 + p2
+    # (p1 <= p2) for every even n <= max_n (Goldbach comet); prime indicator
+    # of odd numbers is convolved with itself via FFT in blocks of block_size
+    def get_goldbach_comet (self, max_n, block_size = 4194304):
+        isprime = self.get_prime_bitmap (max_n)
+        half = max_n // 2
+        # odd[k] - is 2k+1 prime; odd[k] * odd[j] contributes to n = 2(k+j+1)
+        odd = isprime[1:2*half:2]
+        counts = np.zeros(half + 1, dtype=np.int64)
+        counts[1:] = self.convolve_indicators (odd, None, half, block_size)
+        # ordered pairs -> pairs p1 <= p2; p1 = p2 = n/2 is counted only once
+        counts = (counts + isprime[:half+1]) // 2
+        counts[:2] = 0
+        if half >= 2:
+            counts[2] = 1
+        return counts
+
+    # 6kpm1 statistics (see goldbach-stats.py) for every even n <= max_n at once;
+    # primes 6k-1 and 6k+1 are split into two indicators indexed by k, so
+    # their sums fall into fixed classes: (6k-1)+(6k-1) = 6m+4,
+    # (6k+1)+(6k+1) = 6m+2 and (6k-1)+(6k+1) = 6m
+    # returns NumPy arrays indexed by n/2:
+    #   count, count_6km1, count_6kp1, count_6km1_both, count_6kp1_both,
+    #   count_lesser_both, count_lesser_6km1_both
+    def get_6kpm1_counts (self, max_n, block_size = 4194304):
+        size = max_n // 6 + 1
+        isprime = self.get_prime_bitmap (6*size + 8)
+        # km1[k] - is 6k+5 prime, kp1[k] - is 6k+1 prime, lesser twins > 3 are 6k-1
+        km1 = isprime[5:6*size+5:6]
+        kp1 = isprime[1:6*size+1:6]
+        lesser = km1 & isprime[7:6*size+7:6]
+        both_km1 = self.convolve_indicators (km1, None, size, block_size)
+        both_kp1 = self.convolve_indicators (kp1, None, size, block_size)
+        mixed = self.convolve_indicators (km1, kp1, size, block_size)
+        both_lesser = self.convolve_indicators (lesser, None, size, block_size)
+
+        half = max_n // 2 + 1
+        n = 2 * np.arange(half, dtype=np.int64)
+        # indicators of 6k-1 / 6k+1 primes and lesser twins by value
+        is_km1 = isprime[:n[-1]+1] & (np.arange(n[-1]+1) % 6 == 5)
+        is_kp1 = isprime[:n[-1]+1] & (np.arange(n[-1]+1) % 6 == 1)
+        is_lesser = isprime[:n[-1]+1] & isprime[2:n[-1]+3]
+        is_lesser_km1 = is_lesser.copy()
+        is_lesser_km1[:4] = False
+
+        # ordered pairs, index of n/2: 6m+4 -> 3m+5, 6m+2 -> 3m+1, 6m -> 3m+3
+        count_km1_both = np.zeros(half, dtype=np.int64)
+        count_kp1_both = np.zeros(half, dtype=np.int64)
+        count_mixed = np.zeros(half, dtype=np.int64)
+        count_lesser_km1_both = np.zeros(half, dtype=np.int64)
+        count_km1_both[5::3] = both_km1[:len(count_km1_both[5::3])]
+        count_kp1_both[1::3] = both_kp1[:len(count_kp1_both[1::3])]
+        count_mixed[3::3] = mixed[:len(count_mixed[3::3])]
+        count_lesser_km1_both[5::3] = both_lesser[:len(count_lesser_km1_both[5::3])]
+
+        # pairs p1 <= p2; p1 = p2 = n/2 is counted only once
+        idx = np.arange(half)
+        count_km1_both = (count_km1_both + is_km1[idx]) // 2
+        count_kp1_both = (count_kp1_both + is_kp1[idx]) // 2
+        count_lesser_km1_both = (count_lesser_km1_both + is_lesser_km1[idx]) // 2
+
+        # number of 6k-1 (6k+1) primes in all pairs: the other prime is 6k-1,
+        # 6k+1, 2 or 3; n/2 + n/2 has the same prime twice
+        n2 = np.maximum(n - 2, 0)
+        n3 = np.maximum(n - 3, 0)
+        count_km1 = 2 * count_km1_both + count_mixed + is_km1[n2] + is_km1[n3]
+        count_kp1 = 2 * count_kp1_both + count_mixed + is_kp1[n2] + is_kp1[n3]
+
+        count = count_km1_both + count_kp1_both + count_mixed
+        # lesser twin 3 is the only one which is not 6k-1: pairs (3, n-3)
+        count_lesser_both = count_lesser_km1_both + (is_lesser[n3] & (n >= 6))
+        return count, count_km1, count_kp1, count_km1_both, count_kp1_both, count_lesser_both, count_lesser_km1_both
+
     def search_for_difference (self, num):
+        get_ith_prime = self.get_prime_index ().get_ith_prime
         found = False
         iteration = 0
     
+        if self.stats != "":
+            start = self.stats.now()
         startTime = time.time()
         while (not found):
             iteration += 1
-            p1 = self.primes.get_ith_prime (iteration) # skip 2; start from 3
+            p1 = get_ith_prime (iteration) # skip 2; start from 3
             p2 = p1 + num
             if self.primes.is_prime (p2):
                 found = True
         duration = time.time() - startTime
+        if self.stats != "":
+            self.stats.record ('difference', iteration, self.stats.now() - start)
         return p1, p2, duration, iteration
 
+    # search_for_difference for all even d from d_min to d_max at once:
+    # consecutive primes p (3, 5, 7, ...) are swept once for the whole block
+    # and every d with p + d prime is marked as resolved
+    # returns arrays p1, p2 and iterations (index k is for d = d_min + 2k)
+    def search_for_difference_block (self, d_min, d_max):
+        if self.stats != "":
+            start = self.stats.now()
+        d_min = d_min + d_min % 2
+        count = max((d_max - d_min) // 2 + 1, 0)
+        p1 = np.zeros(count, dtype=np.int64)
+        iterations = np.zeros(count, dtype=np.int64)
+        resolved = np.zeros(count, dtype=bool)
+        unresolved = count
+        pending = None
+        isprime = self.get_prime_bitmap (d_max + 1024)
+        iteration = 0
+        while unresolved > 0:
+            iteration += 1
+            p = self.get_ith_prime (iteration)
+            if p + d_max >= len(isprime):
+                isprime = self.get_prime_bitmap (p + d_max)
+            if unresolved > count // 8:
+                # dense phase - strided view of bitmap covers the whole block
+                hits = isprime[p+d_min:p+d_max+1:2] & ~resolved
+                hits = np.flatnonzero(hits)
+                resolved[hits] = True
+            else:
+                # sparse phase - only unresolved d are looked up
+                if pending is None:
+                    pending = np.flatnonzero(~resolved)
+                found = isprime[p + d_min + 2 * pending]
+                hits = pending[found]
+                pending = pending[~found]
+            p1[hits] = p
+            iterations[hits] = iteration
+            unresolved -= len(hits)
+        d = d_min + 2 * np.arange(count, dtype=np.int64)
+        if self.stats != "":
+            self.stats.record_batch ('difference', iterations, self.stats.now() - start)
+        return p1, p1 + d, iterations
+
+    # verification of all even n, a <= n < b, in the way of Oliveira e Silva:
+    # n - p is a shifted view of prime bitmap of the segment for every n at
+    # once, so odd primes p = 3, 5, 7, ... up to small_primes_limit are tried
+    # for the whole segment until every n is covered; the rare leftovers are
+    # searched one by one
+    # returns NumPy array m, where m[j] is the minimal prime p such that
+    # n - p is prime for n = a' + 2j (a' - lowest even n >= max(a, 4))
+    def verify_segment (self, a, b, small_primes_limit = 65536):
+        if self.stats != "":
+            start = self.stats.now()
+        a = max(a + a % 2, 4)
+        count = max((b - a + 1) // 2, 0)
+        minp = np.zeros(count, dtype=np.int64)
+        if count == 0:
+            return minp
+        if self.segment_sieve == "":
+            if isinstance(self.primes, sieve.PrimeSieve):
+                self.segment_sieve = self.primes
+            else:
+                self.segment_sieve = sieve.PrimeSieve()
+        small_primes = np.flatnonzero(self.get_prime_bitmap (small_primes_limit)[:small_primes_limit+1])[1:]
+
+        # window[i] is True if low + 1 + 2i is prime
+        n_max = a + 2 * (count - 1)
+        low = max(a - small_primes_limit, 0)
+        low -= low % 2
+        window = self.segment_sieve.sieve_odd_segment (low, n_max)
+
+        resolved = np.zeros(count, dtype=bool)
+        unresolved = count
+        pending = None
+        if a == 4:
+            # 4 = 2 + 2 is the only GP with even prime
+            minp[0] = 2
+            resolved[0] = True
+            unresolved -= 1
+        for p in small_primes.tolist():
+            if unresolved == 0:
+                break
+            # index of n - p in window for n = a
+            offset = (a - p - low - 1) // 2
+            if pending is None and unresolved > count // 8:
+                # dense phase - shifted view of window covers the whole segment
+                first = max(-offset, 0)
+                if first >= count:
+                    continue
+                hits = window[offset+first:offset+count] & ~resolved[first:]
+                hits = np.flatnonzero(hits) + first
+                resolved[hits] = True
+            else:
+                # sparse phase - only uncovered n are looked up
+                if pending is None:
+                    pending = np.flatnonzero(~resolved)
+                index = offset + pending
+                found = (index >= 0) & window[np.maximum(index, 0)]
+                hits = pending[found]
+                pending = pending[~found]
+            minp[hits] = p
+            unresolved -= len(hits)
+
+        # leftovers - primes above small_primes_limit
+        if unresolved > 0:
+            is_prime = self.segment_sieve.is_prime
+            for j in np.flatnonzero(minp == 0).tolist():
+                n = a + 2 * j
+                p = small_primes_limit + 1 + small_primes_limit % 2
+                while not (is_prime (p) and is_prime (n - p)):
+                    p += 2
+                    if p > n // 2:
+                        raise Exception ("Could not find GP for ", n)
+                minp[j] = p
+        if self.stats != "":
+            # iterations - index of minimal p in odd primes (4 = 2 + 2 counts as 1)
+            max_p = int(minp.max())
+            odd_primes = np.flatnonzero(self.get_prime_bitmap (max_p)[:max_p+1])[1:]
+            iterations = np.searchsorted(odd_primes, minp) + 1
+            self.stats.record_batch ('segment', iterations, self.stats.now() - start)
+        return minp
+
     # returns True if 6kpm1 hypothesis is fulfilled for num and its
     # Goldbach Partition p1+p2:
     # - if n mod 3 = 0, then GSC (2n, 6a-1, 6b+1)
@@ -196,7 +978,47 @@ class GoldbachPartition:
                 return True
         return False
 
+    # precomputes results of reduce_prime_for_goldbach for all primes <= limit;
+    # bitmap of odd numbers is compared with itself shifted by 2^(k-1)
+    def init_reduction_table (self, limit):
+        isprime = self.get_prime_bitmap (limit)
+        odd = isprime[1:limit+1:2]
+        size = len(odd)
+        min_k = np.zeros(size, dtype=np.uint8)
+        max_k = np.zeros(size, dtype=np.uint8)
+        k = 1
+        while (1 << k) < limit:
+            shift = 1 << (k - 1)
+            # p = 2j + 1 and p - 2^k = 2(j - shift) + 1 both prime
+            hits = odd[shift:] & odd[:size-shift]
+            min_k[shift:][hits & (min_k[shift:] == 0)] = k
+            max_k[shift:][hits] = k
+            k += 1
+        self.reduction_min_k = min_k.tobytes()
+        self.reduction_max_k = max_k.tobytes()
+        self.reduction_limit = limit
+
+    # returns NumPy array of k (0 - not found) for every odd prime in ps
+    def get_reduction_k (self, ps, look_for_max):
+        if look_for_max:
+            table = np.frombuffer(self.reduction_max_k, dtype=np.uint8)
+        else:
+            table = np.frombuffer(self.reduction_min_k, dtype=np.uint8)
+        return table[np.asarray(ps, dtype=np.int64) >> 1]
+
     def reduce_prime_for_goldbach (self, p, look_for_max):
+        if p <= self.reduction_limit and p & 1 == 1:
+            if look_for_max:
+                n = self.reduction_max_k[p >> 1]
+            else:
+                n = self.reduction_min_k[p >> 1]
+            if n > 0:
+                return (n, p - 2**n, True)
+            # values left by the search below when nothing is found
+            if look_for_max:
+                return (0, p - 2, False)
+            n = max(1, (p - 3).bit_length())
+            return (n + 1, p - 2**n, False)
         if look_for_max:
             n = int(math.log(p, 2))
             diff = -1
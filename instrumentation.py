@@ -0,0 +1,120 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import time
+import numpy as np
+
+# Statistics of Goldbach searches, collected per strategy:
+#   o number of calls (searched numbers), sum of iterations and of time in ns
+#   o histograms of iterations and latency per call; bucket b holds values v
+#     with 2^(b-1) <= v < 2^b (bucket 0 holds v = 0)
+# Timings come from monotonic ns counter (see now) and are sampled once per
+# call or once per batch; latency per call of a batch is its duration divided
+# by number of calls.
+class SearchStats:
+
+    calls = ""
+    iterations = ""
+    duration_ns = ""
+    hist_iterations = ""
+    hist_latency_ns = ""
+
+    def __init__ (self):
+        self.reset ()
+
+    def reset (self):
+        self.calls = {}
+        self.iterations = {}
+        self.duration_ns = {}
+        self.hist_iterations = {}
+        self.hist_latency_ns = {}
+
+    def now (self):
+        return time.perf_counter_ns()
+
+    def add_to_histogram (self, hist, strategy, counts):
+        h = hist.setdefault(strategy, [])
+        while len(h) < len(counts):
+            h.append(0)
+        for b in range (len(counts)):
+            h[b] += int(counts[b])
+
+    def add_to_bucket (self, hist, strategy, bucket):
+        h = hist.setdefault(strategy, [])
+        if len(h) <= bucket:
+            h.extend([0] * (bucket + 1 - len(h)))
+        h[bucket] += 1
+
+    # one search of given strategy; plain ints only, as it is called once
+    # per searched number
+    def record (self, strategy, iterations, duration_ns):
+        iterations = int(iterations)
+        duration_ns = int(duration_ns)
+        self.calls[strategy] = self.calls.get(strategy, 0) + 1
+        self.iterations[strategy] = self.iterations.get(strategy, 0) + iterations
+        self.duration_ns[strategy] = self.duration_ns.get(strategy, 0) + duration_ns
+        self.add_to_bucket (self.hist_iterations, strategy, iterations.bit_length())
+        self.add_to_bucket (self.hist_latency_ns, strategy, duration_ns.bit_length())
+
+    # batch of searches of given strategy; iterations - list/array with
+    # iterations of each search, duration_ns - time of the whole batch
+    def record_batch (self, strategy, iterations, duration_ns):
+        iterations = np.asarray(iterations, dtype=np.int64)
+        count = len(iterations)
+        if count == 0:
+            return
+        duration_ns = int(duration_ns)
+        self.calls[strategy] = self.calls.get(strategy, 0) + count
+        self.iterations[strategy] = self.iterations.get(strategy, 0) + int(iterations.sum())
+        self.duration_ns[strategy] = self.duration_ns.get(strategy, 0) + duration_ns
+        # frexp exponent of v > 0 is equal to bit length of v
+        buckets = np.frexp(iterations.astype(np.float64))[1]
+        self.add_to_histogram (self.hist_iterations, strategy, np.bincount(buckets))
+        latency = np.zeros((duration_ns // count).bit_length() + 1, dtype=np.int64)
+        latency[-1] = count
+        self.add_to_histogram (self.hist_latency_ns, strategy, latency)
+
+    # returns dictionary: strategy -> dictionary of collected values
+    def dump (self):
+        result = {}
+        for strategy in self.calls:
+            result[strategy] = {'calls': self.calls[strategy],
+                                'iterations': self.iterations[strategy],
+                                'duration_ns': self.duration_ns[strategy],
+                                'hist_iterations': list(self.hist_iterations[strategy]),
+                                'hist_latency_ns': list(self.hist_latency_ns[strategy])}
+        return result
+
+    # returns human-readable summary, one line per strategy
+    def summary (self):
+        lines = []
+        for strategy in sorted(self.calls):
+            calls = self.calls[strategy]
+            lines.append (str(strategy) + ": calls=" + str(calls) +
+                          " avg_iterations=" + "{:.2f}".format(self.iterations[strategy] / calls) +
+                          " avg_ns=" + "{:.1f}".format(self.duration_ns[strategy] / calls) +
+                          " hist_iterations=" + str(self.hist_iterations[strategy]) +
+                          " hist_latency_ns=" + str(self.hist_latency_ns[strategy]))
+        return "\n".join(lines)
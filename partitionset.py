@@ -0,0 +1,72 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import numpy as np
+
+# GPs (p1, p2) of n kept as one NumPy array of p1 (p2 = n - p1 is implicit);
+# iterating, indexing and str() give the same (p1, p2) tuples as list of
+# pairs, so it can be used wherever such list is expected
+class PartitionSet:
+
+    n = 0
+    p1 = ""
+
+    def __init__ (self, n, p1):
+        self.n = n
+        self.p1 = np.asarray(p1, dtype=np.int64)
+
+    def __len__ (self):
+        return len(self.p1)
+
+    def __iter__ (self):
+        n = self.n
+        for p1 in self.p1.tolist():
+            yield (p1, n - p1)
+
+    def __getitem__ (self, i):
+        p1 = int(self.p1[i])
+        return (p1, self.n - p1)
+
+    def __str__ (self):
+        return str(self.to_list())
+
+    def __repr__ (self):
+        return self.__str__()
+
+    def get_p2 (self):
+        return self.n - self.p1
+
+    # returns list of pairs (p1, p2)
+    def to_list (self):
+        n = self.n
+        return [(p1, n - p1) for p1 in self.p1.tolist()]
+
+    # returns NumPy array of shape (k, 2) with rows p1, p2
+    def to_array (self):
+        return np.column_stack((self.p1, self.n - self.p1))
+
+# returns PartitionSet of list of pairs (p1, p2) of n
+def from_pairs (n, pairs):
+    return PartitionSet (n, [p1 for (p1, p2) in pairs])
@@ -0,0 +1,276 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import os
+import mmap
+import bisect
+import struct
+import zlib
+import numpy as np
+import partitionset
+import dataprocessing
+
+# Binary store of GPs of consecutive even n (replacement of "Number:/Pairs:"
+# text dump):
+#   o header (64 bytes, little endian): magic, version
+#   o blocks of consecutive even n, every block has header: first n, number
+#     of n, flags, number of pairs, size and CRC-32 of payload
+#   o payload: offsets (uint32, number of n + 1) of partitions of every n
+#     in deltas, followed by deltas (uint16) of p1 of all partitions of the
+#     block; first delta of every n is its smallest p1 (p2 = n - p1)
+#   o payload is compressed with zlib if flags & FLAG_ZLIB
+# Blocks are appended, so the store can be extended after every checkpoint;
+# uncompressed payloads are read straight from memory-mapped file.
+MAGIC = b"GBPAIRS\0"
+VERSION = 1
+FLAG_ZLIB = 1
+HEADER = struct.Struct("<8sI52x")
+BLOCK_HEADER = struct.Struct("<QIIQII")
+# offsets and size of payload are uint32
+MAX_PAYLOAD = 2**32 - 1
+
+class PartitionStore:
+
+    file_name = ""
+    store = ""
+    # end of the last complete block
+    end = 0
+
+    # for every block: first n, number of n, flags, number of pairs and
+    # offset of payload in file
+    block_first = ""
+    block_count = ""
+    block_flags = ""
+    block_pairs = ""
+    block_offset = ""
+    block_bytes = ""
+
+    # the most recently decoded block: index, offsets, p1 of all pairs
+    cached_block = -1
+    cached_offsets = ""
+    cached_p1 = ""
+
+    # verify - CRC-32 of every block is checked
+    def __init__ (self, file_name, verify = False):
+        self.file_name = file_name
+        with open(file_name, 'rb') as f:
+            header = f.read (HEADER.size)
+            if len(header) < HEADER.size or header[:8] != MAGIC:
+                raise Exception ("Not a partition store", file_name)
+            (magic, version) = HEADER.unpack (header)
+            if version != VERSION:
+                raise Exception ("Unsupported version of partition store", version)
+            self.store = mmap.mmap (f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.block_first = []
+        self.block_count = []
+        self.block_flags = []
+        self.block_pairs = []
+        self.block_offset = []
+        self.block_bytes = []
+        pos = HEADER.size
+        size = len(self.store)
+        while pos + BLOCK_HEADER.size <= size:
+            (first, count, flags, pairs, payload_bytes, checksum) = BLOCK_HEADER.unpack_from (self.store, pos)
+            if pos + BLOCK_HEADER.size + payload_bytes > size:
+                # block interrupted while written
+                break
+            if verify and zlib.crc32 (self.store[pos + BLOCK_HEADER.size:pos + BLOCK_HEADER.size + payload_bytes]) != checksum:
+                raise Exception ("Checksum mismatch in block", len(self.block_first), "of partition store", file_name)
+            self.block_first.append (first)
+            self.block_count.append (count)
+            self.block_flags.append (flags)
+            self.block_pairs.append (pairs)
+            self.block_offset.append (pos + BLOCK_HEADER.size)
+            self.block_bytes.append (payload_bytes)
+            pos += BLOCK_HEADER.size + payload_bytes
+        self.end = pos
+        self.cached_block = -1
+
+    def close (self):
+        self.cached_offsets = ""
+        self.cached_p1 = ""
+        self.store.close ()
+
+    def get_number_of_blocks (self):
+        return len(self.block_first)
+
+    # the highest n in store, 0 - store is empty
+    def get_last_number (self):
+        if len(self.block_first) == 0:
+            return 0
+        return self.block_first[-1] + 2 * (self.block_count[-1] - 1)
+
+    # returns offsets and p1 of all partitions of j-th block
+    def get_block (self, j):
+        if j == self.cached_block:
+            return self.cached_offsets, self.cached_p1
+        count = self.block_count[j]
+        pairs = self.block_pairs[j]
+        payload = memoryview(self.store)[self.block_offset[j]:self.block_offset[j] + self.block_bytes[j]]
+        if self.block_flags[j] & FLAG_ZLIB:
+            payload = zlib.decompress (payload)
+        offsets = np.frombuffer(payload, dtype='<u4', count=count + 1).astype(np.int64)
+        deltas = np.frombuffer(payload, dtype='<u2', count=pairs, offset=4 * (count + 1))
+        # deltas are summed up separately for every n
+        p1 = np.cumsum(deltas, dtype=np.int64)
+        starts = offsets[:-1][offsets[:-1] < offsets[1:]]
+        if len(starts) > 0:
+            base = np.concatenate(([0], p1[starts[1:] - 1]))
+            p1 -= np.repeat(base, np.diff(np.append(starts, pairs)))
+        del payload
+        self.cached_block = j
+        self.cached_offsets = offsets
+        self.cached_p1 = p1
+        return offsets, p1
+
+    # index of block with partitions of n, -1 - n not in store
+    def find_block (self, n):
+        j = bisect.bisect_right (self.block_first, n) - 1
+        if j < 0 or n % 2 != 0 or n > self.block_first[j] + 2 * (self.block_count[j] - 1):
+            return -1
+        return j
+
+    def __contains__ (self, n):
+        return self.find_block (n) >= 0
+
+    # returns PartitionSet of n
+    def get_partition_set (self, n):
+        j = self.find_block (n)
+        if j < 0:
+            raise Exception ("Partitions of", n, "are not in store", self.file_name)
+        (offsets, p1) = self.get_block (j)
+        i = (n - self.block_first[j]) // 2
+        return partitionset.PartitionSet (n, p1[offsets[i]:offsets[i+1]])
+
+    # yields (n, PartitionSet) for all n in store (from n = first on)
+    def iter_partition_sets (self, first = 0):
+        for j in range (max(self.find_block (first), 0), len(self.block_first)):
+            (offsets, p1) = self.get_block (j)
+            for i in range (self.block_count[j]):
+                n = self.block_first[j] + 2 * i
+                if n >= first:
+                    yield n, partitionset.PartitionSet (n, p1[offsets[i]:offsets[i+1]])
+
+# appends GPs of consecutive even n to partition store
+class PartitionStoreWriter:
+
+    file_name = ""
+    file = ""
+    block_size = 0
+    compress = False
+
+    # n expected next and the highest n written so far
+    next_number = 0
+    last_number = 0
+
+    # partitions not written yet: first n and p1 arrays of consecutive n
+    pending_first = 0
+    pending = ""
+    pending_pairs = 0
+
+    # block_size - number of n in one block
+    # compress - payload of every block is compressed with zlib
+    # append - new n are added to existing store (n must be higher than
+    #          the highest n in it), otherwise store is created from scratch
+    def __init__ (self, file_name, block_size = 1024, compress = True, append = False):
+        self.file_name = file_name
+        self.block_size = block_size
+        self.compress = compress
+        self.pending = []
+        self.pending_first = 0
+        self.pending_pairs = 0
+        self.last_number = 0
+        if append and os.path.exists(file_name):
+            store = PartitionStore (file_name)
+            self.last_number = store.get_last_number ()
+            end = store.end
+            store.close ()
+            self.file = open(file_name, 'r+b')
+            # incomplete block at the end is dropped
+            self.file.truncate (end)
+            self.file.seek (end)
+        else:
+            self.file = open(file_name, 'wb')
+            self.file.write (HEADER.pack (MAGIC, VERSION))
+        self.next_number = self.last_number + 2
+
+    # factors - PartitionSet or list of pairs (p1, p2) of n, p1 increasing
+    def add (self, n, factors):
+        if n <= self.last_number:
+            raise Exception ("Partitions of", n, "are already in store", self.file_name)
+        if not isinstance(factors, partitionset.PartitionSet):
+            factors = partitionset.from_pairs (n, factors)
+        if len(self.pending) > 0 and n != self.next_number:
+            self.flush ()
+        # block is closed early if its payload would not fit in uint32
+        pairs = self.pending_pairs + len(factors)
+        if len(self.pending) > 0 and 4 * (len(self.pending) + 2) + 2 * pairs > MAX_PAYLOAD:
+            self.flush ()
+        if len(self.pending) == 0:
+            self.pending_first = n
+        self.pending.append (factors.p1)
+        self.pending_pairs += len(factors)
+        self.last_number = n
+        self.next_number = n + 2
+        if len(self.pending) >= self.block_size:
+            self.flush ()
+
+    # writes pending partitions as one block
+    def flush (self):
+        if len(self.pending) > 0:
+            counts = np.array([len(p1) for p1 in self.pending], dtype=np.int64)
+            offsets = np.concatenate(([0], np.cumsum(counts)))
+            p1 = np.concatenate(self.pending).astype(np.int64)
+            deltas = np.diff(p1, prepend=0)
+            starts = offsets[:-1][counts > 0]
+            deltas[starts] = p1[starts]
+            if len(deltas) > 0 and (deltas.min() < 0 or deltas.max() > 65535):
+                raise Exception ("p1 must be increasing, with gaps below 65536")
+            if offsets[-1] > MAX_PAYLOAD:
+                raise Exception ("Too many pairs in one block of", self.file_name)
+            payload = offsets.astype('<u4').tobytes() + deltas.astype('<u2').tobytes()
+            flags = 0
+            if self.compress:
+                payload = zlib.compress (payload)
+                flags = FLAG_ZLIB
+            if len(payload) > MAX_PAYLOAD:
+                raise Exception ("Payload of block is too large for", self.file_name)
+            self.file.write (BLOCK_HEADER.pack (self.pending_first, len(self.pending), flags, len(p1), len(payload), zlib.crc32 (payload)))
+            self.file.write (payload)
+            self.pending = []
+            self.pending_pairs = 0
+        self.file.flush ()
+
+    def close (self):
+        self.flush ()
+        self.file.close ()
+
+# converts "Number:/Pairs:" text dump to partition store
+def convert_pairs_dump (file_pairs, file_name, block_size = 1024, compress = True):
+    dp = dataprocessing.DataProcessing()
+    writer = PartitionStoreWriter (file_name, block_size, compress)
+    for (n, factors) in dp.iter_sums_from_file (file_pairs):
+        writer.add (n, factors)
+    writer.close ()
@@ -0,0 +1,137 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import math
+
+# Primality test of a single number without any tables:
+#   o trial division by primes below 256
+#   o deterministic Miller-Rabin for n < 2^64 (bases of Jim Sinclair)
+#   o Baillie-PSW (strong base 2 + strong Lucas test) for larger n
+
+small_primes = [p for p in range (2, 256) if all(p % q != 0 for q in range (2, math.isqrt(p) + 1))]
+
+# Miller-Rabin bases sufficient for all n < 2^64
+bases_64 = [2, 325, 9375, 28178, 450775, 9780504, 1795265022]
+
+# returns True if odd n > 2 is a strong probable prime to base a
+def is_strong_probable_prime (n, a):
+    a = a % n
+    if a == 0:
+        return True
+    d = n - 1
+    s = 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    x = pow(a, d, n)
+    if x == 1 or x == n - 1:
+        return True
+    for r in range (s - 1):
+        x = x * x % n
+        if x == n - 1:
+            return True
+    return False
+
+def jacobi (a, n):
+    a = a % n
+    result = 1
+    while a != 0:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 == 3 or n % 8 == 5:
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a = a % n
+    if n == 1:
+        return result
+    return 0
+
+# returns True if odd n > 2, which is not a square, is a strong Lucas
+# probable prime with parameters chosen by Selfridge's method A
+def is_strong_lucas_probable_prime (n):
+    d = 5
+    while True:
+        j = jacobi (d, n)
+        if j == -1:
+            break
+        if j == 0 and abs(d) != n:
+            return False
+        d = -d - 2 if d > 0 else -d + 2
+    q = (1 - d) // 4
+    # n + 1 = k * 2^s, k odd
+    k = n + 1
+    s = 0
+    while k % 2 == 0:
+        k //= 2
+        s += 1
+    # U_k, V_k and Q^k by binary method
+    u = 1
+    v = 1
+    qk = q % n
+    for bit in bin(k)[3:]:
+        u = u * v % n
+        v = (v * v - 2 * qk) % n
+        qk = qk * qk % n
+        if bit == '1':
+            u, v = u + v, d * u + v
+            # division by 2 modulo odd n
+            if u % 2 == 1:
+                u += n
+            if v % 2 == 1:
+                v += n
+            u = (u // 2) % n
+            v = (v // 2) % n
+            qk = qk * q % n
+    if u == 0 or v == 0:
+        return True
+    for r in range (s - 1):
+        v = (v * v - 2 * qk) % n
+        qk = qk * qk % n
+        if v == 0:
+            return True
+    return False
+
+def is_prime (n):
+    if n < 2:
+        return False
+    for p in small_primes:
+        if n % p == 0:
+            return n == p
+    if n < 65536:
+        # no prime factor below 256
+        return True
+    if n < 18446744073709551616:
+        for a in bases_64:
+            if not is_strong_probable_prime (n, a):
+                return False
+        return True
+    if not is_strong_probable_prime (n, 2):
+        return False
+    r = math.isqrt(n)
+    if r * r == n:
+        return False
+    return is_strong_lucas_probable_prime (n)
@@ -0,0 +1,326 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import os
+import mmap
+import struct
+import zlib
+import concurrent.futures
+import numpy as np
+import sieve
+import primality
+
+# Binary store of primality of all integers 0 <= n <= limit:
+#   o header (128 bytes, little endian): magic, version, flags, limit and
+#     offset, size and CRC-32 of every section
+#   o primes: bit i of byte i // 8 (little bit order) is 1 if 2*i + 1 is prime
+#   o twins: bit i is 1 if 2*i + 1 is lesser twin prime (same packing)
+#   o pi index: uint64 entry j is number of primes < j * pi_step
+# Odd numbers of every segment of PrimeSieve are packed in the same way, so
+# segments are read from the store without any conversion.
+MAGIC = b"GBPRIMES"
+VERSION = 2
+FLAG_TWINS = 1
+FLAG_PI_INDEX = 2
+HEADER = struct.Struct("<8sIIQQQIQQIQQQI36x")
+# sections are processed in chunks of this many bytes
+CHUNK_BYTES = 16777216
+
+# sieve of worker process (see sieve_store_segment)
+segment_sieve = ""
+
+# returns odd numbers low+1, low+3, ..., high-1 bit-packed as in store
+def sieve_store_segment (low, high):
+    global segment_sieve
+    if segment_sieve == "":
+        segment_sieve = sieve.PrimeSieve ()
+    return np.packbits(segment_sieve.sieve_odd_segment (low, high), bitorder='little').tobytes()
+
+# yields packed segments [low, low + segment_size), ... below high in order;
+# workers > 1 - segments are sieved in parallel by pool of processes
+def iter_store_segments (low, high, segment_size, workers = 1):
+    lows = range (low, high, segment_size)
+    if workers <= 1:
+        for l in lows:
+            yield sieve_store_segment (l, l + segment_size)
+        return
+    batch = 4 * workers
+    with concurrent.futures.ProcessPoolExecutor (max_workers=workers) as executor:
+        for i in range (0, len(lows), batch):
+            l = lows[i:i+batch]
+            for bits in executor.map (sieve_store_segment, l, [x + segment_size for x in l]):
+                yield bits
+
+# returns lesser twin flags for packed primes; next_bit is primality bit
+# of odd number following the last byte
+def get_twin_flags (data, next_bit = 0):
+    following = np.empty_like(data)
+    following[:-1] = data[1:] & 1
+    following[-1:] = next_bit
+    return data & ((data >> 1) | (following << 7))
+
+# is odd n > 1 prime according to packed primes
+def is_stored_prime (data, n):
+    i = n >> 1
+    return (int(data[i >> 3]) >> (i & 7)) & 1 == 1
+
+# writes twin and pi index sections after packed primes of all n <= limit
+# (already written to f at data_offset) and final header
+def finish_prime_store (f, limit, data_offset, data_bytes, checksum):
+    f.flush ()
+    twin_offset = data_offset + data_bytes
+    twin_checksum = 0
+    with mmap.mmap (f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        data = np.frombuffer(m, dtype=np.uint8, count=data_bytes, offset=data_offset)
+        f.seek (twin_offset)
+        for i in range (0, data_bytes, CHUNK_BYTES):
+            twins = get_twin_flags (data[i:i+CHUNK_BYTES], data[i+CHUNK_BYTES] & 1 if i + CHUNK_BYTES < data_bytes else 0)
+            if i + CHUNK_BYTES >= data_bytes and limit >= 3:
+                # twin of the highest odd n <= limit is above limit
+                n = limit - 1 + limit % 2
+                j = (n >> 1) - i * 8
+                if is_stored_prime (data, n) and primality.is_prime (n + 2):
+                    twins[j >> 3] |= 1 << (j & 7)
+            bits = twins.tobytes()
+            f.write (bits)
+            twin_checksum = zlib.crc32 (bits, twin_checksum)
+        pi = sieve.get_pi_index (data, limit).astype('<u8').tobytes()
+        del data
+    pi_offset = twin_offset + data_bytes
+    f.write (pi)
+    f.seek (0)
+    f.write (HEADER.pack (MAGIC, VERSION, FLAG_TWINS | FLAG_PI_INDEX, limit,
+                          data_offset, data_bytes, checksum,
+                          twin_offset, data_bytes, twin_checksum,
+                          pi_offset, sieve.PI_STEP, len(pi) // 8, zlib.crc32 (pi)))
+    f.truncate (pi_offset + len(pi))
+
+# writes store of primality of all n <= limit to file_name; numbers not
+# covered by base store are sieved by workers processes
+def write_prime_store (file_name, limit, segment_size = 1048576, workers = 1, base = ""):
+    if segment_size % 16 != 0:
+        raise Exception ("Segment size must be a multiple of 16")
+    data_bytes = ((limit + 1) // 2 + 7) // 8
+    checksum = 0
+    written = 0
+    file_tmp = file_name + ".tmp"
+    with open(file_tmp, 'w+b') as f:
+        f.write (bytes(HEADER.size))
+        if base != "":
+            # whole segments of base store are copied
+            keep = min(base.store_limit + 1, limit + 1) // segment_size * segment_size // 16
+            for i in range (0, keep, CHUNK_BYTES):
+                bits = base.data[i:min(i + CHUNK_BYTES, keep)].tobytes()
+                f.write (bits)
+                checksum = zlib.crc32 (bits, checksum)
+            written = keep
+        for bits in iter_store_segments (written * 16, data_bytes * 16, segment_size, workers):
+            bits = bits[:data_bytes - written]
+            if written + len(bits) == data_bytes and (limit + 1) // 2 % 8 != 0:
+                # bits of numbers above limit are cleared
+                last = bits[-1] & ((1 << ((limit + 1) // 2 % 8)) - 1)
+                bits = bits[:-1] + bytes([last])
+            f.write (bits)
+            checksum = zlib.crc32 (bits, checksum)
+            written += len(bits)
+        finish_prime_store (f, limit, HEADER.size, data_bytes, checksum)
+    if base != "":
+        base.close ()
+    os.replace (file_tmp, file_name)
+
+# extends existing store to limit; only numbers above its limit are sieved
+def extend_prime_store (file_name, limit, segment_size = 1048576, workers = 1):
+    base = PrimeStore (file_name)
+    if limit <= base.store_limit:
+        base.close ()
+        return
+    write_prime_store (file_name, limit, segment_size, workers, base)
+
+# yields arrays of integers from legacy text file (one or more numbers
+# per line, separated by commas or whitespaces)
+def read_legacy_numbers (file_name):
+    with open(file_name, 'r') as f:
+        rest = ""
+        while True:
+            text = f.read (CHUNK_BYTES)
+            if text == "":
+                break
+            text = rest + text.replace(',', ' ')
+            tokens = text.split()
+            rest = ""
+            if len(tokens) > 0 and not text[-1].isspace():
+                rest = tokens.pop()
+            yield np.array(tokens, dtype=np.int64)
+        if rest != "":
+            yield np.array([rest], dtype=np.int64)
+
+# builds store from legacy text file of primes (up to the largest prime
+# in it, unless limit is given); files of twin primes and nonprimes, if
+# given, are checked against it
+def import_legacy_primes (file_name, file_primes, file_twinprimes = "", file_nonprimes = "", limit = 0):
+    data = np.zeros(CHUNK_BYTES, dtype=np.uint8)
+    highest = 0
+    for nums in read_legacy_numbers (file_primes):
+        if limit > 0:
+            nums = nums[nums <= limit]
+        nums = nums[nums & 1 == 1]
+        if len(nums) == 0:
+            continue
+        highest = max(highest, int(nums.max()))
+        i = nums >> 1
+        if (highest >> 4) >= len(data):
+            data = np.concatenate((data, np.zeros(max(len(data), (highest >> 4) + 1 - len(data)), dtype=np.uint8)))
+        np.bitwise_or.at (data, i >> 3, (1 << (i & 7)).astype(np.uint8))
+    if limit == 0:
+        limit = max(highest, 2)
+    data_bytes = ((limit + 1) // 2 + 7) // 8
+    if len(data) < data_bytes:
+        data = np.concatenate((data, np.zeros(data_bytes - len(data), dtype=np.uint8)))
+    data = data[:data_bytes]
+
+    def is_stored (nums):
+        i = nums >> 1
+        return (nums == 2) | ((nums & 1 == 1) & ((data[i >> 3] >> (i & 7)) & 1 == 1))
+
+    if file_twinprimes != "":
+        for nums in read_legacy_numbers (file_twinprimes):
+            nums = nums[(nums >= 3) & (nums <= limit - 2)]
+            if not np.all(is_stored (nums) & (is_stored (nums - 2) | is_stored (nums + 2))):
+                raise Exception ("Twin primes in", file_twinprimes, "do not match", file_primes)
+    if file_nonprimes != "":
+        for nums in read_legacy_numbers (file_nonprimes):
+            nums = nums[(nums >= 0) & (nums <= limit)]
+            if np.any(is_stored (nums)):
+                raise Exception ("Nonprimes in", file_nonprimes, "do not match", file_primes)
+    file_tmp = file_name + ".tmp"
+    with open(file_tmp, 'w+b') as f:
+        f.write (bytes(HEADER.size))
+        bits = data.tobytes()
+        f.write (bits)
+        finish_prime_store (f, limit, HEADER.size, data_bytes, zlib.crc32 (bits))
+    os.replace (file_tmp, file_name)
+
+# returns header of store as dictionary
+def read_prime_store_header (file_name):
+    with open(file_name, 'rb') as f:
+        header = f.read (HEADER.size)
+    if len(header) < HEADER.size or header[:8] != MAGIC:
+        raise Exception ("Not a prime store", file_name)
+    (magic, version, flags, limit, data_offset, data_bytes, checksum,
+     twin_offset, twin_bytes, twin_checksum, pi_offset, pi_step, pi_count, pi_checksum) = HEADER.unpack (header)
+    if version != VERSION:
+        raise Exception ("Unsupported version of prime store", version)
+    return {'version': version, 'flags': flags, 'limit': limit,
+            'data_offset': data_offset, 'data_bytes': data_bytes, 'checksum': checksum,
+            'twin_offset': twin_offset, 'twin_bytes': twin_bytes, 'twin_checksum': twin_checksum,
+            'pi_offset': pi_offset, 'pi_step': pi_step, 'pi_count': pi_count, 'pi_checksum': pi_checksum}
+
+# PrimeSieve backed by memory-mapped prime store; numbers above limit of
+# the store are sieved (or tested) as in PrimeSieve. All processes opening
+# the same store share one copy of it in page cache.
+class PrimeStore (sieve.PrimeSieve):
+
+    file_name = ""
+    header = ""
+    store_limit = 0
+    store = ""
+    data = ""
+    data_offset = 0
+    twins = ""
+
+    # verify - CRC-32 of all sections is checked (the whole store is read)
+    def __init__ (self, file_name, segment_size = 1048576, max_segments = 8, sieve_limit = 4294967296, verify = False):
+        sieve.PrimeSieve.__init__ (self, segment_size, max_segments, sieve_limit)
+        self.file_name = file_name
+        self.header = read_prime_store_header (file_name)
+        self.store_limit = self.header['limit']
+        self.data_offset = self.header['data_offset']
+        with open(file_name, 'rb') as f:
+            self.store = mmap.mmap (f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.store) < self.header['pi_offset'] + 8 * self.header['pi_count']:
+            raise Exception ("Prime store", file_name, "is truncated")
+        self.data = np.frombuffer(self.store, dtype=np.uint8, count=self.header['data_bytes'], offset=self.data_offset)
+        self.twins = np.frombuffer(self.store, dtype=np.uint8, count=self.header['twin_bytes'], offset=self.header['twin_offset'])
+        self.pi_index = np.frombuffer(self.store, dtype='<u8', count=self.header['pi_count'], offset=self.header['pi_offset'])
+        self.pi_step = self.header['pi_step']
+        self.prime_bits = self.data
+        self.pi_limit = self.store_limit
+        if verify and self.get_checksums () != (self.header['checksum'], self.header['twin_checksum'], self.header['pi_checksum']):
+            raise Exception ("Checksum mismatch in prime store", file_name)
+
+    # releases memory-mapped store (all views of it must be gone)
+    def close (self):
+        self.data = ""
+        self.prime_bits = ""
+        self.twins = ""
+        self.pi_index = ""
+        self.store.close ()
+
+    def get_checksum (self, section):
+        checksum = 0
+        for i in range (0, len(section), CHUNK_BYTES):
+            checksum = zlib.crc32 (section[i:i+CHUNK_BYTES], checksum)
+        return checksum
+
+    def get_checksums (self):
+        return (self.get_checksum (self.data), self.get_checksum (self.twins), self.get_checksum (self.pi_index.view(np.uint8)))
+
+    def sieve_odd_segment (self, low, high):
+        if high - 1 > self.store_limit:
+            return sieve.PrimeSieve.sieve_odd_segment (self, low, high)
+        first = low // 2
+        count = (high - low) // 2
+        bits = np.unpackbits(self.data[first // 8:(first + count + 7) // 8], bitorder='little')
+        return bits[first % 8:first % 8 + count].astype(bool)
+
+    def load_segment (self, index):
+        low = index * self.segment_size
+        if low + self.segment_size - 1 > self.store_limit:
+            return sieve.PrimeSieve.load_segment (self, index)
+        if len(self.segments) >= self.max_segments:
+            del self.segments[next(iter(self.segments))]
+        bits = self.data[low // 16:(low + self.segment_size) // 16].tobytes()
+        self.segments[index] = bits
+        return bits
+
+    def is_prime (self, n):
+        if n < 3 or n > self.store_limit:
+            return sieve.PrimeSieve.is_prime (self, n)
+        i = n >> 1
+        return n & 1 == 1 and (self.store[self.data_offset + (i >> 3)] >> (i & 7)) & 1 == 1
+
+    def is_lesser_twin_prime (self, n):
+        if n < 3 or n > self.store_limit:
+            return sieve.PrimeSieve.is_lesser_twin_prime (self, n)
+        i = n >> 1
+        return n & 1 == 1 and (int(self.twins[i >> 3]) >> (i & 7)) & 1 == 1
+
+    def get_lesser_twin_flags (self, nums):
+        nums = np.asarray(nums, dtype=np.int64)
+        if len(nums) == 0 or nums.max() > self.store_limit:
+            return sieve.PrimeSieve.get_lesser_twin_flags (self, nums)
+        odd = (nums & 1 == 1) & (nums >= 3)
+        j = np.where(odd, nums, 1) >> 1
+        return odd & ((self.twins[j >> 3] >> (j & 7)) & 1 == 1)
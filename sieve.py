@@ -0,0 +1,283 @@
+#
+# Copyright (c) 2016 - 2019, Marcin Barylski
+# All rights reserved.
+
+# Redistribution and use in source and binary forms, with or without modification, 
+# are permitted provided that the following conditions are met:
+# 
+# 1. Redistributions of source code must retain the above copyright notice, 
+#    this list of conditions and the following disclaimer.
+# 
+# 2. Redistributions in binary form must reproduce the above copyright notice, 
+#    this list of conditions and the following disclaimer in the documentation 
+#    and/or other materials provided with the distribution.
+# 
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" 
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED 
+# WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE DISCLAIMED. 
+# IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, 
+# INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, 
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, 
+# OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF LIABILITY, 
+# WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) 
+# ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY 
+# OF SUCH DAMAGE.
+
+import math
+import numpy as np
+import primality
+
+# number of set bits of every byte
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# prime counting index is sampled every PI_STEP integers
+PI_STEP = 65536
+
+# returns pi index of bit-packed primality of odd numbers (as in segments)
+# of all n <= limit: entry j is number of primes < j * pi_step
+def get_pi_index (data, limit, pi_step = PI_STEP):
+    block = pi_step // 16
+    blocks_per_chunk = max(16777216 // block, 1)
+    count = limit // pi_step + 1
+    pi = np.zeros(count, dtype=np.uint64)
+    total = 1 if limit >= 2 else 0
+    for i in range (0, count - 1, blocks_per_chunk):
+        j = min(i + blocks_per_chunk, count - 1)
+        counts = POPCOUNT[data[i*block:j*block]].reshape(j - i, block).sum(axis=1, dtype=np.uint64)
+        pi[i+1:j+1] = total + np.cumsum(counts)
+        total = int(pi[j])
+    return pi
+
+class PrimeSieve:
+
+    # size of one segment (in integers) - odd numbers from one segment
+    # are packed into segment_size/16 bytes, so default segment fits L2 cache
+    segment_size = 0
+
+    # max number of segments kept in memory at the same time
+    max_segments = 0
+
+    # is_prime of n > sieve_limit uses Miller-Rabin / BPSW test instead of
+    # sieving segment of n
+    sieve_limit = 0
+
+    # primes up to sqrt of the highest sieved number
+    base_primes = ""
+    base_limit = 0
+
+    # sieved segments: index of segment -> bit-packed odd numbers
+    segments = ""
+
+    # bitmap of all integers from 0 to bitmap_limit (inclusive)
+    bitmap = ""
+    bitmap_limit = -1
+
+    # consecutive primes found so far
+    prime_list = ""
+
+    # prime counting index up to pi_limit (see init_pi_index)
+    prime_bits = ""
+    pi_index = ""
+    pi_step = 0
+    pi_limit = -1
+
+    # twin prime index up to twin_limit (see init_twin_index)
+    lesser_twins = ""
+    twin_flags = ""
+    twin_flag_bytes = ""
+    twinprime_list = ""
+    twin_limit = -1
+
+    def __init__ (self, segment_size = 1048576, max_segments = 8, sieve_limit = 4294967296):
+        if segment_size % 16 != 0:
+            raise Exception ("Segment size must be a multiple of 16")
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self.sieve_limit = sieve_limit
+        self.base_primes = np.array([], dtype=np.int64)
+        self.base_limit = 0
+        self.segments = {}
+        self.bitmap = np.zeros(0, dtype=bool)
+        self.bitmap_limit = -1
+        self.prime_list = np.array([], dtype=np.int64)
+        self.lesser_twins = np.array([], dtype=np.int64)
+        self.prime_bits = np.zeros(0, dtype=np.uint8)
+        self.pi_index = np.zeros(0, dtype=np.uint64)
+        self.pi_step = PI_STEP
+        self.pi_limit = -1
+        self.twin_flags = np.zeros(0, dtype=np.uint8)
+        self.twin_flag_bytes = b""
+        self.twinprime_list = np.array([], dtype=np.int64)
+        self.twin_limit = -1
+
+    # makes sure all primes <= sqrt(n) are available for sieving
+    def extend_base_primes (self, n):
+        limit = math.isqrt(n) + 1
+        if limit <= self.base_limit:
+            return
+        limit = max(limit, 2 * self.base_limit)
+        is_p = np.ones(limit + 1, dtype=bool)
+        is_p[:2] = False
+        is_p[4::2] = False
+        for q in range (3, math.isqrt(limit) + 1, 2):
+            if is_p[q]:
+                is_p[q*q::2*q] = False
+        self.base_primes = np.flatnonzero(is_p)
+        self.base_limit = limit
+
+    # returns boolean array for odd numbers low+1, low+3, ..., high-1
+    # (low must be even)
+    def sieve_odd_segment (self, low, high):
+        self.extend_base_primes (high)
+        seg = np.ones((high - low) // 2, dtype=bool)
+        for q in self.base_primes[1:]:
+            q = int(q)
+            qq = q * q
+            if qq >= high:
+                break
+            m = max(qq, ((low + q - 1) // q) * q)
+            if m % 2 == 0:
+                m += q
+            seg[(m - low - 1) // 2::q] = False
+        if low == 0:
+            seg[0] = False
+        return seg
+
+    def load_segment (self, index):
+        if len(self.segments) >= self.max_segments:
+            del self.segments[next(iter(self.segments))]
+        low = index * self.segment_size
+        seg = self.sieve_odd_segment (low, low + self.segment_size)
+        bits = np.packbits(seg, bitorder='little').tobytes()
+        self.segments[index] = bits
+        return bits
+
+    def is_prime (self, n):
+        if n < 3:
+            return n == 2
+        if n & 1 == 0:
+            return False
+        if n > self.sieve_limit:
+            return primality.is_prime (n)
+        index = n // self.segment_size
+        bits = self.segments.get(index)
+        if bits is None:
+            bits = self.load_segment (index)
+        j = (n - index * self.segment_size) >> 1
+        return (bits[j >> 3] >> (j & 7)) & 1 == 1
+
+    # returns boolean NumPy array b, where b[n] is True if n is prime
+    # for all 0 <= n <= limit; array may be longer than limit + 1
+    def get_bitmap (self, limit):
+        if limit <= self.bitmap_limit:
+            return self.bitmap
+        new_limit = max(limit, 2 * self.bitmap_limit)
+        low = (self.bitmap_limit + 1) // self.segment_size * self.segment_size
+        high = (new_limit // self.segment_size + 1) * self.segment_size
+        bitmap = np.zeros(high, dtype=bool)
+        bitmap[:low] = self.bitmap[:low]
+        while low < high:
+            bitmap[low+1:low+self.segment_size:2] = self.sieve_odd_segment (low, low + self.segment_size)
+            low += self.segment_size
+        bitmap[2] = True
+        self.bitmap = bitmap
+        self.bitmap_limit = high - 1
+        return self.bitmap
+
+    # makes sure prime_list contains at least i+1 primes; primes are kept
+    # in contiguous uint32 array (uint64 above 2^32)
+    def extend_prime_list (self, i):
+        n = max(i + 1, 6)
+        limit = int(n * (math.log(n) + math.log(math.log(n)))) + 1
+        plist = np.flatnonzero(self.get_bitmap(limit))
+        if len(plist) == 0 or plist[-1] < 4294967296:
+            self.prime_list = plist.astype(np.uint32)
+        else:
+            self.prime_list = plist.astype(np.uint64)
+
+    # 2 is 0th prime
+    def get_ith_prime (self, i):
+        if i >= len(self.prime_list):
+            self.extend_prime_list (i)
+        return int(self.prime_list[i])
+
+    # returns array of first count primes
+    def get_prime_list (self, count):
+        if count > len(self.prime_list):
+            self.extend_prime_list (count - 1)
+        return self.prime_list[:count]
+
+    # builds prime counting index for all n <= limit (at least):
+    #   o prime_bits - primality of odd numbers, bit-packed as segments
+    #   o pi_index - pi_index[j] is number of primes < j * pi_step
+    def init_pi_index (self, limit):
+        b = self.get_bitmap (limit)
+        self.prime_bits = np.packbits(b[1::2], bitorder='little')
+        self.pi_limit = len(b) - 1
+        self.pi_index = get_pi_index (self.prime_bits, self.pi_limit, self.pi_step)
+
+    # number of primes <= n: sampled pi(x) plus popcount of at most
+    # pi_step/16 bytes of prime_bits
+    def get_all_primes_leq (self, n):
+        if n < 2:
+            return 0
+        if n > self.pi_limit:
+            self.init_pi_index (max(n, 2 * self.pi_limit, 1024))
+        j = n // self.pi_step
+        first = (j * self.pi_step) >> 4
+        last = (n - 1) >> 1
+        count = int(self.pi_index[j])
+        if last >= 8 * first:
+            count += int(POPCOUNT[self.prime_bits[first:last >> 3]].sum())
+            count += int(POPCOUNT[self.prime_bits[last >> 3] & ((2 << (last & 7)) - 1)])
+        if j == 0:
+            # 2 is not in prime_bits
+            count += 1
+        return count
+
+    # builds twin prime index for all n <= limit from the prime bitmap:
+    #   o lesser_twins - sorted array of lesser twin primes
+    #   o twin_flags - lesser twin flags of odd numbers, bit-packed
+    #   o twinprime_list - all primes which have a twin: 3, 5, 7, 11, 13, ...
+    def init_twin_index (self, limit):
+        b = self.get_bitmap (limit + 2)
+        lesser = b[0:limit+1] & b[2:limit+3]
+        self.lesser_twins = np.flatnonzero(lesser)
+        self.twin_flags = np.packbits(lesser[1::2], bitorder='little')
+        self.twin_flag_bytes = self.twin_flags.tobytes()
+        twins = np.union1d(self.lesser_twins, self.lesser_twins + 2)
+        self.twinprime_list = twins[twins <= limit]
+        self.twin_limit = limit
+
+    def extend_twin_index (self, n):
+        self.init_twin_index (max(n, 2 * self.twin_limit, 1024))
+
+    def is_lesser_twin_prime (self, n):
+        if n & 1 == 0 or n < 3:
+            return False
+        if n > self.twin_limit:
+            self.extend_twin_index (n)
+        j = n >> 1
+        return (self.twin_flag_bytes[j >> 3] >> (j & 7)) & 1 == 1
+
+    def is_greater_twin_prime (self, n):
+        return self.is_lesser_twin_prime (n - 2)
+
+    # returns boolean NumPy array: is n lesser twin prime, for every n in nums
+    def get_lesser_twin_flags (self, nums):
+        nums = np.asarray(nums, dtype=np.int64)
+        if len(nums) == 0:
+            return np.zeros(0, dtype=bool)
+        if nums.max() > self.twin_limit:
+            self.extend_twin_index (int(nums.max()))
+        odd = (nums & 1 == 1) & (nums >= 3)
+        j = np.where(odd, nums, 1) >> 1
+        return odd & ((self.twin_flags[j >> 3] >> (j & 7)) & 1 == 1)
+
+    def get_greater_twin_flags (self, nums):
+        return self.get_lesser_twin_flags (np.asarray(nums, dtype=np.int64) - 2)
+
+    def get_ith_twinprime (self, i):
+        while i >= len(self.twinprime_list):
+            self.extend_twin_index (2 * self.twin_limit)
+        return int(self.twinprime_list[i])
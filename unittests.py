@@ -26,10 +26,21 @@
 
 import sys
 import unittest
+import numpy as np
 import goldbach
 sys.path.insert(0, '..\\primes\\')
 import primes
 import dataprocessing
+import sieve
+import instrumentation
+import coordinator
+import primality
+import primestore
+import partitionset
+import partitionstore
+import os
+import tempfile
+import threading
 
 #############################################################
 # Unit tests
@@ -125,6 +136,131 @@ class TestMethods(unittest.TestCase):
         self.assertEqual (p2, 7)
         self.assertEqual (iterations, 2)
 
+    def test_compile_delta(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        self.assertEqual (gp.compile_delta ('delta_constant_minus_2', 3), [-2, -2, -2])
+        self.assertEqual (gp.compile_delta ('delta_variable', 5), [0, 2, -4, 2, 2])
+        self.assertEqual (gp.compile_delta ('delta_variable_3xplus1', 4), [0, 0, 7, 10])
+        self.assertEqual (gp.compile_delta ('delta_prime', 6), [0, 2, 2, 4, 2, 4])
+        self.assertEqual (gp.compile_delta ('delta_twinprime', 6), [0, 2, 2, 4, 2, 4])
+        self.assertEqual (len(gp.get_delta_table ('delta_prime', 10)), 12)
+
+    def test_search_for_partition_compiled(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        (p1, p2, duration, iterations) = gp.search_for_partition_compiled (7, 9, 'delta_constant_minus_2')
+        self.assertEqual (p1, 5)
+        self.assertEqual (p2, 11)
+        self.assertEqual (iterations, 2)
+        (p1, p2, duration, iterations) = gp.search_for_partition_compiled (3, 125, 'delta_prime')
+        self.assertEqual (p1, 19)
+        self.assertEqual (p2, 109)
+        self.assertEqual (iterations, 7)
+
+    def test_search_for_sym_primes_compiled(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        (p1, p2, duration, iterations) = gp.search_for_sym_primes_compiled (4, 'delta_constant_minus_1')
+        self.assertEqual (p1, 3)
+        self.assertEqual (p2, 5)
+        self.assertEqual (iterations, 2)
+
+    def test_search_for_sym_primes_block(self):
+        gp = goldbach.GoldbachPartition ()
+        (p1, p2, iterations) = gp.search_for_sym_primes_block (4, 8, 1, 'delta_constant_minus_1')
+        self.assertEqual (p1.tolist(), [3, 5, 5, 7, 5])
+        self.assertEqual (p2.tolist(), [5, 5, 7, 7, 11])
+        self.assertEqual (iterations.tolist(), [2, 1, 2, 1, 4])
+        (p1, p2, iterations) = gp.search_for_sym_primes_block (9, 13, 2, 'delta_constant_minus_2')
+        self.assertEqual (p1.tolist(), [7, 11, 13])
+        self.assertEqual (p2.tolist(), [11, 11, 13])
+        self.assertEqual (iterations.tolist(), [2, 1, 1])
+
+    def test_search_stats(self):
+        stats = instrumentation.SearchStats()
+        stats.record_batch ('a1', [1, 2, 3, 4, 0], 500)
+        stats.record ('a1', 9, 3)
+        d = stats.dump()
+        self.assertEqual (d['a1']['calls'], 6)
+        self.assertEqual (d['a1']['iterations'], 19)
+        self.assertEqual (d['a1']['duration_ns'], 503)
+        self.assertEqual (d['a1']['hist_iterations'], [1, 1, 2, 1, 1])
+        self.assertEqual (d['a1']['hist_latency_ns'], [0, 0, 1, 0, 0, 0, 0, 5])
+        gp = goldbach.GoldbachPartition ()
+        gp.search_for_partition_batch ([12, 16, 98], 'a1')
+        self.assertEqual (gp.stats, "")
+        gp.set_stats_mode (True)
+        gp.search_for_partition_batch ([12, 16, 98], 'a1')
+        gp.search_for_sym_primes_block (4, 8, 1, 'delta_constant_minus_1')
+        self.assertEqual (gp.stats.calls, {'a1': 3, 'delta_constant_minus_1': 5})
+        self.assertEqual (gp.stats.iterations, {'a1': 10, 'delta_constant_minus_1': 10})
+        gp.search_for_difference (8)
+        gp.search_for_difference (8)
+        self.assertEqual (gp.stats.calls['difference'], 2)
+        self.assertEqual (gp.stats.iterations['difference'], 2)
+        self.assertEqual (gp.stats.hist_iterations['difference'], [0, 2])
+        gp.search_for_partition_compiled (7, 9, 'delta_constant_minus_2', 'a1')
+        gp.search_for_partition_compiled (5, 11, 'delta_constant_minus_2', 'a3')
+        gp.search_for_sym_primes_compiled (4, 'delta_constant_minus_1')
+        self.assertEqual (gp.stats.calls['a1'], 4)
+        self.assertEqual (gp.stats.calls['a3'], 1)
+        self.assertEqual (gp.stats.calls['delta_constant_minus_1'], 6)
+        self.assertEqual (sum(gp.stats.hist_latency_ns['difference']), 2)
+
+    def test_verify_segment(self):
+        gp = goldbach.GoldbachPartition ()
+        self.assertEqual (gp.verify_segment (0, 14).tolist(), [2, 3, 3, 3, 5])
+        self.assertEqual (gp.verify_segment (96, 101).tolist(), [7, 19, 3])
+        self.assertEqual (gp.verify_segment (96, 101, 5).tolist(), [7, 19, 3])
+        self.assertEqual (gp.verify_segment (27789878, 27789879).tolist(), [997])
+        self.assertEqual (gp.verify_segment (10, 10).tolist(), [])
+        gp.set_stats_mode (True)
+        gp.verify_segment (0, 14)
+        gp.verify_segment (96, 101, 5)
+        self.assertEqual (gp.stats.calls['segment'], 8)
+        # 1 + 1 + 1 + 1 + 2 and 3 + 7 + 1
+        self.assertEqual (gp.stats.iterations['segment'], 17)
+
+    def test_search_for_partition_wheel(self):
+        gp = goldbach.GoldbachPartition ()
+        self.assertEqual (gp.get_wheel_table (30, 8).tolist(), [1, 7, 19])
+        self.assertEqual (gp.get_wheel_primes (210), [3, 5, 7])
+        (p1, p2, duration, iterations) = gp.search_for_partition_wheel (3, 95, 30, 1)
+        self.assertEqual ((p1, p2, iterations), (19, 79, 2))
+        (p1, p2, duration, iterations) = gp.search_for_partition_wheel (3, 9, 30, 1)
+        self.assertEqual ((p1, p2, iterations), (5, 7, 1))
+        (p1, p2, duration, iterations) = gp.search_for_partition_wheel (3, 3, 210, -1)
+        self.assertEqual ((p1, p2, iterations), (3, 3, 1))
+        (p1, p2, iterations) = gp.search_for_partition_wheel_batch ([12, 98, 128], 'a2', 30)
+        self.assertEqual (p1.tolist(), [5, 19, 19])
+        self.assertEqual (iterations.tolist(), [1, 2, 2])
+        (p1, p2, iterations) = gp.search_for_partition_wheel_batch ([6, 12, 98, 128], 'a1', 210)
+        self.assertEqual (p1.tolist(), [3, 5, 37, 61])
+        self.assertEqual (p2.tolist(), [3, 7, 61, 67])
+        self.assertEqual (iterations.tolist(), [1, 1, 1, 1])
+        gp.set_stats_mode (True)
+        gp.search_for_partition_wheel (3, 95, 30, 1, 'a10')
+        gp.search_for_partition_wheel (49, 49, 30, -1)
+        gp.search_for_partition_wheel_batch ([12, 98, 128], 'a1', 30, 'a8')
+        self.assertEqual (gp.stats.calls, {'a10': 1, 'w30': 1, 'a8': 3})
+
+    def test_search_for_partition_batch(self):
+        gp = goldbach.GoldbachPartition ()
+        (p1, p2, iterations) = gp.search_for_partition_batch ([12, 16, 98], 'a1')
+        self.assertEqual (p1.tolist(), [5, 5, 37])
+        self.assertEqual (p2.tolist(), [7, 11, 61])
+        self.assertEqual (iterations.tolist(), [1, 2, 7])
+        (p1, p2, iterations) = gp.search_for_partition_batch ([10, 12, 98], 'a2')
+        self.assertEqual (p1.tolist(), [3, 5, 19])
+        self.assertEqual (p2.tolist(), [7, 7, 79])
+        self.assertEqual (iterations.tolist(), [1, 2, 9])
+        (p1, p2, iterations) = gp.search_for_partition_batch ([10, 12, 98], 'a4')
+        self.assertEqual (p1.tolist(), [5, 5, 19])
+        self.assertEqual (iterations.tolist(), [1, 1, 8])
+        with self.assertRaises(Exception):
+            gp.search_for_partition_batch ([6], 'a4')
+
     def test_search_for_sym_primes_a1(self):
         p = primes.Primes(False)
         gp = goldbach.GoldbachPartition (p)
@@ -146,6 +282,59 @@ class TestMethods(unittest.TestCase):
         self.assertEqual(gp.find_sum_of_prime_numbers(10), [(3,7),(5,5)])
         self.assertEqual(gp.find_sum_of_prime_numbers(22), [(3,19),(5,17),(11,11)])
 
+    def test_sum_of_prime_numbers_bitmap(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        self.assertEqual(gp.find_sum_of_prime_numbers_bitmap(4).tolist(), [2])
+        self.assertEqual(gp.find_sum_of_prime_numbers_bitmap(10).tolist(), [3,5])
+        self.assertEqual(gp.find_sum_of_prime_numbers_bitmap(22).tolist(), [3,5,11])
+        gp.set_bitmap_mode (True, 100)
+        self.assertEqual(gp.find_sum_of_prime_numbers(4), [(2,2)])
+        self.assertEqual(gp.find_sum_of_prime_numbers(22), [(3,19),(5,17),(11,11)])
+        self.assertEqual(gp.find_sum_of_prime_numbers(90), [(7, 83), (11, 79), (17, 73), (19, 71), (23, 67), (29, 61), (31, 59), (37, 53), (43, 47)])
+
+    def test_iter_partitions(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        for bitmap_mode in [False, True]:
+            gp.set_bitmap_mode (bitmap_mode)
+            self.assertEqual(list(gp.iter_partitions(22)), [(3,19),(5,17),(11,11)])
+            self.assertEqual(list(gp.iter_partitions(22, 'center')), [(11,11),(5,17),(3,19)])
+            self.assertEqual(list(gp.iter_partitions(2)), [])
+            self.assertEqual(gp.count_partitions(90), 9)
+            self.assertEqual(gp.count_partitions(2), 0)
+            self.assertEqual(gp.find_first_partition(90), (7, 83))
+            self.assertEqual(gp.find_first_partition(90, order = 'center'), (43, 47))
+            self.assertEqual(gp.find_first_partition(90, lambda p1, p2: p1 % 6 == 5), (11, 79))
+            self.assertEqual(gp.find_first_partition(90, lambda p1, p2: p1 == 13), None)
+
+    def test_get_goldbach_comet(self):
+        gp = goldbach.GoldbachPartition ()
+        self.assertEqual(gp.get_goldbach_comet(30).tolist(), [0, 0, 1, 1, 1, 2, 1, 2, 2, 2, 2, 3, 3, 3, 2, 3])
+        self.assertEqual(gp.get_goldbach_comet(30, 4).tolist(), [0, 0, 1, 1, 1, 2, 1, 2, 2, 2, 2, 3, 3, 3, 2, 3])
+        self.assertEqual(gp.get_goldbach_comet(1000, 64)[500], 28)
+
+    def test_get_6kpm1_counts(self):
+        gp = goldbach.GoldbachPartition ()
+        (count, km1, kp1, km1_both, kp1_both, lesser_both, lesser_km1_both) = gp.get_6kpm1_counts (40, 4)
+        # 34 = 3+31, 5+29, 11+23, 17+17
+        self.assertEqual (count[17], 3)
+        self.assertEqual (km1[17], 6)
+        self.assertEqual (kp1[17], 1)
+        self.assertEqual (km1_both[17], 3)
+        self.assertEqual (kp1_both[17], 0)
+        self.assertEqual (lesser_both[17], 2)
+        self.assertEqual (lesser_km1_both[17], 2)
+        # 36 = 5+31, 7+29, 13+23, 17+19
+        self.assertEqual (count[18], 4)
+        self.assertEqual (km1[18], 4)
+        self.assertEqual (kp1[18], 4)
+        self.assertEqual (lesser_both[18], 0)
+        # 8 = 3+5
+        self.assertEqual (km1[4], 1)
+        self.assertEqual (lesser_both[4], 1)
+        self.assertEqual (lesser_km1_both[4], 0)
+
     def test_search_for_difference(self):
         p = primes.Primes(False)
         gp = goldbach.GoldbachPartition (p)
@@ -163,6 +352,19 @@ class TestMethods(unittest.TestCase):
         self.assertEqual (p2, 11)
         self.assertEqual (iterations, 2)
 
+    def test_search_for_difference_block(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        (p1, p2, iterations) = gp.search_for_difference_block (2, 8)
+        self.assertEqual (p1.tolist(), [3, 3, 5, 3])
+        self.assertEqual (p2.tolist(), [5, 7, 11, 11])
+        self.assertEqual (iterations.tolist(), [1, 1, 2, 1])
+        (p1, p2, iterations) = gp.search_for_difference_block (4, 400)
+        for d in range (4, 401, 2):
+            (q1, q2, duration, i) = gp.search_for_difference (d)
+            self.assertEqual (p1[(d - 4) // 2], q1)
+            self.assertEqual (iterations[(d - 4) // 2], i)
+
     def search_for_6kpm1_in_goldbach_neg(self):
         p = primes.Primes(False)
         gp = goldbach.GoldbachPartition (p)
@@ -214,6 +416,168 @@ class TestMethods(unittest.TestCase):
         self.assertEqual (q, 3)
         self.assertTrue (res)
 
+    def test_sieve_isprime(self):
+        s = sieve.PrimeSieve (64, 2)
+        self.assertTrue(s.is_prime(2))
+        self.assertTrue(s.is_prime(3))
+        self.assertTrue(s.is_prime(61))
+        self.assertTrue(s.is_prime(67))
+        self.assertTrue(s.is_prime(1009))
+        self.assertFalse(s.is_prime(1))
+        self.assertFalse(s.is_prime(4))
+        self.assertFalse(s.is_prime(63))
+        self.assertFalse(s.is_prime(3379995))
+        self.assertEqual(len(s.segments), 2)
+
+    def test_primality_is_prime(self):
+        s = sieve.PrimeSieve ()
+        bitmap = s.get_bitmap (100000)
+        for n in range (100000):
+            self.assertEqual(primality.is_prime(n), bitmap[n])
+        # strong pseudoprimes and Carmichael numbers
+        for n in [561, 2047, 3215031751, 3825123056546413051, 318665857834031151167461]:
+            self.assertFalse(primality.is_prime(n))
+        # strong Lucas pseudoprimes are rejected by strong test to base 2
+        self.assertTrue(primality.is_strong_lucas_probable_prime(5459))
+        self.assertFalse(primality.is_prime(5459))
+        for n in [2**61 - 1, 2**64 - 59, 10**18 + 3, 2**89 - 1, 2**127 - 1]:
+            self.assertTrue(primality.is_prime(n))
+        self.assertFalse(primality.is_prime((2**61 - 1) * (2**89 - 1)))
+        self.assertFalse(primality.is_prime((2**89 - 1)**2))
+
+    def test_sieve_isprime_above_limit(self):
+        s = sieve.PrimeSieve (64, 2, 1000)
+        self.assertTrue(s.is_prime(1009))
+        self.assertFalse(s.is_prime(1011))
+        self.assertTrue(s.is_prime(10**18 + 3))
+        self.assertEqual(len(s.segments), 0)
+        gp = goldbach.GoldbachPartition ()
+        (p1, p2, duration, iterations) = gp.search_for_partition_compiled (3, 10**18 - 3, 'delta_prime')
+        self.assertEqual (p1 + p2, 10**18)
+        self.assertTrue (primality.is_prime (p1) and primality.is_prime (p2))
+
+    def test_prime_store(self):
+        with tempfile.TemporaryDirectory () as d:
+            file_name = os.path.join (d, "primes.bin")
+            primestore.write_prime_store (file_name, 100003, 1024)
+            self.assertEqual(primestore.read_prime_store_header (file_name)['limit'], 100003)
+            ps = primestore.PrimeStore (file_name, 1024, 2, 100003, True)
+            s = sieve.PrimeSieve (1024, 2)
+            for n in [0, 1, 2, 3, 4, 9, 97, 99991, 100003, 100005]:
+                self.assertEqual(ps.is_prime(n), s.is_prime(n))
+            self.assertEqual(list(ps.get_bitmap (100004)), list(s.get_bitmap (100004)))
+            self.assertEqual(ps.get_ith_prime (1000), s.get_ith_prime (1000))
+            gp = goldbach.GoldbachPartition (ps)
+            self.assertEqual(list(gp.verify_segment (4, 1000)), list(goldbach.GoldbachPartition (s).verify_segment (4, 1000)))
+            with open (file_name, "r+b") as f:
+                f.seek (-1, 2)
+                f.write (b"\xff")
+            with self.assertRaises(Exception):
+                primestore.PrimeStore (file_name, verify = True)
+            with open (file_name, "r+b") as f:
+                f.write (b"NOTPRIME")
+            with self.assertRaises(Exception):
+                primestore.read_prime_store_header (file_name)
+
+    def test_prime_store_extend_import(self):
+        with tempfile.TemporaryDirectory () as d:
+            file_name = os.path.join (d, "primes.bin")
+            file_primes = os.path.join (d, "primes.txt")
+            primestore.write_prime_store (file_name, 5000, 1024)
+            primestore.extend_prime_store (file_name, 20011, 1024, 2)
+            ps = primestore.PrimeStore (file_name, 1024, 2, verify = True)
+            s = sieve.PrimeSieve (1024, 2)
+            b = s.get_bitmap (20013)
+            self.assertEqual(ps.store_limit, 20011)
+            self.assertEqual([n for n in range(0, 20012) if ps.is_prime(n)], [n for n in range(0, 20012) if b[n]])
+            self.assertEqual([n for n in range(0, 20012) if ps.is_lesser_twin_prime(n)], [n for n in range(0, 20012) if b[n] and b[n+2]])
+            self.assertEqual(list(ps.pi_index), [0])
+            ps.close ()
+            with open (file_primes, "w") as f:
+                f.write ("2, 3, 5, 7\n11, 13, 17\n19, 23\n")
+            primestore.import_legacy_primes (file_name, file_primes)
+            ps = primestore.PrimeStore (file_name, 1024, 2, verify = True)
+            self.assertEqual(ps.store_limit, 23)
+            self.assertEqual([n for n in range(0, 24) if ps.is_prime(n)], [2, 3, 5, 7, 11, 13, 17, 19, 23])
+            self.assertEqual([n for n in range(0, 24) if ps.is_lesser_twin_prime(n)], [3, 5, 11, 17])
+            ps.close ()
+
+    def test_sieve_get_bitmap(self):
+        s = sieve.PrimeSieve (64, 2)
+        b = s.get_bitmap (100)
+        self.assertEqual([i for i in range(0, 30) if b[i]], [2, 3, 5, 7, 11, 13, 17, 19, 23, 29])
+        self.assertEqual(sum(b[0:101]), 25)
+
+    def test_get_all_primes_leq(self):
+        s = sieve.PrimeSieve (1024, 2)
+        b = s.get_bitmap (140000)
+        for n in list(range(0, 200)) + [65535, 65536, 65537, 131071, 131072, 131073, 140000]:
+            self.assertEqual(s.get_all_primes_leq (n), sum(b[0:n+1]))
+        self.assertEqual(s.get_all_primes_leq (1000000), 78498)
+        gp = goldbach.GoldbachPartition ()
+        self.assertEqual(gp.get_all_primes_leq (100), 25)
+        self.assertEqual(gp.get_ith_prime (25), 101)
+        self.assertEqual(list(gp.get_prime_index ().get_prime_list (5)), [2, 3, 5, 7, 11])
+        with tempfile.TemporaryDirectory () as d:
+            file_name = os.path.join (d, "primes.bin")
+            primestore.write_prime_store (file_name, 140000, 1024)
+            ps = primestore.PrimeStore (file_name, 1024, 2)
+            for n in [0, 1, 2, 3, 100, 65536, 65537, 131072, 140000, 150000]:
+                self.assertEqual(ps.get_all_primes_leq (n), s.get_all_primes_leq (n))
+            ps.close ()
+
+    def test_sieve_get_ith_prime(self):
+        s = sieve.PrimeSieve (64, 2)
+        self.assertEqual(s.get_ith_prime(0), 2)
+        self.assertEqual(s.get_ith_prime(1), 3)
+        self.assertEqual(s.get_ith_prime(2), 5)
+        self.assertEqual(s.get_ith_prime(999), 7919)
+
+    def test_sieve_get_ith_twinprime(self):
+        s = sieve.PrimeSieve (64, 2)
+        self.assertEqual(s.get_ith_twinprime(0), 3)
+        self.assertEqual(s.get_ith_twinprime(1), 5)
+        self.assertEqual(s.get_ith_twinprime(2), 7)
+        self.assertEqual(s.get_ith_twinprime(3), 11)
+        self.assertEqual(s.get_ith_twinprime(7), 29)
+
+    def test_sieve_twin_index(self):
+        s = sieve.PrimeSieve (64, 2)
+        s.init_twin_index (100)
+        self.assertEqual(s.lesser_twins.tolist(), [3, 5, 11, 17, 29, 41, 59, 71])
+        self.assertTrue(s.is_lesser_twin_prime(3))
+        self.assertTrue(s.is_lesser_twin_prime(71))
+        self.assertFalse(s.is_lesser_twin_prime(7))
+        self.assertFalse(s.is_lesser_twin_prime(2))
+        self.assertTrue(s.is_greater_twin_prime(7))
+        self.assertFalse(s.is_greater_twin_prime(3))
+        self.assertTrue(s.is_lesser_twin_prime(101))
+        self.assertEqual(s.get_lesser_twin_flags([2, 3, 4, 5, 7, 101]).tolist(), [False, True, False, True, False, True])
+        self.assertEqual(s.get_greater_twin_flags([2, 3, 5, 7, 13]).tolist(), [False, False, True, True, True])
+
+    def test_search_for_partition_sieve(self):
+        gp = goldbach.GoldbachPartition ()
+        (p1, p2, duration, iterations) = gp.search_for_partition (3, 97, lambda iteration: gp.delta_prime(iteration))
+        self.assertEqual (p1, 3)
+        self.assertEqual (p2, 97)
+        (p1, p2, duration, iterations) = gp.search_for_partition (3, 125, lambda iteration: gp.delta_prime(iteration))
+        self.assertEqual (p1, 19)
+        self.assertEqual (p2, 109)
+        self.assertEqual (iterations, 7)
+
+    def test_reduce_prime_for_goldbach_table(self):
+        p = primes.Primes(False)
+        gp = goldbach.GoldbachPartition (p)
+        gp.init_reduction_table (200)
+        self.assertEqual (gp.reduce_prime_for_goldbach (5, False), (1, 3, True))
+        self.assertEqual (gp.reduce_prime_for_goldbach (11, False), (2, 7, True))
+        self.assertEqual (gp.reduce_prime_for_goldbach (7, True), (2, 3, True))
+        self.assertEqual (gp.reduce_prime_for_goldbach (11, True), (3, 3, True))
+        self.assertEqual (gp.reduce_prime_for_goldbach (127, True), (0, 125, False))
+        self.assertEqual (gp.reduce_prime_for_goldbach (127, False), (8, -1, False))
+        self.assertEqual (gp.get_reduction_k ([5, 7, 11, 127], True).tolist(), [1, 2, 3, 0])
+        self.assertEqual (gp.get_reduction_k ([5, 7, 11, 127], False).tolist(), [1, 1, 2, 0])
+
     def test_dictionary_cleanup(self):
         dp = dataprocessing.DataProcessing ()
         d = {0:2, 6:1, 2:3}
@@ -281,6 +645,22 @@ class TestMethods(unittest.TestCase):
         self.assertEqual(dp.get_avg_value_from_list([5]), 5)
         self.assertEqual(dp.get_avg_value_from_list([3, 2, 1, 10]), 4)
 
+    def test_running_stats(self):
+        dp = dataprocessing.DataProcessing ()
+        values = [3, 1, 4, 1, 5, 9, 2, 6]
+        r = dataprocessing.RunningStats ()
+        self.assertEqual(r.get_avg (), 0)
+        for i in range (len(values)):
+            r.add (values[i])
+            self.assertEqual(r.get_avg (), dp.get_avg_value_from_list (values[0:i+1]))
+        self.assertEqual(r.get_min (), 1)
+        self.assertEqual(r.get_max (), 9)
+        self.assertAlmostEqual(r.get_variance (), float(np.var(values)))
+        r = dataprocessing.RunningStats ([0.1] * 1000000)
+        self.assertEqual(r.get_avg (), 0.1)
+        t = dataprocessing.TrendCounter ()
+        self.assertEqual([t.add (x) for x in [2, 3, 3, 1, 4]], [1, 2, 2, 1, 2])
+
     def test_get_number_of_pairs(self):
         dp = dataprocessing.DataProcessing ()
         self.assertEqual(dp.get_number_of_pairs([(2,3)]), 1)
@@ -293,6 +673,109 @@ class TestMethods(unittest.TestCase):
         self.assertEqual(dp.get_diff_in_factors([(2,5),(2,3)]), [3,1])
         self.assertEqual(dp.get_diff_in_factors([(2,5),(3,2)]), [3,-1])
 
+    def test_get_partition_stats(self):
+        dp = dataprocessing.DataProcessing ()
+        self.assertEqual(dp.get_partition_stats (8, [(3,5)]), (1, 3, 5, 4, 2, 2, 2, 37.5, 62.5, 50))
+        self.assertEqual(dp.get_partition_stats (4, [(2,2)]), (1, 2, 2, 2, 0, 0, 0, 50, 50, 50))
+        gp = goldbach.GoldbachPartition ()
+        for n in [10, 100, 1000, 9998]:
+            factors = gp.find_sum_of_prime_numbers (n)
+            diffs = dp.get_diff_in_factors (factors)
+            expected = (dp.get_number_of_pairs (factors), dp.get_min_factor (factors), dp.get_max_factor (factors), dp.get_avg_factor (factors),
+                        dp.get_min_value_from_list (diffs), dp.get_max_value_from_list (diffs), dp.get_avg_value_from_list (diffs),
+                        dp.get_perc_min_saturation_from_factors (n, factors), dp.get_perc_max_saturation_from_factors (n, factors),
+                        dp.get_perc_avg_saturation_from_factors (n, factors))
+            self.assertEqual(dp.get_partition_stats (n, factors), expected)
+            self.assertEqual(dp.get_partition_stats (n, np.array(factors)), expected)
+
+    def test_partition_set(self):
+        dp = dataprocessing.DataProcessing ()
+        gp = goldbach.GoldbachPartition ()
+        gp.set_bitmap_mode (True, 10000)
+        for n in [4, 10, 100, 9998]:
+            factors = gp.find_sum_of_prime_numbers (n)
+            ps = gp.find_partition_set (n)
+            self.assertEqual(ps.to_list (), factors)
+            self.assertEqual(list(ps), factors)
+            self.assertEqual(str(ps), str(factors))
+            self.assertEqual(ps[-1], factors[-1])
+            self.assertEqual(len(ps), dp.get_number_of_pairs (factors))
+            self.assertEqual(list(dp.get_diff_in_factors (ps)), dp.get_diff_in_factors (factors))
+            self.assertEqual(dp.get_min_factor (ps), dp.get_min_factor (factors))
+            self.assertEqual(dp.get_max_factor (ps), dp.get_max_factor (factors))
+            self.assertEqual(dp.get_avg_factor (ps), dp.get_avg_factor (factors))
+            self.assertEqual(dp.get_unique_factors (ps), dp.get_unique_factors (factors))
+            self.assertEqual(dp.get_max_ratio_in_factors (ps), dp.get_max_ratio_in_factors (factors))
+            self.assertEqual(dp.get_partition_stats (n, ps), dp.get_partition_stats (n, factors))
+        self.assertEqual(partitionset.from_pairs (10, [(3,7), (5,5)]).to_list (), [(3,7), (5,5)])
+        self.assertEqual(dp.get_unique_factors ([(3,7), (5,5), (3,7)]), [3, 7, 5])
+        gp.set_bitmap_mode (False)
+        self.assertEqual(gp.find_partition_set (10).to_list (), [(3,7), (5,5)])
+
+    def test_iter_sums_from_file (self):
+        dp = dataprocessing.DataProcessing ()
+        self.assertEqual(list(dp.read_p1_from_line (" Pairs: [(3, 7), (5, 5)]\n")), [3, 5])
+        self.assertEqual(list(dp.read_p1_from_line (" Pairs: []\n")), [])
+        with tempfile.TemporaryDirectory () as d:
+            file_name = os.path.join (d, "pairs.txt")
+            with open (file_name, "w") as f:
+                for n in [4, 10, 12]:
+                    f.write ("Number: " + str(n) + "\n")
+                    f.write (" Pairs: " + str(goldbach.GoldbachPartition ().find_sum_of_prime_numbers (n)) + "\n")
+            records = [(n, ps.to_list ()) for (n, ps) in dp.iter_sums_from_file (file_name)]
+        self.assertEqual(records, [(4, [(2, 2)]), (10, [(3, 7), (5, 5)]), (12, [(5, 7)])])
+
+    def test_partition_store (self):
+        gp = goldbach.GoldbachPartition ()
+        gp.set_bitmap_mode (True, 5000)
+        with tempfile.TemporaryDirectory () as d:
+            for compress in [True, False]:
+                file_name = os.path.join (d, "pairs_" + str(compress) + ".bin")
+                w = partitionstore.PartitionStoreWriter (file_name, 100, compress)
+                for n in range (2, 3000, 2):
+                    w.add (n, gp.find_partition_set (n))
+                w.flush ()
+                w.close ()
+                w = partitionstore.PartitionStoreWriter (file_name, 100, compress, True)
+                with self.assertRaises(Exception):
+                    w.add (2998, gp.find_partition_set (2998))
+                for n in range (3000, 4000, 2):
+                    w.add (n, gp.find_sum_of_prime_numbers (n))
+                w.close ()
+                store = partitionstore.PartitionStore (file_name, True)
+                self.assertEqual(store.get_last_number (), 3998)
+                self.assertEqual(store.get_number_of_blocks (), 20)
+                for n in [2, 4, 10, 998, 1000, 2998, 3000, 3998]:
+                    self.assertEqual(store.get_partition_set (n).to_list (), gp.find_sum_of_prime_numbers (n))
+                self.assertFalse(4000 in store)
+                self.assertFalse(11 in store)
+                records = list(store.iter_partition_sets (2990))
+                self.assertEqual([n for (n, ps) in records], list(range (2990, 4000, 2)))
+                self.assertEqual(records[5][1].to_list (), gp.find_sum_of_prime_numbers (3000))
+                store.close ()
+            # interrupted write of the last block
+            with open (file_name, "r+b") as f:
+                f.truncate (os.path.getsize (file_name) - 1)
+            store = partitionstore.PartitionStore (file_name)
+            self.assertEqual(store.get_last_number (), 3798)
+            store.close ()
+            # blocks are closed early when payload would exceed MAX_PAYLOAD
+            max_payload = partitionstore.MAX_PAYLOAD
+            partitionstore.MAX_PAYLOAD = 1024
+            try:
+                file_name = os.path.join (d, "pairs_small.bin")
+                w = partitionstore.PartitionStoreWriter (file_name, 100, False)
+                for n in range (2, 2000, 2):
+                    w.add (n, gp.find_partition_set (n))
+                w.close ()
+                store = partitionstore.PartitionStore (file_name, True)
+                self.assertTrue(store.get_number_of_blocks () > 10)
+                self.assertTrue(max(store.block_bytes) <= 1024)
+                self.assertEqual(store.get_partition_set (1998).to_list (), gp.find_sum_of_prime_numbers (1998))
+                store.close ()
+            finally:
+                partitionstore.MAX_PAYLOAD = max_payload
+
     def test_read_num_from_line (self):
         dp = dataprocessing.DataProcessing ()
         self.assertEqual(dp.read_num_from_line ("Number: 10"), 10)
@@ -303,6 +786,48 @@ class TestMethods(unittest.TestCase):
         self.assertEqual(dp.read_sums_from_line (" Pairs: [(3, 7), (5, 5)]"), [(3, 7), (5, 5)])
         self.assertEqual(dp.read_sums_from_line (" Pairs: [(7, 83), (11, 79), (17, 73), (19, 71), (23, 67), (29, 61), (31, 59), (37, 53), (43, 47)]"), [(7, 83), (11, 79), (17, 73), (19, 71), (23, 67), (29, 61), (31, 59), (37, 53), (43, 47)])
 
+    def test_lease_ledger(self):
+        with tempfile.TemporaryDirectory () as d:
+            file_ledger = os.path.join(d, "ledger.pickle")
+            ledger = coordinator.LeaseLedger (6, 41, 4, 10, file_ledger)
+            self.assertEqual (ledger.get_number_of_ranges (), 5)
+            self.assertEqual (ledger.acquire ('w1', 0), (0, 6, 12))
+            self.assertEqual (ledger.acquire ('w2', 0), (1, 14, 20))
+            self.assertEqual (ledger.get_frontier (), 4)
+            self.assertTrue (ledger.complete (1, {'max_iterations': 2}))
+            self.assertFalse (ledger.complete (1, {'max_iterations': 2}))
+            self.assertEqual (ledger.get_frontier (), 4)
+            self.assertTrue (ledger.complete (0, {'max_iterations': 1}))
+            self.assertEqual (ledger.get_frontier (), 20)
+            self.assertEqual (ledger.acquire ('w3', 5), (2, 22, 28))
+            self.assertEqual (ledger.acquire ('w4', 5), (3, 30, 36))
+            # lease of w3 expires at 15 and is given to w5
+            self.assertEqual (ledger.acquire ('w5', 16), (2, 22, 28))
+            self.assertTrue (ledger.complete (3, {'max_iterations': 3}))
+            # restarted coordinator continues with the gap at range 2
+            ledger = coordinator.LeaseLedger (6, 41, 4, 10, file_ledger)
+            self.assertEqual (ledger.get_frontier (), 20)
+            self.assertEqual (sorted(ledger.completed), [0, 1, 3])
+            self.assertEqual (ledger.acquire ('w6', 0), (2, 22, 28))
+            self.assertEqual (ledger.acquire ('w6', 0), (4, 38, 40))
+            self.assertEqual (ledger.acquire ('w6', 0), None)
+            ledger.complete (4, {})
+            ledger.complete (2, {})
+            self.assertTrue (ledger.is_finished ())
+            self.assertEqual (ledger.get_frontier (), 40)
+
+    def test_coordinator_localhost(self):
+        ledger = coordinator.LeaseLedger (6, 400, 10, 60)
+        c = coordinator.Coordinator (ledger, ('localhost', 0))
+        thread = threading.Thread (target=c.serve, args=(0.05,))
+        thread.start()
+        count = coordinator.Worker (c.address).run (lambda first, last: {'first': first, 'last': last})
+        thread.join()
+        self.assertEqual (count, 20)
+        self.assertTrue (ledger.is_finished ())
+        self.assertEqual (ledger.get_frontier (), 400)
+        self.assertEqual (ledger.completed[19], {'first': 386, 'last': 400})
+
 #############################################################
 # Main - run unit tests
 #############################################################